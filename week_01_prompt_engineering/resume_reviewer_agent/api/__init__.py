@@ -1,10 +1,34 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
 from .routes import router
+from .metrics import MetricsMiddleware
+from utils.uploads import UploadLimitMiddleware
+from utils.llm_gateway import close_all as close_llm_clients
+from utils.llm_limits import LLMError
+from utils.metrics import CONTENT_TYPE, render_metrics
 
 app = FastAPI(title="Resume Reviewer API")
+# Oversized uploads get a 413 before Starlette spools the multipart body
+app.add_middleware(UploadLimitMiddleware)
+# Per-endpoint request, pipeline stage and LLM call metrics, served at /metrics (outermost, so 413s are counted)
+app.add_middleware(MetricsMiddleware)
+
+@app.on_event("shutdown")
+def shutdown_llm_clients():
+    close_llm_clients()
+
+@app.exception_handler(LLMError)
+async def llm_error_handler(request: Request, exc: LLMError):
+    # Rate limits, overload and open circuits tell the client when to come back
+    headers = {"Retry-After": str(max(1, round(exc.retry_after)))} if exc.retry_after is not None else None
+    return JSONResponse(status_code=exc.status_code, content={"detail": str(exc), "error": type(exc).__name__}, headers=headers)
 
 @app.get("/")
 async def root():
     return {"message": "Welcome to Resume Reviewer Agent!"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(render_metrics(), media_type=CONTENT_TYPE)
+
 app.include_router(router, prefix="/api", tags=["resume-review"])
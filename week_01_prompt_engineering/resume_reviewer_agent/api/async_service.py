@@ -0,0 +1,237 @@
+import time
+import asyncio
+import logging
+from typing import Dict, Any, Optional, Tuple, AsyncIterator
+from prompts.resume_analysis import MAIN_ANALYSIS_PROMPT, FEEDBACK_PROMPT
+from utils.parser import ResumeSource
+from utils.extraction_cache import extract_resume_cached
+from utils.llm_cache import make_cache_key, is_bypassed
+from utils.prompt_cache import usage_to_dict
+from utils.job_match import ResumeInput
+from utils.model_router import REVIEW, JOB_MATCH, REPORT
+from utils.output import IncrementalReportRenderer, generate_markdown_report, iter_markdown_report
+from .service import ResumeReviewService
+
+logger = logging.getLogger("resume_reviewer")
+
+class AsyncResumeReviewService(ResumeReviewService):
+    """Non-blocking counterpart of ResumeReviewService built on the gateway's async client.
+
+    Prompt construction and configuration are shared with the sync service; every
+    LLM-facing method is a coroutine so a single event loop can hold many reviews
+    in flight, and independent stages run concurrently.
+    """
+
+    async def call_llm_with_usage(self, prompt: str, model: str = None, temperature: float = 0.2, messages: Optional[list] = None,
+                                  use_cache: bool = True, cache_prefix: bool = False, request_class: str = REVIEW) -> Tuple[str, Dict[str, Any]]:
+        request, route = self.route_request(prompt, model, messages, cache_prefix, request_class)
+        cache_key = make_cache_key(request, temperature) if use_cache else None
+        if cache_key:
+            # The SQLite read may wait on another worker's lock; keep it off the loop
+            cached = await asyncio.to_thread(self.cache.get, cache_key)
+            if cached is not None:
+                logger.info("LLM cache hit")
+                return cached, {**usage_to_dict(None), "response_cache_hit": True, "route": route._asdict()}
+
+        async def issue():
+            started = time.perf_counter()
+            response = await self.gateway.acreate(request)
+            self.router.record(route, time.perf_counter() - started)
+            if cache_key:
+                await asyncio.to_thread(self.cache.set, cache_key, self._response_text(response))
+            return response
+
+        if cache_key is None or is_bypassed():
+            # A fresh generation was asked for; don't hand back another caller's response
+            response, shared = await issue(), False
+        else:
+            response, shared = await self.flights.ado(cache_key, issue)
+        usage = {**usage_to_dict(getattr(response, "usage", None)), "route": route._asdict()}
+        if shared:
+            usage["coalesced"] = True
+        return self._response_text(response), usage
+
+    async def call_llm(self, prompt: str, model: str = None, temperature: float = 0.2, messages: Optional[list] = None, use_cache: bool = True,
+                       request_class: str = REVIEW) -> str:
+        text, _ = await self.call_llm_with_usage(prompt, model, temperature, messages, use_cache, request_class=request_class)
+        return text
+
+    async def stream_llm(self, prompt: str, model: str = None, temperature: float = 0.2, messages: Optional[list] = None,
+                         use_cache: bool = True, cache_prefix: bool = False, request_class: str = REVIEW) -> AsyncIterator[Tuple[str, Any]]:
+        """Stream a completion as ``("delta", text)`` chunks followed by one ``("usage", dict)``.
+
+        Failures before the first chunk are retried by the gateway; errors are raised as ``LLMError``.
+        Identical streams already in flight are joined, with the chunks so far replayed first.
+        """
+        request, route = self.route_request(prompt, model, messages, cache_prefix, request_class)
+        cache_key = make_cache_key(request, temperature) if use_cache else None
+        if cache_key:
+            # The SQLite read may wait on another worker's lock; keep it off the loop
+            cached = await asyncio.to_thread(self.cache.get, cache_key)
+            if cached is not None:
+                logger.info("LLM cache hit")
+                yield "delta", cached
+                yield "usage", {**usage_to_dict(None), "response_cache_hit": True, "route": route._asdict()}
+                return
+
+        async def upstream():
+            parts = []
+            final_message = None
+            started = time.perf_counter()
+            async for kind, data in self.gateway.astream(request):
+                if kind == "delta":
+                    parts.append(data)
+                    yield "delta", data
+                else:
+                    final_message = data
+            self.router.record(route, time.perf_counter() - started)
+            if cache_key:
+                await asyncio.to_thread(self.cache.set, cache_key, "".join(parts))
+            yield "usage", {**usage_to_dict(getattr(final_message, "usage", None)), "route": route._asdict()}
+
+        if cache_key is None or is_bypassed():
+            events, shared = upstream(), False
+        else:
+            events, shared = self.flights.subscribe(cache_key, upstream)
+        try:
+            async for kind, data in events:
+                if kind == "usage" and shared:
+                    data = {**data, "coalesced": True}
+                yield kind, data
+        finally:
+            # Leave the fan-out right away when the client goes away
+            await events.aclose()
+
+    async def stream_review_resume_text(self, resume_text: str, job_title: Optional[str] = None, messages: Optional[list] = None) -> AsyncIterator[Tuple[str, Any]]:
+        """Streaming counterpart of ``review_resume_text``."""
+        if messages:
+            self._ensure_system_prompt(resume_text, job_title, messages)
+            async for event in self.stream_llm("", messages=self.conversation.prepare(messages), cache_prefix=True,
+                                               request_class=self.router.classify_followup(messages)):
+                yield event
+            return
+        signature, prior = await asyncio.to_thread(self._near_duplicate_lookup, resume_text, job_title)
+        if prior is not None:
+            # Structured reviews are stored without free text; stream their rendered report
+            yield "delta", prior.get("llm_analysis") or generate_markdown_report(prior)
+            yield "usage", prior["usage"]
+            return
+        chunks = []
+        async for event in self.stream_llm(self._reviewer_system_prompt(resume_text, job_title)):
+            if event[0] == "delta":
+                chunks.append(event[1])
+            yield event
+        await asyncio.to_thread(self._remember_review, signature, job_title, {"llm_analysis": "".join(chunks)})
+
+    async def stream_structured_review(self, resume_text: str, job_title: Optional[str] = None) -> AsyncIterator[Tuple[str, Any]]:
+        """Stream a single-call structured review as rendered report sections.
+
+        Yields ``("section", markdown)`` as soon as each part of the JSON response is
+        complete, then ``("result", analysis_results)`` (None if the response did not
+        validate) and ``("usage", dict)``.
+        """
+        signature, prior = await asyncio.to_thread(self._near_duplicate_lookup, resume_text, job_title)
+        if prior is not None and prior.get("review_mode") == "structured":
+            for section in iter_markdown_report(prior):
+                yield "section", section
+            yield "result", prior
+            yield "usage", prior["usage"]
+            return
+        if prior is not None:
+            # A free-text review was stored for this resume; the two-call stream replays it
+            yield "result", None
+            yield "usage", prior["usage"]
+            return
+        local, prompt = self._structured_prompt(resume_text, job_title=job_title)
+        renderer = IncrementalReportRenderer(job_match=local, render_job_match=local is not None)
+        parts = []
+        usage = usage_to_dict(None)
+        async for kind, data in self.stream_llm(prompt):
+            if kind == "delta":
+                parts.append(data)
+                for section in renderer.feed(data):
+                    yield "section", section
+            else:
+                usage = data
+        analysis_results = self._structured_results("".join(parts), local)
+        if analysis_results is not None:
+            await asyncio.to_thread(self._remember_review, signature, job_title, analysis_results)
+        yield "result", analysis_results
+        yield "usage", usage
+
+    async def stream_report(self, analysis_results: Dict[str, Any]) -> AsyncIterator[Tuple[str, Any]]:
+        """Streaming counterpart of ``generate_report``."""
+        prompt = FEEDBACK_PROMPT.format(analysis_results=analysis_results)
+        async for event in self.stream_llm(prompt, request_class=REPORT):
+            yield event
+
+    async def analyze_resume(self, sections: Dict[str, str]) -> Dict[str, Any]:
+        logger.info("Analyzing resume sections with LLM...")
+        prompt = MAIN_ANALYSIS_PROMPT.format(resume_content=self._resume_content(sections))
+        response = await self.call_llm(prompt)
+        return {"llm_analysis": response}
+
+    async def analyze_job_match(self, sections: Dict[str, str], job_description: str) -> Dict[str, Any]:
+        logger.info(f"Analyzing job match ({self.job_match_mode})...")
+        # Local scoring takes well under a millisecond, so it runs inline
+        job_match, prompt = self._job_match_prompt(sections, job_description)
+        if prompt is not None:
+            job_match["llm_job_match"] = await self.call_llm(prompt, request_class=JOB_MATCH)
+        return job_match
+
+    async def generate_report(self, analysis_results: Dict[str, Any]) -> str:
+        if analysis_results.get("review_mode") == "structured":
+            return generate_markdown_report(analysis_results)
+        logger.info("Generating report with LLM feedback prompt...")
+        prompt = FEEDBACK_PROMPT.format(analysis_results=analysis_results)
+        return await self.call_llm(prompt, request_class=REPORT)
+
+    async def review_structured(self, resume: ResumeInput, job_description: Optional[str] = None,
+                                job_title: Optional[str] = None) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any]]:
+        local, prompt = self._structured_prompt(resume, job_description, job_title)
+        response, usage = await self.call_llm_with_usage(prompt)
+        return self._structured_results(response, local), usage
+
+    async def review_resume(self, file_path: ResumeSource, job_description: Optional[str] = None,
+                            filename: Optional[str] = None) -> Dict[str, Any]:
+        logger.info(f"Reviewing resume file: {filename or file_path}")
+        # Parsing is blocking file/CPU work; keep it off the event loop
+        extracted = await asyncio.to_thread(extract_resume_cached, file_path, filename)
+        sections = extracted["sections"]
+        return await self.review_sections(sections, job_description)
+
+    async def review_sections(self, sections: Dict[str, str], job_description: Optional[str] = None) -> Dict[str, Any]:
+        if self.review_mode == "structured":
+            analysis_results, _ = await self.review_structured(sections, job_description)
+            if analysis_results is not None:
+                return analysis_results
+        if not job_description:
+            return await self.analyze_resume(sections)
+        # The section analysis and the job match don't depend on each other,
+        # so the review costs roughly the longest of the two calls
+        analysis_results, job_match = await asyncio.gather(
+            self.analyze_resume(sections),
+            self.analyze_job_match(sections, job_description),
+        )
+        analysis_results["job_match"] = job_match
+        return analysis_results
+
+    async def review_resume_text(self, resume_text: str, job_title: Optional[str] = None, messages: Optional[list] = None) -> Dict[str, Any]:
+        logger.info("Reviewing resume text with LLM (raw text + chat history support)...")
+        if messages:
+            self._ensure_system_prompt(resume_text, job_title, messages)
+            response, usage = await self.call_llm_with_usage("", messages=self.conversation.prepare(messages), cache_prefix=True,
+                                                             request_class=self.router.classify_followup(messages))
+        else:
+            # The lookup may sync from SQLite, so it runs off the event loop
+            signature, prior = await asyncio.to_thread(self._near_duplicate_lookup, resume_text, job_title)
+            if prior is not None:
+                return prior
+            if self.review_mode == "structured":
+                analysis_results, usage = await self.review_structured(resume_text, job_title=job_title)
+                if analysis_results is not None:
+                    await asyncio.to_thread(self._remember_review, signature, job_title, analysis_results)
+                    return {**analysis_results, "usage": usage}
+            response, usage = await self.call_llm_with_usage(self._reviewer_system_prompt(resume_text, job_title))
+            await asyncio.to_thread(self._remember_review, signature, job_title, {"llm_analysis": response})
+        return {"llm_analysis": response, "usage": usage}
@@ -0,0 +1,157 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger("resume_reviewer")
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+class JobStore:
+    """Durable review job queue backed by a SQLite file.
+
+    The API enqueues jobs and reads their status; worker processes claim jobs with a
+    visibility timeout. A job whose worker dies is picked up again once its lease
+    expires, until it runs out of attempts. Results stay in the store after completion.
+    The file is opened in WAL mode, which relies on shared memory, so every process
+    using it must run on the same host (not over NFS/SMB).
+    """
+
+    def __init__(self, path: Optional[str] = None, visibility_timeout: Optional[float] = None, max_attempts: Optional[int] = None):
+        self.path = path or os.getenv("JOBS_DB_PATH", os.path.join(".cache", "jobs.sqlite3"))
+        self.visibility_timeout = visibility_timeout or float(os.getenv("JOBS_VISIBILITY_TIMEOUT", "300"))
+        self.max_attempts = max_attempts or int(os.getenv("JOBS_MAX_ATTEMPTS", "3"))
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, status TEXT NOT NULL, payload TEXT NOT NULL, result TEXT, error TEXT, "
+            "attempts INTEGER NOT NULL DEFAULT 0, max_attempts INTEGER NOT NULL, worker_id TEXT, "
+            "available_at REAL NOT NULL, lease_expires_at REAL, created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs(status, available_at)")
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # isolation_level=None so claim() can take an explicit write lock
+            conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def enqueue(self, payload: Dict[str, Any]) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        self._conn().execute(
+            "INSERT INTO jobs (id, status, payload, max_attempts, available_at, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (job_id, JOB_QUEUED, json.dumps(payload), self.max_attempts, now, now, now),
+        )
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def claim(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        """Lease the oldest available job (queued, or running with an expired lease)."""
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Jobs whose worker crashed on their last allowed attempt will never finish
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ? "
+                "WHERE status = ? AND lease_expires_at < ? AND attempts >= max_attempts",
+                (JOB_FAILED, "Worker lease expired on final attempt", now, JOB_RUNNING, now),
+            )
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE (status = ? AND available_at <= ?) "
+                "OR (status = ? AND lease_expires_at < ?) ORDER BY created_at LIMIT 1",
+                (JOB_QUEUED, now, JOB_RUNNING, now),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = ?, worker_id = ?, attempts = attempts + 1, lease_expires_at = ?, updated_at = ? "
+                "WHERE id = ?",
+                (JOB_RUNNING, worker_id, now + self.visibility_timeout, now, row["id"]),
+            )
+            job = conn.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone()
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return self._to_dict(job)
+
+    def heartbeat(self, job_id: str, worker_id: str) -> bool:
+        """Extend the lease of a running job; False if the worker no longer owns it."""
+        now = time.time()
+        cursor = self._conn().execute(
+            "UPDATE jobs SET lease_expires_at = ?, updated_at = ? WHERE id = ? AND worker_id = ? AND status = ?",
+            (now + self.visibility_timeout, now, job_id, worker_id, JOB_RUNNING),
+        )
+        return cursor.rowcount == 1
+
+    def complete(self, job_id: str, worker_id: str, result: Dict[str, Any]) -> None:
+        self._conn().execute(
+            "UPDATE jobs SET status = ?, result = ?, error = NULL, lease_expires_at = NULL, updated_at = ? "
+            "WHERE id = ? AND worker_id = ?",
+            (JOB_SUCCEEDED, json.dumps(result), time.time(), job_id, worker_id),
+        )
+
+    def fail(self, job_id: str, worker_id: str, error: str, retry_delay: float = 5.0, retryable: bool = True) -> None:
+        """Record a failed attempt; requeue with a delay unless it isn't retryable or attempts are exhausted."""
+        conn = self._conn()
+        now = time.time()
+        row = conn.execute("SELECT attempts, max_attempts FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return
+        if retryable and row["attempts"] < row["max_attempts"]:
+            # Exponential backoff between attempts
+            delay = retry_delay * (2 ** (row["attempts"] - 1))
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, available_at = ?, lease_expires_at = NULL, updated_at = ? "
+                "WHERE id = ? AND worker_id = ?",
+                (JOB_QUEUED, error, now + delay, now, job_id, worker_id),
+            )
+        else:
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, lease_expires_at = NULL, updated_at = ? WHERE id = ? AND worker_id = ?",
+                (JOB_FAILED, error, now, job_id, worker_id),
+            )
+
+    def counts(self) -> Dict[str, int]:
+        rows = self._conn().execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {row["status"]: row["n"] for row in rows}
+
+_store: Optional[JobStore] = None
+_store_lock = threading.Lock()
+
+def get_job_store() -> JobStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = JobStore()
+    return _store
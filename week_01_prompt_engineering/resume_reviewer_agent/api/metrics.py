@@ -0,0 +1,39 @@
+import time
+from typing import Any, Callable, Dict
+
+from utils.metrics import ENABLED, HTTP_REQUEST_SECONDS, reset_endpoint, set_endpoint
+
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request and labelling the metrics recorded
+    while it runs (stages, LLM calls) with the matched route template.
+
+    A pure ASGI middleware rather than ``@app.middleware("http")``, so streamed
+    responses are timed until their last chunk and nothing is buffered.
+    """
+
+    def __init__(self, app: Callable):
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http" or not ENABLED:
+            await self.app(scope, receive, send)
+            return
+        status = [500]
+
+        def endpoint() -> str:
+            # The router fills in scope["route"] once it has matched; templates keep
+            # label cardinality bounded (/api/sessions/{session_id}, not every id)
+            return getattr(scope.get("route"), "path", "unmatched")
+
+        async def send_with_status(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        token = set_endpoint(endpoint)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUEST_SECONDS.labels(endpoint(), scope["method"], str(status[0])).observe(time.perf_counter() - started)
+            reset_endpoint(token)
@@ -1,21 +1,41 @@
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Request
-from typing import Optional, List, Dict, Any
-from .schema import ResumeReviewRequest, ResumeReviewResponse
-from .service import ResumeReviewService
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+from fastapi.responses import Response, StreamingResponse
+from typing import Optional, Dict, Any
+from .schema import (ResumeReviewChatRequest, ResumeReviewResponse, BatchReviewItem, BatchReviewRequest,
+                     JobCreateResponse, JobStatusResponse, ResumeReviewStreamRequest, SessionCreateRequest,
+                     SessionResponse, SessionMessageRequest, SessionMessageResponse, ExportRequest,
+                     BulkExportRequest)
+from .sse import SSE_HEADERS, format_sse, with_heartbeats
+from .jobs import get_job_store
+from .sessions import get_session_store
+from .async_service import AsyncResumeReviewService
+from utils.llm_cache import bypass_cache
+from utils.llm_limits import LLMError
+from utils.extraction_cache import get_extraction_cache
+from utils.parser import DocumentTooLargeError
+from utils.uploads import check_upload_size
+from utils.export import EXPORT_FORMATS, export_feedback, export_filename, iter_export_zip
 import os
-import tempfile
-from pydantic import BaseModel
+import json
+import uuid
+import asyncio
+import logging
+import weakref
+from contextlib import nullcontext
 
-router = APIRouter()
-service = ResumeReviewService()
+logger = logging.getLogger("resume_reviewer")
+
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "500"))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+SSE_HEARTBEAT_INTERVAL = float(os.getenv("SSE_HEARTBEAT_INTERVAL", "15"))
+EXPORT_MAX_ITEMS = int(os.getenv("EXPORT_MAX_ITEMS", "1000"))
 
-class ResumeReviewChatRequest(BaseModel):
-    resume_text: str
-    job_description: Optional[str] = None
-    messages: Optional[List[Dict[str, Any]]] = None
+router = APIRouter()
+# Async service so review endpoints await the LLM instead of holding a threadpool worker
+service = AsyncResumeReviewService()
 
 @router.post("/review", response_model=ResumeReviewResponse)
-def review_resume(request: ResumeReviewChatRequest):
+async def review_resume(request: ResumeReviewChatRequest):
     try:
         # Use resume_text directly if provided, else fallback to file path logic
         resume_text = request.resume_text
@@ -24,21 +44,303 @@ def review_resume(request: ResumeReviewChatRequest):
         # If chat history is provided, use it for context (prompt chaining)
         # For now, just use the latest user message as a follow-up
         # You can expand this logic to use the full chat history in your prompt templates
-        analysis_results = service.review_resume_text(resume_text, job_title, messages)
-        report = service.generate_report(analysis_results)
-        return ResumeReviewResponse(analysis_results=analysis_results, report=report)
+        with bypass_cache() if request.no_cache else nullcontext():
+            analysis_results = await service.review_resume_text(resume_text, job_title, messages)
+            # Usage is metadata, not analysis; keep it out of the report prompt
+            usage = analysis_results.pop("usage", None)
+            report = await service.generate_report(analysis_results)
+        return ResumeReviewResponse(analysis_results=analysis_results, report=report, usage=usage)
+    except LLMError:
+        # Answered by the app's LLMError handler (429/502/503/504 with Retry-After)
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/review/stream")
+async def review_resume_stream(request: ResumeReviewStreamRequest):
+    """Stream a review as Server-Sent Events.
+
+    Events: ``analysis.delta`` and ``report.delta`` (``{"text": ...}``), ``usage``,
+    ``heartbeat`` while the model is silent, ``error`` on failure, and a final ``done``.
+    In structured review mode a new review streams ``report.delta`` one finished report
+    section at a time, followed by the validated ``analysis`` object.
+    """
+    async def two_call_events(usage):
+        analysis_parts = []
+        async for kind, data in service.stream_review_resume_text(request.resume_text, request.job_description, request.messages or []):
+            if kind == "delta":
+                analysis_parts.append(data)
+                yield "analysis.delta", {"text": data}
+            else:
+                usage["analysis"] = data
+        if request.include_report:
+            analysis_results = {"llm_analysis": "".join(analysis_parts)}
+            async for kind, data in service.stream_report(analysis_results):
+                if kind == "delta":
+                    yield "report.delta", {"text": data}
+                else:
+                    usage["report"] = data
+
+    async def structured_events(usage, state):
+        sections_sent = 0
+        async for kind, data in service.stream_structured_review(request.resume_text, request.job_description):
+            if kind == "section":
+                sections_sent += 1
+                yield "report.delta", {"text": data}
+            elif kind == "result":
+                if data is not None:
+                    yield "analysis", data
+                elif not sections_sent:
+                    # Nothing usable was rendered: the two-call path takes over
+                    state["fallback"] = True
+            else:
+                usage["analysis"] = data
+
+    async def review_events():
+        usage = {}
+        with bypass_cache() if request.no_cache else nullcontext():
+            structured = not request.messages and service.review_mode == "structured"
+            state = {"fallback": not structured}
+            if structured:
+                async for event in structured_events(usage, state):
+                    yield event
+            if state["fallback"]:
+                async for event in two_call_events(usage):
+                    yield event
+        yield "usage", usage
+
+    async def event_stream():
+        try:
+            async for event, data in with_heartbeats(review_events(), SSE_HEARTBEAT_INTERVAL):
+                yield format_sse(event, data)
+        except Exception as e:
+            logger.error(f"Streaming review failed: {e}")
+            yield format_sse("error", {"detail": str(e)})
+        yield format_sse("done", {})
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers=SSE_HEADERS)
+
 @router.post("/review-upload", response_model=ResumeReviewResponse)
-def review_resume_upload(resume: UploadFile = File(...), job_description: Optional[str] = Form(None)):
+async def review_resume_upload(resume: UploadFile = File(...), job_description: Optional[str] = Form(None), no_cache: bool = Form(False)):
     try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(resume.filename)[-1]) as tmp:
-            tmp.write(resume.file.read())
-            tmp_path = tmp.name
-        analysis_results = service.review_resume(tmp_path, job_description)
-        report = service.generate_report(analysis_results)
-        os.remove(tmp_path)
+        # The body was capped by UploadLimitMiddleware while Starlette spooled it;
+        # the spooled file goes to the parser as is, without another copy
+        check_upload_size(resume)
+        with bypass_cache() if no_cache else nullcontext():
+            analysis_results = await service.review_resume(resume.file, job_description, filename=resume.filename)
+            report = await service.generate_report(analysis_results)
         return ResumeReviewResponse(analysis_results=analysis_results, report=report)
+    except DocumentTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except LLMError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        await resume.close()
+
+async def _review_batch_item(index: int, item: BatchReviewItem, semaphore: asyncio.Semaphore, no_cache: bool) -> Dict[str, Any]:
+    correlation_id = item.id or uuid.uuid4().hex
+    async with semaphore:
+        try:
+            with bypass_cache() if no_cache else nullcontext():
+                analysis_results = await service.review_resume_text(item.resume_text, item.job_description)
+                usage = analysis_results.pop("usage", None)
+                # A failed analysis raises LLMError, so no report call is spent on it
+                report = await service.generate_report(analysis_results)
+            return {"id": correlation_id, "index": index, "status": "ok",
+                    "analysis_results": analysis_results, "report": report, "usage": usage}
+        except Exception as e:
+            logger.error(f"Batch item {correlation_id} failed: {e}")
+            return {"id": correlation_id, "index": index, "status": "error", "error": str(e)}
+
+@router.post("/review-batch")
+async def review_batch(request: BatchReviewRequest):
+    """Review many resumes and stream one NDJSON line per item as soon as it finishes.
+
+    Items are processed with bounded concurrency and may complete out of order;
+    each line carries the item's correlation ``id`` and its position ``index``.
+    """
+    if not request.items:
+        raise HTTPException(status_code=400, detail="Batch must contain at least one item")
+    if len(request.items) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {BATCH_MAX_ITEMS} items")
+    concurrency = max(1, min(request.concurrency or BATCH_CONCURRENCY, len(request.items)))
+
+    async def stream_results():
+        semaphore = asyncio.Semaphore(concurrency)
+        tasks = [
+            asyncio.create_task(_review_batch_item(i, item, semaphore, request.no_cache))
+            for i, item in enumerate(request.items)
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                result = await next_done
+                yield json.dumps(result) + "\n"
+        finally:
+            # Client went away (or we finished): don't leave reviews running
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+@router.post("/jobs", response_model=JobCreateResponse, status_code=202)
+async def create_review_job(request: ResumeReviewChatRequest):
+    """Enqueue a full review; worker processes (worker.py) pick it up."""
+    payload = {
+        "resume_text": request.resume_text,
+        "job_description": request.job_description,
+        "messages": request.messages or [],
+    }
+    job_id = await asyncio.to_thread(get_job_store().enqueue, payload)
+    return JobCreateResponse(job_id=job_id, status="queued")
+
+@router.get("/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_review_job(job_id: str):
+    job = await asyncio.to_thread(get_job_store().get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return JobStatusResponse(
+        job_id=job["id"],
+        status=job["status"],
+        attempts=job["attempts"],
+        created_at=job["created_at"],
+        updated_at=job["updated_at"],
+        result=job["result"],
+        error=job["error"],
+    )
+
+# Turns of one session are answered one at a time (per worker) so history stays ordered
+_session_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+def _session_response(session: Dict[str, Any], include_messages: bool = False) -> SessionResponse:
+    return SessionResponse(
+        session_id=session["id"],
+        job_description=session["job_title"],
+        turns=session["turns"],
+        created_at=session["created_at"],
+        updated_at=session["updated_at"],
+        expires_at=session["expires_at"],
+        messages=session["messages"] if include_messages else None,
+    )
+
+async def _load_session(session_id: str) -> Dict[str, Any]:
+    session = await asyncio.to_thread(get_session_store().get, session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session not found or expired")
+    return session
+
+@router.post("/sessions", response_model=SessionResponse, status_code=201)
+async def create_session(request: SessionCreateRequest):
+    """Start a chat session; follow-ups then send only the new turn."""
+    messages = [m.model_dump() for m in request.messages or []]
+    session = await asyncio.to_thread(
+        get_session_store().create, request.resume_text, request.job_description, request.instructions, messages
+    )
+    return _session_response(session)
+
+@router.get("/sessions/{session_id}", response_model=SessionResponse)
+async def get_session(session_id: str):
+    return _session_response(await _load_session(session_id), include_messages=True)
+
+@router.delete("/sessions/{session_id}", status_code=204)
+async def delete_session(session_id: str):
+    if not await asyncio.to_thread(get_session_store().delete, session_id):
+        raise HTTPException(status_code=404, detail="Session not found or expired")
+
+@router.post("/sessions/{session_id}/messages", response_model=SessionMessageResponse)
+async def post_session_message(session_id: str, request: SessionMessageRequest):
+    lock = _session_locks.setdefault(session_id, asyncio.Lock())
+    async with lock:
+        session = await _load_session(session_id)
+        messages = service.session_messages(session, request.content)
+        with bypass_cache() if request.no_cache else nullcontext():
+            result = await service.review_resume_text(session["resume_text"], session["job_title"], messages)
+        # A failed call raises LLMError before this point, leaving the turn out of the history
+        reply = result["llm_analysis"]
+        turn = [{"role": "user", "content": request.content}, {"role": "assistant", "content": reply}]
+        if not await asyncio.to_thread(get_session_store().append, session_id, turn):
+            raise HTTPException(status_code=404, detail="Session not found or expired")
+    return SessionMessageResponse(session_id=session_id, reply=reply, usage=result.get("usage"))
+
+@router.post("/sessions/{session_id}/messages/stream")
+async def stream_session_message(session_id: str, request: SessionMessageRequest):
+    """Stream the reply to a new turn as Server-Sent Events.
+
+    Events: ``analysis.delta`` (``{"text": ...}``), ``usage``, ``heartbeat``, ``error``
+    and a final ``done``. The turn is added to the history once the reply is complete.
+    """
+    # 404 before the stream starts; the session is re-read under the lock below
+    await _load_session(session_id)
+    lock = _session_locks.setdefault(session_id, asyncio.Lock())
+
+    async def reply_events():
+        async with lock:
+            # Another turn may have finished while we waited
+            current = await _load_session(session_id)
+            parts = []
+            usage = {}
+            with bypass_cache() if request.no_cache else nullcontext():
+                messages = service.session_messages(current, request.content)
+                async for kind, data in service.stream_review_resume_text(current["resume_text"], current["job_title"], messages):
+                    if kind == "delta":
+                        parts.append(data)
+                        yield "analysis.delta", {"text": data}
+                    else:
+                        usage["analysis"] = data
+            turn = [{"role": "user", "content": request.content}, {"role": "assistant", "content": "".join(parts)}]
+            await asyncio.to_thread(get_session_store().append, session_id, turn)
+        yield "usage", usage
+
+    async def event_stream():
+        try:
+            async for event, data in with_heartbeats(reply_events(), SSE_HEARTBEAT_INTERVAL):
+                yield format_sse(event, data)
+        except Exception as e:
+            logger.error(f"Streaming session reply failed: {e}")
+            yield format_sse("error", {"detail": getattr(e, "detail", str(e))})
+        yield format_sse("done", {})
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+@router.post("/export")
+async def export_report(request: ExportRequest):
+    """Export a review conversation (or a chat session) as DOCX, PDF, HTML or Markdown."""
+    if request.session_id:
+        session = await _load_session(request.session_id)
+        messages, job_title = session["messages"], request.job_title or session["job_title"]
+    elif request.messages:
+        messages, job_title = [m.model_dump() for m in request.messages], request.job_title
+    else:
+        raise HTTPException(status_code=400, detail="Provide messages or a session_id")
+    try:
+        # Rendering is CPU work; keep it off the event loop
+        content = await asyncio.to_thread(export_feedback, messages, job_title, request.format)
+    except RuntimeError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    filename = export_filename(request.name or "resume_feedback", request.format)
+    return Response(content, media_type=EXPORT_FORMATS[request.format][1],
+                    headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+@router.post("/export/bulk")
+async def export_reports_bulk(request: BulkExportRequest):
+    """Export many reports as one zip archive, streamed entry by entry."""
+    if not request.reports:
+        raise HTTPException(status_code=400, detail="Export must contain at least one report")
+    if len(request.reports) > EXPORT_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Export exceeds {EXPORT_MAX_ITEMS} reports")
+    reports = [{"messages": [m.model_dump() for m in item.messages], "job_title": item.job_title, "name": item.name}
+               for item in request.reports]
+    # A sync generator: Starlette iterates it in the threadpool, so rendering doesn't block the loop
+    return StreamingResponse(iter_export_zip(reports, request.format), media_type="application/zip",
+                             headers={"Content-Disposition": 'attachment; filename="resume_feedback.zip"'})
+
+@router.get("/cache/stats")
+async def cache_stats():
+    return {**service.cache.stats(), "extraction": get_extraction_cache().stats(),
+            "near_duplicates": service.near_duplicates.stats(),
+            "conversation": service.conversation.stats(),
+            "sessions": get_session_store().stats(),
+            "llm": service.gateway.stats(),
+            "router": service.router.stats(),
+            "single_flight": service.flights.stats()}
@@ -1,4 +1,4 @@
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Literal
 from pydantic import BaseModel
 
 class ResumeReviewRequest(BaseModel):
@@ -8,8 +8,93 @@ class ResumeReviewRequest(BaseModel):
 class ResumeReviewResponse(BaseModel):
     analysis_results: Dict[str, Any]
     report: str
+    # Token usage of the analysis call, including prompt-cache reads/writes
+    usage: Optional[Dict[str, Any]] = None
 
 class ResumeReviewChatRequest(BaseModel):
     resume_text: str
     job_description: Optional[str] = None
     messages: Optional[List[Dict[str, Any]]] = None
+    # Skip the LLM response cache for this request
+    no_cache: bool = False
+
+class ResumeReviewStreamRequest(ResumeReviewChatRequest):
+    # Chat follow-ups only need the analysis stream, not a second report call
+    include_report: bool = True
+
+class BatchReviewItem(BaseModel):
+    resume_text: str
+    job_description: Optional[str] = None
+    # Correlation id echoed back on the result line; generated when omitted
+    id: Optional[str] = None
+
+class BatchReviewRequest(BaseModel):
+    items: List[BatchReviewItem]
+    # Max reviews in flight at once; defaults to BATCH_CONCURRENCY
+    concurrency: Optional[int] = None
+    no_cache: bool = False
+
+class JobCreateResponse(BaseModel):
+    job_id: str
+    status: str
+
+class JobStatusResponse(BaseModel):
+    job_id: str
+    status: str
+    attempts: int
+    created_at: float
+    updated_at: float
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+class ChatMessage(BaseModel):
+    role: Literal["user", "assistant"]
+    content: str
+
+class SessionCreateRequest(BaseModel):
+    resume_text: str
+    job_description: Optional[str] = None
+    # Extra reviewer instructions appended to the system prompt for every turn
+    instructions: Optional[str] = None
+    # Earlier turns to seed the history with, e.g. the initial review
+    messages: Optional[List[ChatMessage]] = None
+
+class SessionResponse(BaseModel):
+    session_id: str
+    job_description: Optional[str] = None
+    turns: int
+    created_at: float
+    updated_at: float
+    expires_at: float
+    messages: Optional[List[ChatMessage]] = None
+
+class SessionMessageRequest(BaseModel):
+    # Only the new user turn; the history lives on the server
+    content: str
+    no_cache: bool = False
+
+class SessionMessageResponse(BaseModel):
+    session_id: str
+    reply: str
+    usage: Optional[Dict[str, Any]] = None
+
+ExportFormat = Literal["docx", "pdf", "html", "markdown"]
+
+class ExportRequest(BaseModel):
+    messages: Optional[List[ChatMessage]] = None
+    # Export a server-side chat session instead of sending the messages
+    session_id: Optional[str] = None
+    job_title: Optional[str] = None
+    format: ExportFormat = "docx"
+    # File name (without extension) for the Content-Disposition header
+    name: Optional[str] = None
+
+class ExportItem(BaseModel):
+    messages: List[ChatMessage]
+    job_title: Optional[str] = None
+    # Name of the file inside the archive; numbered when omitted
+    name: Optional[str] = None
+
+class BulkExportRequest(BaseModel):
+    reports: List[ExportItem]
+    format: ExportFormat = "docx"
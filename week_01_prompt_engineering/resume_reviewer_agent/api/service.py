@@ -1,13 +1,33 @@
 import logging
-import anthropic
-from typing import Dict, Any, Optional
-from prompts.resume_analysis import MAIN_ANALYSIS_PROMPT, JOB_MATCH_PROMPT, FEEDBACK_PROMPT
-from utils.parser import extract_resume_text, extract_resume_sections
+from typing import Dict, Any, Optional, Tuple
+from prompts.resume_analysis import (MAIN_ANALYSIS_PROMPT, JOB_MATCH_PROMPT, JOB_MATCH_FOCUSED_PROMPT, FEEDBACK_PROMPT,
+                                     STRUCTURED_REVIEW_PROMPT, STRUCTURED_JOB_CONTEXT, STRUCTURED_JOB_MATCH_SHAPE)
+from prompts.feedback import CONVERSATION_SUMMARY_PROMPT
+from utils.parser import ResumeSource
+from utils.extraction_cache import extract_resume_cached
+from utils.job_match import ResumeInput, score_job_match
+from utils.structured_review import parse_structured_review
+from utils.output import generate_markdown_report
+from utils.llm_gateway import get_gateway
+from utils.llm_cache import get_response_cache, make_cache_key, is_bypassed
+from utils.single_flight import get_single_flight
+from utils.metrics import timed
+from utils.near_duplicates import get_near_duplicate_index
+from utils.conversation import ConversationWindow
+from utils.prompt_cache import (cached_system, mark_history_breakpoint, split_system_messages, uncached_system_parts,
+                                usage_to_dict)
+from utils.model_router import Route, get_model_router, estimate_input_tokens, REVIEW, JOB_MATCH, REPORT, SUMMARY
 import os
+import time
+import sqlite3
 from dotenv import load_dotenv
 
 logger = logging.getLogger("resume_reviewer")
 
+DEFAULT_SYSTEM_PROMPT = "You are a helpful, expert resume reviewer."
+# Sections sent to the LLM when the job match was pre-scored locally
+JOB_MATCH_FOCUS_SECTIONS = ("summary", "experience", "skills")
+
 class ResumeReviewService:
     def __init__(self, api_key: Optional[str] = None):
         # Try to load from environment if not provided
@@ -22,75 +42,289 @@ class ResumeReviewService:
         # Load model configuration from environment variables
         self.model = os.getenv("ANTHROPIC_MODEL", "claude-3-5-sonnet-20241022")
         self.max_tokens = int(os.getenv("ANTHROPIC_MAX_TOKENS", "4000"))
+        # Shared, pooled client; reused across calls instead of reconnecting per request
+        self.gateway = get_gateway(self.api_key)
+        # Model tier and max_tokens per request class (full reviews vs short follow-ups)
+        self.router = get_model_router()
+        # Content-addressed response cache shared by every service in the process
+        self.cache = get_response_cache()
+        # Identical requests already in flight are awaited instead of sent again
+        self.flights = get_single_flight()
+        # "hybrid": score locally, LLM only adds emphasis/modification advice;
+        # "local": no LLM call for the job match; "llm": full LLM analysis (plus local scores)
+        self.job_match_mode = os.getenv("JOB_MATCH_MODE", "hybrid").lower()
+        # "structured": one call returns JSON and the report is rendered locally;
+        # "two_call": free-text analysis, then an LLM-written report
+        self.review_mode = os.getenv("REVIEW_MODE", "structured").lower()
+        # MinHash/LSH index of earlier reviews, for resubmissions and templated resumes
+        self.near_duplicates = get_near_duplicate_index()
+        # Keeps chat requests within a token budget; older turns are summarized in the background
+        self.conversation = ConversationWindow(self._summarize_conversation)
+
+    def _resume_content(self, sections: Dict[str, str]) -> str:
+        return "\n".join([f"{k.title()}: {v}" for k, v in sections.items()])
+
+    @timed("prompt")
+    def _job_match_prompt(self, sections: Dict[str, str], job_description: str) -> Tuple[Dict[str, Any], Optional[str]]:
+        """Score the match locally and build the LLM prompt the configured mode still needs (if any)."""
+        local = score_job_match(sections, job_description)
+        if self.job_match_mode == "local":
+            return local, None
+        if self.job_match_mode == "llm":
+            return local, JOB_MATCH_PROMPT.format(resume_content=self._resume_content(sections), job_description=job_description)
+        focus = {k: sections[k] for k in JOB_MATCH_FOCUS_SECTIONS if sections.get(k)} or sections
+        prompt = JOB_MATCH_FOCUSED_PROMPT.format(
+            match_percentage=local["match_percentage"],
+            matched_skills=", ".join(local["matched_skills"]) or "none",
+            missing_skills=", ".join(local["missing_skills"]) or "none",
+            resume_content=self._resume_content(focus),
+            job_description=job_description,
+        )
+        return local, prompt
+
+    @timed("prompt")
+    def _structured_prompt(self, resume: ResumeInput, job_description: Optional[str] = None,
+                           job_title: Optional[str] = None) -> Tuple[Optional[Dict[str, Any]], str]:
+        """Build the single-call review prompt; the job match (if any) is scored locally first."""
+        resume_content = resume if isinstance(resume, str) else self._resume_content(resume)
+        job_context = f"\nThe candidate is targeting the job title: {job_title}\n" if job_title else ""
+        local = None
+        if job_description:
+            local = score_job_match(resume, job_description)
+            job_context += STRUCTURED_JOB_CONTEXT.format(
+                job_description=job_description,
+                match_percentage=local["match_percentage"],
+                missing_skills=", ".join(local["missing_skills"]) or "none",
+            )
+        prompt = STRUCTURED_REVIEW_PROMPT.format(
+            resume_content=resume_content,
+            job_context=job_context,
+            job_match_shape=STRUCTURED_JOB_MATCH_SHAPE if job_description else "",
+        )
+        return local, prompt
+
+    def _structured_results(self, response: str, local_job_match: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        review = parse_structured_review(response)
+        if review is None:
+            logger.warning("Structured review did not validate; falling back to the two-call path")
+            return None
+        results = review.model_dump(exclude_none=True)
+        job_match = results.pop("job_match", {})
+        if local_job_match is not None:
+            # Scores and missing skills come from the local scorer, emphasis points from the model
+            results["job_match"] = {**local_job_match, "emphasis_points": job_match.get("emphasis_points", [])}
+        results["review_mode"] = "structured"
+        return results
+
+    def review_structured(self, resume: ResumeInput, job_description: Optional[str] = None,
+                          job_title: Optional[str] = None) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Review a resume in one LLM call that returns structured JSON.
+
+        Args:
+            resume: Resume text or section mapping
+            job_description: Optional job description (scored locally, emphasis points from the model)
+            job_title: Optional target job title
 
-    def call_llm(self, prompt: str, model: str = None, temperature: float = 0.2, messages: Optional[list] = None) -> str:
+        Returns:
+            Tuple of (analysis results or None if the response did not validate, token usage)
+        """
+        local, prompt = self._structured_prompt(resume, job_description, job_title)
+        response, usage = self.call_llm_with_usage(prompt, request_class=REVIEW)
+        return self._structured_results(response, local), usage
+
+    def _near_duplicate_lookup(self, resume_text: str, job_title: Optional[str]) -> Tuple[Any, Optional[Dict[str, Any]]]:
+        """Return (signature, prior review) for a resume; the review is None unless a near-duplicate was found."""
+        if not self.near_duplicates.enabled or is_bypassed():
+            return None, None
+        signature = self.near_duplicates.signature(resume_text)
+        match = self.near_duplicates.query(signature, (job_title or "").strip().lower())
+        if match is None:
+            return signature, None
+        entry_id, similarity = match
+        prior = self.near_duplicates.payload(entry_id)
+        if prior is None:
+            return signature, None
+        logger.info(f"Reusing review {entry_id} for a near-duplicate resume (similarity {similarity:.3f})")
+        return signature, {**prior, "near_duplicate": {"entry_id": entry_id, "similarity": round(similarity, 4)},
+                           "usage": usage_to_dict(None)}
+
+    def _remember_review(self, signature: Any, job_title: Optional[str], analysis_results: Dict[str, Any]) -> None:
+        if signature is None:
+            return
         try:
-            client = anthropic.Anthropic(api_key=self.api_key)
-            system_prompt = "You are a helpful, expert resume reviewer."
-            
+            self.near_duplicates.insert(signature, analysis_results, (job_title or "").strip().lower())
+        except sqlite3.Error as e:
+            logger.warning(f"Near-duplicate insert failed: {e}")
+
+    def _summarize_conversation(self, previous_summary: Optional[str], messages: list) -> Optional[str]:
+        """Fold older chat turns into the running summary (runs on a background thread)."""
+        transcript = "\n\n".join(f"{m['role'].title()}: {m['content']}" for m in messages)
+        prompt = CONVERSATION_SUMMARY_PROMPT.format(previous_summary=previous_summary or "", messages=transcript)
+        # Always the blocking path: this runs in a worker thread, also for the async service, whose
+        # call_llm_with_usage is a coroutine. Failures propagate to ConversationWindow, which logs
+        # them and retries on a later turn
+        return ResumeReviewService.call_llm_with_usage(self, prompt, request_class=SUMMARY)[0]
+
+    def _reviewer_system_prompt(self, resume_text: str, job_title: Optional[str] = None) -> str:
+        system_prompt = f"You are a professional resume reviewer. Here is the candidate's resume:\n---\n{resume_text}\n---"
+        if job_title:
+            system_prompt += f"\nThe candidate is targeting the job title: {job_title}."
+        system_prompt += "\nProvide a tone assessment, strengths, weaknesses, suggestions for improvement, and optionally rewrite weak sections."
+        return system_prompt
+
+    def _ensure_system_prompt(self, resume_text: str, job_title: Optional[str], messages: list) -> None:
+        # Always ensure the resume text is in the system prompt
+        if not any(m["role"] == "system" for m in messages):
+            messages.insert(0, {"role": "system", "content": self._reviewer_system_prompt(resume_text, job_title)})
+
+    def session_messages(self, session: Dict[str, Any], content: str) -> list:
+        """Rebuild the full conversation of a server-side chat session plus its new user turn."""
+        system_prompt = self._reviewer_system_prompt(session["resume_text"], session["job_title"])
+        if session.get("instructions"):
+            system_prompt += "\n\n" + session["instructions"]
+        return [{"role": "system", "content": system_prompt}, *session["messages"], {"role": "user", "content": content}]
+
+    def build_request(self, prompt: str, model: str = None, messages: Optional[list] = None, cache_prefix: bool = False) -> Dict[str, Any]:
+        """Build the keyword arguments for ``messages.create`` / ``messages.stream``.
+
+        With ``cache_prefix`` the system prompt and the history before the newest
+        turn are marked for provider-side prompt caching; a conversation summary
+        goes in its own block after the cached one.
+        """
+        system_prompt = DEFAULT_SYSTEM_PROMPT
+        volatile = uncached_system_parts(messages or [])
+        if messages:
+            # Anthropic expects a single system prompt and a list of user/assistant messages,
+            # so fold any "system" entries from the chat history into the system prompt
+            system_parts, chat = split_system_messages(messages)
+            if system_parts:
+                system_prompt = "\n\n".join(system_parts)
+        else:
+            chat = [{"role": "user", "content": prompt}]
+        system: Any = "\n\n".join([system_prompt, *volatile])
+        if cache_prefix:
+            system = cached_system(system_prompt, volatile)
+            chat = mark_history_breakpoint(chat)
+        return {
             # Use instance model if no model specified, otherwise use provided model
-            model_to_use = model if model is not None else self.model
-            
-            if messages:
-                # Anthropic expects a single system prompt and a list of messages
-                response = client.messages.create(
-                    model=model_to_use,
-                    max_tokens=self.max_tokens,
-                    system=system_prompt,
-                    messages=messages
-                )
-                return response.content[0].text if hasattr(response, 'content') else response.completion
-            else:
-                messages = [{"role": "user", "content": prompt}]
-                response = client.messages.create(
-                    model=model_to_use,
-                    max_tokens=self.max_tokens,
-                    system=system_prompt,
-                    messages=messages
-                )
-                return response.content[0].text if hasattr(response, 'content') else response.completion
-        except Exception as e:
-            logger.error(f"LLM call failed: {e}")
-            return "[LLM Error: Unable to generate response.]"
+            "model": model if model is not None else self.model,
+            "max_tokens": self.max_tokens,
+            "system": system,
+            "messages": chat,
+        }
+
+    @timed("request")
+    def route_request(self, prompt: str, model: str = None, messages: Optional[list] = None, cache_prefix: bool = False,
+                      request_class: str = REVIEW) -> Tuple[Dict[str, Any], Route]:
+        """Build a request and let the router pick its model and ``max_tokens``."""
+        request = self.build_request(prompt, model, messages, cache_prefix=cache_prefix)
+        route = self.router.route(request_class, estimate_input_tokens(request["system"], request["messages"]), model)
+        request["model"], request["max_tokens"] = route.model, route.max_tokens
+        return request, route
+
+    @staticmethod
+    def _response_text(response) -> str:
+        return response.content[0].text if hasattr(response, 'content') else response.completion
+
+    def call_llm_with_usage(self, prompt: str, model: str = None, temperature: float = 0.2, messages: Optional[list] = None,
+                            use_cache: bool = True, cache_prefix: bool = False, request_class: str = REVIEW) -> Tuple[str, Dict[str, Any]]:
+        """Like ``call_llm`` but also returns token usage, including prompt-cache reads/writes,
+        and the ``route`` (model tier and ``max_tokens``) the call took.
+
+        Raises:
+            LLMError: The call failed after the gateway's retries (see utils/llm_limits.py)
+        """
+        request, route = self.route_request(prompt, model, messages, cache_prefix, request_class)
+        cache_key = make_cache_key(request, temperature) if use_cache else None
+        if cache_key:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                logger.info("LLM cache hit")
+                return cached, {**usage_to_dict(None), "response_cache_hit": True, "route": route._asdict()}
+
+        def issue():
+            # Rate limited, retried with backoff and circuit-broken by the gateway
+            started = time.perf_counter()
+            response = self.gateway.create(request)
+            self.router.record(route, time.perf_counter() - started)
+            if cache_key:
+                self.cache.set(cache_key, self._response_text(response))
+            return response
+
+        if cache_key is None or is_bypassed():
+            # A fresh generation was asked for; don't hand back another caller's response
+            response, shared = issue(), False
+        else:
+            response, shared = self.flights.do(cache_key, issue)
+        usage = {**usage_to_dict(getattr(response, "usage", None)), "route": route._asdict()}
+        if shared:
+            # Tokens were billed once, to the caller that issued the request
+            usage["coalesced"] = True
+        return self._response_text(response), usage
+
+    def call_llm(self, prompt: str, model: str = None, temperature: float = 0.2, messages: Optional[list] = None, use_cache: bool = True,
+                 request_class: str = REVIEW) -> str:
+        text, _ = self.call_llm_with_usage(prompt, model, temperature, messages, use_cache, request_class=request_class)
+        return text
 
     def analyze_resume(self, sections: Dict[str, str]) -> Dict[str, Any]:
         logger.info("Analyzing resume sections with LLM...")
-        resume_content = "\n".join([f"{k.title()}: {v}" for k, v in sections.items()])
-        prompt = MAIN_ANALYSIS_PROMPT.format(resume_content=resume_content)
+        prompt = MAIN_ANALYSIS_PROMPT.format(resume_content=self._resume_content(sections))
         response = self.call_llm(prompt)
         return {"llm_analysis": response}
 
     def analyze_job_match(self, sections: Dict[str, str], job_description: str) -> Dict[str, Any]:
-        logger.info("Analyzing job match with LLM...")
-        resume_content = "\n".join([f"{k.title()}: {v}" for k, v in sections.items()])
-        prompt = JOB_MATCH_PROMPT.format(resume_content=resume_content, job_description=job_description)
-        response = self.call_llm(prompt)
-        return {"llm_job_match": response}
+        logger.info(f"Analyzing job match ({self.job_match_mode})...")
+        job_match, prompt = self._job_match_prompt(sections, job_description)
+        if prompt is not None:
+            job_match["llm_job_match"] = self.call_llm(prompt, request_class=JOB_MATCH)
+        return job_match
 
     def generate_report(self, analysis_results: Dict[str, Any]) -> str:
+        if analysis_results.get("review_mode") == "structured":
+            # The structured review already holds everything the report shows; no second call
+            return generate_markdown_report(analysis_results)
         logger.info("Generating report with LLM feedback prompt...")
         prompt = FEEDBACK_PROMPT.format(analysis_results=analysis_results)
-        response = self.call_llm(prompt)
+        response = self.call_llm(prompt, request_class=REPORT)
         return response
 
+    def review_resume(self, file_path: ResumeSource, job_description: Optional[str] = None,
+                      filename: Optional[str] = None) -> Dict[str, Any]:
+        logger.info(f"Reviewing resume file: {filename or file_path}")
+        # Parsed once per distinct file; re-submitted uploads come from the extraction cache
+        sections = extract_resume_cached(file_path, filename)["sections"]
+        if self.review_mode == "structured":
+            analysis_results, _ = self.review_structured(sections, job_description)
+            if analysis_results is not None:
+                return analysis_results
+        analysis_results = self.analyze_resume(sections)
+        if job_description:
+            analysis_results["job_match"] = self.analyze_job_match(sections, job_description)
+        return analysis_results
+
     def review_resume_text(self, resume_text: str, job_title: Optional[str] = None, messages: Optional[list] = None) -> Dict[str, Any]:
         logger.info("Reviewing resume text with LLM (raw text + chat history support)...")
         # If chat history is provided, use it for prompt chaining
         if messages:
-            # Always ensure the resume text is in the system prompt
-            if not any(m["role"] == "system" for m in messages):
-                system_prompt = f"You are a professional resume reviewer. Here is the candidate's resume:\n---\n{resume_text}\n---"
-                if job_title:
-                    system_prompt += f"\nThe candidate is targeting the job title: {job_title}."
-                system_prompt += "\nProvide a tone assessment, strengths, weaknesses, suggestions for improvement, and optionally rewrite weak sections."
-                messages.insert(0, {"role": "system", "content": system_prompt})
-            response = self.call_llm("", messages=messages)
-            return {"llm_analysis": response}
+            self._ensure_system_prompt(resume_text, job_title, messages)
+            # The system prompt (instructions + resume + job title) and earlier turns are
+            # identical on every follow-up, so let the provider cache them; long chats are
+            # cut to the recent turns plus a summary. Short follow-ups go to the fast tier
+            response, usage = self.call_llm_with_usage("", messages=self.conversation.prepare(messages), cache_prefix=True,
+                                                       request_class=self.router.classify_followup(messages))
+            return {"llm_analysis": response, "usage": usage}
         else:
-            # Fallback to single-shot prompt
-            system_prompt = f"You are a professional resume reviewer. Here is the candidate's resume:\n---\n{resume_text}\n---"
-            if job_title:
-                system_prompt += f"\nThe candidate is targeting the job title: {job_title}."
-            system_prompt += "\nProvide a tone assessment, strengths, weaknesses, suggestions for improvement, and optionally rewrite weak sections."
-            response = self.call_llm(system_prompt)
-            return {"llm_analysis": response}
+            # Fallback to single-shot prompt, unless a near-identical resume was already reviewed
+            signature, prior = self._near_duplicate_lookup(resume_text, job_title)
+            if prior is not None:
+                return prior
+            if self.review_mode == "structured":
+                analysis_results, usage = self.review_structured(resume_text, job_title=job_title)
+                if analysis_results is not None:
+                    self._remember_review(signature, job_title, analysis_results)
+                    return {**analysis_results, "usage": usage}
+            response, usage = self.call_llm_with_usage(self._reviewer_system_prompt(resume_text, job_title))
+            self._remember_review(signature, job_title, {"llm_analysis": response})
+            return {"llm_analysis": response, "usage": usage}
@@ -0,0 +1,271 @@
+import os
+import time
+import uuid
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from utils.llm_cache import MemoryLRUCache
+
+logger = logging.getLogger("resume_reviewer")
+
+def resume_hash(resume_text: str) -> str:
+    return hashlib.sha256(resume_text.encode("utf-8")).hexdigest()
+
+class SessionStore:
+    """Server-side chat sessions, so clients send only the new turn.
+
+    A session holds the resume (stored once per distinct text, keyed by its SHA-256),
+    the target job title, optional extra reviewer instructions and the user/assistant
+    history. Sessions expire ``ttl`` seconds after their last turn and the oldest are
+    evicted beyond ``max_sessions``. Without a ``path`` everything lives in memory;
+    with one, sessions live in a SQLite file shared by every API worker and only the
+    (immutable) resume texts are cached in memory.
+    """
+
+    def __init__(self, path: Optional[str] = None, ttl: Optional[float] = None, max_sessions: Optional[int] = None):
+        self.path = os.getenv("SESSIONS_DB_PATH", "") if path is None else path
+        self.ttl = ttl or float(os.getenv("SESSIONS_TTL", "3600"))
+        self.max_sessions = max_sessions or int(os.getenv("SESSIONS_MAX", "1000"))
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        # Memory backend: session id -> session (oldest activity first), resume hash -> [text, refcount]
+        self._sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._resumes: Dict[str, List[Any]] = {}
+        # SQLite backend: resume texts never change, so they are cached per worker
+        self._resume_cache = MemoryLRUCache(max_entries=256, ttl=float("inf"))
+        self.created = 0
+        self.evicted = 0
+        if self.path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = self._conn()
+            conn.execute("CREATE TABLE IF NOT EXISTS chat_resumes (hash TEXT PRIMARY KEY, text TEXT NOT NULL)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS chat_sessions ("
+                "id TEXT PRIMARY KEY, resume_hash TEXT NOT NULL, job_title TEXT, instructions TEXT, "
+                "created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_chat_sessions_updated ON chat_sessions(updated_at)")
+            # One row per turn, so appending a turn doesn't rewrite the history
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS chat_messages ("
+                "session_id TEXT NOT NULL, seq INTEGER NOT NULL, role TEXT NOT NULL, content TEXT NOT NULL, "
+                "PRIMARY KEY (session_id, seq))"
+            )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # isolation_level=None so appends can take an explicit write lock
+            conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _info(self, session: Dict[str, Any]) -> Dict[str, Any]:
+        return {**session, "expires_at": session["updated_at"] + self.ttl}
+
+    # --- memory backend ----------------------------------------------------------
+
+    def _drop(self, session_id: str) -> None:
+        session = self._sessions.pop(session_id)
+        entry = self._resumes[session["resume_hash"]]
+        entry[1] -= 1
+        if entry[1] == 0:
+            del self._resumes[session["resume_hash"]]
+
+    def _purge_memory(self, now: float) -> None:
+        # Sessions are ordered by last activity, so expired ones are at the front
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if session["updated_at"] + self.ttl > now and len(self._sessions) <= self.max_sessions:
+                break
+            self._drop(session_id)
+            self.evicted += 1
+
+    # --- SQLite backend ----------------------------------------------------------
+
+    def _purge_db(self, conn: sqlite3.Connection, now: float) -> None:
+        # Runs before an insert, so keep room for one more session
+        expired = conn.execute("DELETE FROM chat_sessions WHERE updated_at <= ?", (now - self.ttl,)).rowcount
+        overflow = conn.execute(
+            "DELETE FROM chat_sessions WHERE id IN (SELECT id FROM chat_sessions ORDER BY updated_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_sessions - 1,),
+        ).rowcount
+        if expired or overflow:
+            conn.execute("DELETE FROM chat_messages WHERE session_id NOT IN (SELECT id FROM chat_sessions)")
+            conn.execute("DELETE FROM chat_resumes WHERE hash NOT IN (SELECT resume_hash FROM chat_sessions)")
+            self.evicted += expired + overflow
+
+    def _resume_text(self, conn: sqlite3.Connection, digest: str) -> Optional[str]:
+        text = self._resume_cache.get(digest)
+        if text is None:
+            row = conn.execute("SELECT text FROM chat_resumes WHERE hash = ?", (digest,)).fetchone()
+            if row is None:
+                return None
+            text = row["text"]
+            self._resume_cache.set(digest, text)
+        return text
+
+    # --- public API --------------------------------------------------------------
+
+    def create(self, resume_text: str, job_title: Optional[str] = None, instructions: Optional[str] = None,
+               messages: Optional[List[Dict[str, str]]] = None) -> Dict[str, Any]:
+        """
+        Start a session.
+
+        Args:
+            resume_text: Resume text (stored once per distinct text)
+            job_title: Target job title
+            instructions: Extra reviewer instructions added to the system prompt
+            messages: Earlier user/assistant turns, e.g. the initial review
+
+        Returns:
+            Session info (without the resume text or history)
+        """
+        session_id = uuid.uuid4().hex
+        digest = resume_hash(resume_text)
+        now = time.time()
+        session = {"id": session_id, "resume_hash": digest, "job_title": job_title, "instructions": instructions,
+                   "created_at": now, "updated_at": now}
+        history = [{"role": m["role"], "content": m["content"]} for m in messages or []]
+        if self.path:
+            conn = self._conn()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._purge_db(conn, now)
+                conn.execute("INSERT OR IGNORE INTO chat_resumes (hash, text) VALUES (?, ?)", (digest, resume_text))
+                conn.execute(
+                    "INSERT INTO chat_sessions (id, resume_hash, job_title, instructions, created_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (session_id, digest, job_title, instructions, now, now),
+                )
+                conn.executemany(
+                    "INSERT INTO chat_messages (session_id, seq, role, content) VALUES (?, ?, ?, ?)",
+                    [(session_id, seq, m["role"], m["content"]) for seq, m in enumerate(history)],
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            self._resume_cache.set(digest, resume_text)
+        else:
+            with self._lock:
+                entry = self._resumes.setdefault(digest, [resume_text, 0])
+                entry[1] += 1
+                self._sessions[session_id] = {**session, "messages": history}
+                self._purge_memory(now)
+        with self._lock:
+            self.created += 1
+        return self._info({**session, "turns": len(history)})
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Return a live session with its ``resume_text`` and ``messages``, or None."""
+        now = time.time()
+        if self.path:
+            conn = self._conn()
+            row = conn.execute("SELECT * FROM chat_sessions WHERE id = ?", (session_id,)).fetchone()
+            if row is None or row["updated_at"] + self.ttl <= now:
+                return None
+            session = dict(row)
+            resume_text = self._resume_text(conn, session["resume_hash"])
+            if resume_text is None:
+                return None
+            rows = conn.execute(
+                "SELECT role, content FROM chat_messages WHERE session_id = ? ORDER BY seq", (session_id,)
+            ).fetchall()
+            messages = [dict(r) for r in rows]
+        else:
+            with self._lock:
+                session = self._sessions.get(session_id)
+                if session is None or session["updated_at"] + self.ttl <= now:
+                    return None
+                resume_text = self._resumes[session["resume_hash"]][0]
+                messages = list(session["messages"])
+                session = {k: v for k, v in session.items() if k != "messages"}
+        return self._info({**session, "resume_text": resume_text, "messages": messages, "turns": len(messages)})
+
+    def append(self, session_id: str, messages: List[Dict[str, str]]) -> bool:
+        """Add turns to a session and refresh its expiry; False if it no longer exists."""
+        now = time.time()
+        if self.path:
+            conn = self._conn()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT COALESCE(MAX(seq) + 1, 0) AS next FROM chat_messages WHERE session_id = ?", (session_id,)
+                ).fetchone()
+                updated = conn.execute(
+                    "UPDATE chat_sessions SET updated_at = ? WHERE id = ? AND updated_at > ?",
+                    (now, session_id, now - self.ttl),
+                ).rowcount
+                if updated:
+                    conn.executemany(
+                        "INSERT INTO chat_messages (session_id, seq, role, content) VALUES (?, ?, ?, ?)",
+                        [(session_id, row["next"] + i, m["role"], m["content"]) for i, m in enumerate(messages)],
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            return bool(updated)
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None or session["updated_at"] + self.ttl <= now:
+                return False
+            session["messages"].extend({"role": m["role"], "content": m["content"]} for m in messages)
+            session["updated_at"] = now
+            self._sessions.move_to_end(session_id)
+        return True
+
+    def delete(self, session_id: str) -> bool:
+        if self.path:
+            conn = self._conn()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                deleted = conn.execute("DELETE FROM chat_sessions WHERE id = ?", (session_id,)).rowcount
+                conn.execute("DELETE FROM chat_messages WHERE session_id = ?", (session_id,))
+                conn.execute("DELETE FROM chat_resumes WHERE hash NOT IN (SELECT resume_hash FROM chat_sessions)")
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            return bool(deleted)
+        with self._lock:
+            if session_id not in self._sessions:
+                return False
+            self._drop(session_id)
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        if self.path:
+            conn = self._conn()
+            sessions = conn.execute("SELECT COUNT(*) FROM chat_sessions").fetchone()[0]
+            resumes = conn.execute("SELECT COUNT(*) FROM chat_resumes").fetchone()[0]
+        else:
+            sessions, resumes = len(self._sessions), len(self._resumes)
+        return {
+            "sessions": sessions,
+            "resumes": resumes,
+            "created": self.created,
+            "evicted": self.evicted,
+            "ttl": self.ttl,
+            "max_sessions": self.max_sessions,
+            "path": self.path or None,
+        }
+
+_store: Optional[SessionStore] = None
+_store_lock = threading.Lock()
+
+def get_session_store() -> SessionStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = SessionStore()
+    return _store
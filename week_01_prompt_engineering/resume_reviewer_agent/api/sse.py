@@ -0,0 +1,46 @@
+import json
+import asyncio
+from typing import Any, AsyncIterator, Tuple
+
+# Headers that stop nginx and similar proxies from buffering the event stream
+SSE_HEADERS = {
+    "Cache-Control": "no-cache, no-transform",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",
+}
+
+def format_sse(event: str, data: Any) -> str:
+    """Encode one Server-Sent Event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def with_heartbeats(events: AsyncIterator[Tuple[str, Any]], interval: float) -> AsyncIterator[Tuple[str, Any]]:
+    """Re-yield ``(event, data)`` pairs, inserting a ``heartbeat`` whenever the source
+    is silent for ``interval`` seconds (e.g. while the model is still thinking)."""
+    queue: asyncio.Queue = asyncio.Queue()
+    finished = object()
+
+    async def pump():
+        try:
+            async for item in events:
+                await queue.put(item)
+        except Exception as e:
+            await queue.put(e)
+        finally:
+            await queue.put(finished)
+
+    producer = asyncio.create_task(pump())
+    try:
+        while True:
+            try:
+                item = await asyncio.wait_for(queue.get(), timeout=interval)
+            except asyncio.TimeoutError:
+                yield "heartbeat", {}
+                continue
+            if item is finished:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        # Client disconnected or stream ended: stop producing
+        producer.cancel()
@@ -5,16 +5,22 @@ This is the main application file for the Resume Reviewer Agent.
 """
 
 import os
+import atexit
 import argparse
+import asyncio
 from typing import Dict, Any, Optional
 from dotenv import load_dotenv
 import logging
-import anthropic
-import requests
 
 # Import utilities
-from utils.parser import extract_resume_text, extract_resume_sections, extract_keywords
 from api.service import ResumeReviewService
+from utils.llm_gateway import get_gateway
+from utils.prompt_cache import (cached_system, mark_history_breakpoint, split_system_messages, uncached_system_parts,
+                                usage_to_dict)
+from utils.conversation import ConversationWindow, estimate_tokens
+from utils.model_router import get_model_router, estimate_input_tokens, REVIEW, SUMMARY
+from utils.metrics import dump_metrics, set_endpoint
+from prompts.feedback import CONVERSATION_SUMMARY_PROMPT
 
 # Configure logging at the top-level of the module
 logging.basicConfig(
@@ -58,13 +64,9 @@ class ResumeReviewer:
             Dictionary containing analysis results
         """
         self.logger.info(f"Reviewing resume: {resume_path}")
-        resume_text = extract_resume_text(resume_path)
-        sections = extract_resume_sections(resume_text)
-        analysis_results = self.service.analyze_resume(sections)
-        if job_description:
-            job_match = self.service.analyze_job_match(sections, job_description)
-            analysis_results["job_match"] = job_match
-        return analysis_results
+        # The sync service reuses the gateway's pooled client across reviews; a fresh
+        # event loop per call would build (and drop) a new async client every time
+        return self.service.review_resume(resume_path, job_description)
 
     def generate_report(self, analysis_results: Dict[str, Any]) -> str:
         """Generate a markdown report from analysis results using LLM feedback prompt."""
@@ -74,20 +76,45 @@ class ResumeReviewer:
 # --- Helper Functions ---
 # (Streamlit UI and related helpers have been moved to streamlit_app.py)
 
-def extract_text_from_pdf(file) -> str:
-    import PyPDF2
-    reader = PyPDF2.PdfReader(file)
-    text = ""
-    for page in reader.pages:
-        text += page.extract_text() or ""
-    return text
+def _with_cached_prefix(system_prompt, conversation):
+    """Fold system messages into the system prompt and mark the stable prefix
+    (instructions + resume + job title + earlier turns) for prompt caching; the
+    conversation summary follows the cached block so it can change freely."""
+    volatile = uncached_system_parts(conversation)
+    system_parts, conversation = split_system_messages(conversation)
+    if system_parts:
+        system_prompt += "\n\n" + "\n\n".join(system_parts)
+    return cached_system(system_prompt, volatile), mark_history_breakpoint(conversation)
 
-def get_feedback_via_api(resume_text, job_title=None, messages=None):
+def _summarize_conversation(previous_summary, messages):
+    """Fold older chat turns into the running summary (runs on a background thread)."""
+    transcript = "\n\n".join(f"{m['role'].title()}: {m['content']}" for m in messages)
+    route = get_model_router().route(SUMMARY, estimate_tokens(transcript))
+    response = get_gateway().create(dict(
+        model=route.model,
+        max_tokens=route.max_tokens,
+        messages=[{"role": "user", "content": CONVERSATION_SUMMARY_PROMPT.format(
+            previous_summary=previous_summary or "", messages=transcript)}],
+    ))
+    return response.content[0].text
+
+def _route(messages, system, conversation):
+    """Initial reviews keep the full model; follow-ups are routed by kind and size."""
+    request_class = get_model_router().classify_followup(messages) if messages else REVIEW
+    return get_model_router().route(request_class, estimate_input_tokens(system, conversation))
+
+# Keeps long chats within CONVERSATION_MAX_TOKENS (recent turns + a rolling summary)
+conversation_window = ConversationWindow(_summarize_conversation)
+
+def get_feedback_via_api(resume_text, job_title=None, messages=None, usage=None):
     """
     Get resume feedback using Anthropic Claude (non-streaming version).
+
+    If a ``usage`` dict is passed it is filled with the token counts of the call,
+    including prompt-cache reads and writes.
     """
     try:
-        client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+        gateway = get_gateway()
         
         # Prepare system prompt
         system_prompt = """You are a professional resume reviewer and writer with 15+ years of experience. 
@@ -100,35 +127,43 @@ def get_feedback_via_api(resume_text, job_title=None, messages=None):
         
         # Prepare messages
         if messages:
-            conversation = messages.copy()
+            conversation = conversation_window.prepare(messages.copy())
         else:
             conversation = [{
                 "role": "user", 
                 "content": "Please provide a comprehensive resume analysis with specific improvement suggestions."
             }]
-          # Get response
-        response = client.messages.create(
-            model=ANTHROPIC_MODEL,
-            max_tokens=ANTHROPIC_MAX_TOKENS,
-            system=system_prompt,
+        system, conversation = _with_cached_prefix(system_prompt, conversation)
+        route = _route(messages, system, conversation)
+        # Get response (rate limited and retried by the gateway)
+        response = gateway.create(dict(
+            model=route.model,
+            max_tokens=route.max_tokens,
+            system=system,
             messages=conversation
-        )
+        ))
+        if usage is not None:
+            usage.update(usage_to_dict(response.usage), route=route._asdict())
         
         return response.content[0].text, []
         
     except Exception as e:
         return f"[Error] Unable to connect to AI service: {str(e)}", []
 
-def get_feedback_via_api_streaming(resume_text, job_title=None, messages=None):
+def get_feedback_via_api_streaming(resume_text, job_title=None, messages=None, usage=None):
     """
     Stream responses directly from Anthropic Claude for better user experience.
+
+    The resume, job title and earlier turns are sent as a cached prefix so only the
+    new turn is processed from scratch. If a ``usage`` dict is passed it is filled
+    with the token counts (including cache reads/writes) once the stream finishes.
     """
     try:
-        client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+        gateway = get_gateway()
         
         # Prepare the conversation
         if messages:
-            conversation = messages.copy()
+            conversation = conversation_window.prepare(messages.copy())
         else:
             conversation = []
         
@@ -148,32 +183,83 @@ def get_feedback_via_api_streaming(resume_text, job_title=None, messages=None):
                 "role": "user", 
                 "content": "Please provide a comprehensive resume analysis with specific improvement suggestions."
             })
-        with client.messages.stream(
-            model=ANTHROPIC_MODEL,
-            max_tokens=ANTHROPIC_MAX_TOKENS,
-            system=system_prompt,
+        system, conversation = _with_cached_prefix(system_prompt, conversation)
+        route = _route(messages, system, conversation)
+        # Rate limited, retried (before the first chunk) and circuit-broken by the gateway
+        for kind, data in gateway.stream(dict(
+            model=route.model,
+            max_tokens=route.max_tokens,
+            system=system,
             messages=conversation
-        ) as stream:
-            for chunk in stream.text_stream:
-                yield chunk 
+        )):
+            if kind == "delta":
+                yield data
+            elif usage is not None:
+                usage.update(usage_to_dict(data.usage), route=route._asdict())
     except Exception as e:
         yield f"[Error] Unable to connect to AI service: {str(e)}"
 
+def run_batch_mode(args):
+    """Run the bulk directory review and print a throughput/latency summary."""
+    from batch import run_batch, format_summary
+
+    if not os.path.isdir(args.input_dir):
+        print(f"Error: Input directory not found at {args.input_dir}")
+        return
+    job_path = args.jobs or args.job
+    job_description = None
+    if job_path and os.path.isfile(job_path):
+        with open(job_path, 'r') as f:
+            job_description = f.read()
+
+    # Stage and LLM metrics of the whole run are written when the process exits
+    set_endpoint("batch")
+    atexit.register(dump_metrics, args.metrics_out or f"{args.out or 'results.jsonl'}.metrics.prom")
+    summary = asyncio.run(run_batch(
+        args.input_dir,
+        args.out or "results.jsonl",
+        job_description=job_description,
+        concurrency=args.concurrency,
+        checkpoint_path=args.checkpoint,
+        workers=args.workers,
+    ))
+    print(format_summary(summary))
+
 def main():
     """Main function for running the Resume Reviewer Agent from command line."""
     
     # Parse command line arguments
     parser = argparse.ArgumentParser(description='Resume Reviewer Agent')
-    parser.add_argument('resume_path', help='Path to the resume file (PDF or DOCX)')
+    parser.add_argument('resume_path', nargs='?', help='Path to the resume file (PDF or DOCX)')
     parser.add_argument('--job', '-j', help='Path to a job description file')
     parser.add_argument('--output', '-o', help='Path to save the output markdown report')
+    # Bulk directory mode
+    parser.add_argument('--input-dir', help='Review every resume in this directory')
+    parser.add_argument('--jobs', help='Job description file used for every resume in --input-dir')
+    parser.add_argument('--out', help='JSONL file batch results are appended to (default: results.jsonl)')
+    parser.add_argument('--concurrency', type=int, default=8, help='Maximum resumes with LLM calls in flight')
+    parser.add_argument('--workers', type=int, help='Parser processes (default: CPU count)')
+    parser.add_argument('--checkpoint', help='Checkpoint file (default: <out>.checkpoint)')
+    parser.add_argument('--metrics-out', help='Write Prometheus-format metrics here at exit, "-" for stdout '
+                                              '(batch default: <out>.metrics.prom)')
     args = parser.parse_args()
+
+    if args.input_dir:
+        run_batch_mode(args)
+        return
+
+    if not args.resume_path:
+        parser.error("resume_path is required unless --input-dir is given")
     
     # Check if resume file exists
     if not os.path.isfile(args.resume_path):
         print(f"Error: Resume file not found at {args.resume_path}")
         return
     
+    set_endpoint("cli")
+    if args.metrics_out:
+        atexit.register(dump_metrics, args.metrics_out)
+
     # Initialize the resume reviewer
     reviewer = ResumeReviewer()
     
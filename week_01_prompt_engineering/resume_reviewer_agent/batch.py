@@ -0,0 +1,218 @@
+"""
+Batch Resume Review
+
+Bulk directory mode for the command line. A fixed set of worker coroutines takes the
+resumes of a directory one at a time: each is parsed in a process pool, reviewed with
+bounded LLM concurrency, and written incrementally to a JSONL file, so memory depends
+on the number of workers rather than on the size of the directory. A checkpoint file records finished resumes so an interrupted run can be
+resumed without paying for them again.
+"""
+
+import os
+import json
+import time
+import asyncio
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from utils.extraction_cache import content_hash, get_extraction_cache, parse_resume_bytes
+from utils.metrics import stage_timer
+from api.async_service import AsyncResumeReviewService
+
+logger = logging.getLogger("resume_reviewer")
+
+SUPPORTED_EXTENSIONS = (".pdf", ".docx", ".doc", ".txt")
+
+
+def _read_file(path: str) -> Tuple[bytes, str]:
+    with open(path, "rb") as f:
+        data = f.read()
+    return data, content_hash(data)
+
+
+def find_resumes(input_dir: str) -> List[str]:
+    """
+    List the resume files in a directory (recursively), in a stable order.
+
+    Args:
+        input_dir: Directory to scan
+
+    Returns:
+        Sorted list of paths with a supported extension
+    """
+    paths = []
+    for root, _, files in os.walk(input_dir):
+        for name in files:
+            if name.lower().endswith(SUPPORTED_EXTENSIONS):
+                paths.append(os.path.join(root, name))
+    return sorted(paths)
+
+
+def load_checkpoint(checkpoint_path: str) -> Set[str]:
+    """
+    Read the set of resumes already finished by a previous run.
+
+    Args:
+        checkpoint_path: Path to the checkpoint file (one resume path per line)
+
+    Returns:
+        Set of finished resume paths
+    """
+    if not os.path.isfile(checkpoint_path):
+        return set()
+    with open(checkpoint_path, "r", encoding="utf-8") as f:
+        return {line.rstrip("\n") for line in f if line.strip()}
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+async def run_batch(
+    input_dir: str,
+    out_path: str,
+    job_description: Optional[str] = None,
+    concurrency: int = 8,
+    checkpoint_path: Optional[str] = None,
+    workers: Optional[int] = None,
+    api_key: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Review every resume in a directory and append one JSON line per resume.
+
+    Args:
+        input_dir: Directory containing resumes
+        out_path: JSONL file results are appended to
+        job_description: Optional job description used for every resume
+        concurrency: Maximum resumes with LLM calls in flight
+        checkpoint_path: Checkpoint file; defaults to ``<out_path>.checkpoint``
+        workers: Parser process pool size; defaults to the CPU count
+        api_key: Optional Anthropic API key
+
+    Returns:
+        Summary with counts, throughput and latency percentiles
+    """
+    checkpoint_path = checkpoint_path or f"{out_path}.checkpoint"
+    done = load_checkpoint(checkpoint_path)
+    all_paths = find_resumes(input_dir)
+    pending = [p for p in all_paths if p not in done]
+    logger.info(f"Batch: {len(all_paths)} resumes found, {len(all_paths) - len(pending)} already done, {len(pending)} to review")
+
+    service = AsyncResumeReviewService(api_key=api_key)
+    extraction_cache = get_extraction_cache()
+    # Parses in flight only; an entry is dropped as soon as it is in the extraction cache
+    parsing: Dict[str, "asyncio.Future[Dict[str, Any]]"] = {}
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    # Enough workers to keep the LLM slots busy while the next resumes are being parsed
+    worker_count = max(1, concurrency) + (workers or os.cpu_count() or 1)
+    loop = asyncio.get_running_loop()
+    latencies: List[float] = []
+    counts = {"ok": 0, "error": 0}
+    started = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool, \
+            open(out_path, "a", encoding="utf-8") as out, \
+            open(checkpoint_path, "a", encoding="utf-8") as checkpoint:
+
+        def record(result: Dict[str, Any]) -> None:
+            # Single event loop, so writes never interleave; flush so a crash loses nothing
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+            counts[result["status"]] += 1
+            if result["status"] == "ok":
+                checkpoint.write(result["file"] + "\n")
+                checkpoint.flush()
+
+        async def review_one(path: str) -> None:
+            item_started = time.perf_counter()
+            try:
+                # Only cache misses go to the parser pool; duplicates and re-runs
+                # (with EXTRACTION_CACHE_DIR set) skip parsing entirely
+                data, digest = await asyncio.to_thread(_read_file, path)
+                parsed_here = False
+                extracted = None
+                parse = parsing.get(digest)
+                if parse is None:
+                    extracted = extraction_cache.get(digest)
+                    if extracted is None:
+                        # Identical files in the same run share a single parse
+                        parse = parsing[digest] = loop.run_in_executor(pool, parse_resume_bytes, data, path)
+                        parsed_here = True
+                # The pool has its own copy; don't hold the bytes through the review
+                del data
+                if parsed_here:
+                    try:
+                        # Metrics recorded inside the parser processes are lost, so the
+                        # whole parse (extraction + sectioning) is timed here
+                        with stage_timer("extraction"):
+                            extracted = {**await parse, "sha256": digest}
+                        extraction_cache.put(digest, extracted)
+                    finally:
+                        # Later duplicates find it in the extraction cache
+                        parsing.pop(digest, None)
+                elif parse is not None:
+                    extracted = {**await parse, "sha256": digest}
+                sections = extracted["sections"]
+                async with semaphore:
+                    # LLM failures raise LLMError (after the gateway's retries) and skip the report
+                    analysis_results = await service.review_sections(sections, job_description)
+                    report = await service.generate_report(analysis_results)
+                latency = time.perf_counter() - item_started
+                latencies.append(latency)
+                record({"file": path, "status": "ok", "latency_s": round(latency, 3),
+                        "analysis_results": analysis_results, "report": report})
+            except Exception as e:
+                logger.error(f"Batch review failed for {path}: {e}")
+                record({"file": path, "status": "error", "error": str(e),
+                        "latency_s": round(time.perf_counter() - item_started, 3)})
+
+        paths = iter(pending)
+
+        async def worker() -> None:
+            # The iterator is shared, so each resume goes to exactly one worker
+            for path in paths:
+                await review_one(path)
+
+        try:
+            await asyncio.gather(*(worker() for _ in range(min(worker_count, len(pending)))))
+        finally:
+            await service.gateway.aclose()
+
+    elapsed = time.perf_counter() - started
+    return {
+        "total": len(all_paths),
+        "skipped": len(all_paths) - len(pending),
+        "reviewed": counts["ok"],
+        "failed": counts["error"],
+        "elapsed_s": round(elapsed, 3),
+        "throughput_per_min": round(60 * (counts["ok"] + counts["error"]) / elapsed, 2) if elapsed > 0 else 0.0,
+        "latency_p50_s": round(_percentile(latencies, 50), 3),
+        "latency_p95_s": round(_percentile(latencies, 95), 3),
+        "latency_max_s": round(max(latencies), 3) if latencies else 0.0,
+        "output": out_path,
+        "checkpoint": checkpoint_path,
+    }
+
+
+def format_summary(summary: Dict[str, Any]) -> str:
+    """
+    Format a batch summary for the terminal.
+
+    Args:
+        summary: Result of ``run_batch``
+
+    Returns:
+        Human-readable summary
+    """
+    return (
+        f"Batch complete: {summary['reviewed']} reviewed, {summary['failed']} failed, "
+        f"{summary['skipped']} skipped (checkpoint) of {summary['total']}\n"
+        f"Elapsed: {summary['elapsed_s']}s | Throughput: {summary['throughput_per_min']} resumes/min\n"
+        f"Latency p50: {summary['latency_p50_s']}s | p95: {summary['latency_p95_s']}s | max: {summary['latency_max_s']}s\n"
+        f"Results: {summary['output']} | Checkpoint: {summary['checkpoint']}"
+    )
@@ -0,0 +1,57 @@
+"""
+Keyword Extraction Benchmark
+
+Times index loading, single-document extraction (the per-request path) and the batch
+API on 1,000 and 10,000 synthetic resumes.
+
+Usage:
+    python -m benchmarks.bench_keywords [--repeat 5]
+"""
+
+import time
+import random
+import argparse
+import statistics
+
+from utils.keywords import KeywordIndex, INDEX_DIR, extract_keywords_batch, get_keyword_index
+
+FILLER = "designed delivered improved owned coordinated reduced built the a of for with across team customers".split()
+
+
+def make_resume(index: KeywordIndex, rng: random.Random, words: int = 600) -> str:
+    terms = index.terms
+    return " ".join(rng.choice(terms) if rng.random() < 0.08 else rng.choice(FILLER) for _ in range(words))
+
+
+def main():
+    argparser = argparse.ArgumentParser(description="Benchmark keyword extraction")
+    argparser.add_argument("--repeat", type=int, default=5)
+    args = argparser.parse_args()
+
+    started = time.perf_counter()
+    KeywordIndex.load(INDEX_DIR)
+    print(f"index load: {(time.perf_counter() - started) * 1000:.2f} ms")
+
+    index = get_keyword_index()
+    rng = random.Random(0)
+    resume = make_resume(index, rng)
+    samples = []
+    for _ in range(max(args.repeat, 1) * 20):
+        started = time.perf_counter()
+        extract_keywords_batch([resume])
+        samples.append(time.perf_counter() - started)
+    print(f"single resume (600 words): p50 {statistics.median(samples) * 1000:.3f} ms")
+
+    for size in (1000, 10000):
+        docs = [make_resume(index, rng) for _ in range(size)]
+        samples = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            extract_keywords_batch(docs)
+            samples.append(time.perf_counter() - started)
+        elapsed = statistics.median(samples)
+        print(f"batch of {size}: {elapsed * 1000:.1f} ms ({size / elapsed:,.0f} docs/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Sectionizer Benchmark
+
+Times ``extract_resume_sections`` on a synthetic 50-page academic CV and on inputs
+built to provoke regex backtracking (near-miss headers, long runs of whitespace and
+decoration, a single huge line). Each input is timed at 1x, 2x, 4x and 8x its base
+size; a linear-time sectionizer keeps the cost per KB flat as the size grows.
+
+Usage:
+    python -m benchmarks.bench_sectionizer [--repeat 5]
+"""
+
+import time
+import argparse
+import statistics
+from typing import Callable, Dict
+
+from utils.parser import extract_resume_sections
+
+LINE = "Developed a distributed evaluation harness for sequence models across 64 GPUs (Python, PyTorch)."
+
+
+def academic_cv(pages: int) -> str:
+    """Roughly 50 lines per page, with the usual academic sections repeated."""
+    blocks = []
+    headers = ["RESEARCH EXPERIENCE", "Publications:", "Teaching Experience", "Grants", "Presentations", "Education"]
+    for page in range(pages):
+        blocks.append(headers[page % len(headers)])
+        blocks.extend(f"- {LINE} [{page}.{n}]" for n in range(49))
+    return "Dr. Jane Doe\njane@university.edu\n\n" + "\n".join(blocks)
+
+
+ADVERSARIAL: Dict[str, Callable[[int], str]] = {
+    # Header word followed by a long run of blanks that never reaches a colon or end of line
+    "near-miss headers": lambda n: ("skills" + " " * 200 + "x\n") * n,
+    # Multi-word header whose word gap is huge and then breaks off
+    "long word gaps": lambda n: ("work" + "\t" * 200 + "history of x\n") * n,
+    # Decoration prefix with no header behind it
+    "decoration runs": lambda n: ("#*-= " * 50 + "notaheader\n") * n,
+    # Header-like words repeated on one line
+    "repeated words": lambda n: ("experience " * 40 + "\n") * n,
+    # No newline at all: one giant line
+    "single line": lambda n: "education " * (40 * n),
+}
+
+
+def _time(text: str, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        sections = extract_resume_sections(text)
+        dict(sections)  # include materialisation
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def _report(label: str, build: Callable[[int], str], base: int, repeat: int) -> bool:
+    per_kb = []
+    for factor in (1, 2, 4, 8):
+        text = build(base * factor)
+        elapsed = _time(text, repeat)
+        per_kb.append(elapsed * 1e6 / (len(text) / 1024))
+        print(f"{label:<20}{factor:>4}x{len(text) / 1024:>12.0f}{elapsed * 1000:>12.2f}{per_kb[-1]:>12.2f}")
+    # Quadratic behaviour would grow the per-KB cost ~8x between 1x and 8x
+    growth = per_kb[-1] / per_kb[0]
+    linear = growth < 2.0
+    print(f"{'':<20}per-KB growth 1x->8x: {growth:.2f} ({'linear' if linear else 'SUPERLINEAR'})")
+    return linear
+
+
+def main():
+    argparser = argparse.ArgumentParser(description="Benchmark resume sectioning")
+    argparser.add_argument("--repeat", type=int, default=5)
+    args = argparser.parse_args()
+
+    print(f"{'input':<20}{'size':>5}{'KB':>12}{'ms':>12}{'us/KB':>12}")
+    results = [_report("academic CV (50p)", lambda n: academic_cv(50 * n), 1, args.repeat)]
+    for label, build in ADVERSARIAL.items():
+        results.append(_report(label, build, 500, args.repeat))
+    if not all(results):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
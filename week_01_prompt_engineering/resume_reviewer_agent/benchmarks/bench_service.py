@@ -0,0 +1,382 @@
+"""
+Service Benchmark
+
+Measures the API end to end without spending tokens: the real app (routes, services,
+gateway, SDK and HTTP stack) is served by uvicorn and talks to the fake Messages API
+in benchmarks/fake_anthropic.py, which runs in its own process with seeded latency,
+token-rate streaming and optional error injection. Scenarios cover ``/api/review``,
+``/api/review-upload`` and ``/api/review/stream`` (with time to first event), plus
+in-process micro benchmarks of the parser, sectionizer, report renderer and DOCX
+export. Results are emitted as JSON (p50/p95/p99, req/s, RSS) so runs on different
+commits can be compared, e.g. with ``--baseline``.
+
+The LLM response cache and near-duplicate reuse are off unless ``--with-caches`` is
+given, and every request uses a distinct resume, so each one reaches the backend.
+
+Usage:
+    python -m benchmarks.bench_service [--requests 200] [--concurrency 16] [--out bench.json]
+    python -m benchmarks.bench_service --latency fixed:0.05 --tokens-per-s 0 --baseline bench.json
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import platform
+import tempfile
+import threading
+import subprocess
+import multiprocessing
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from benchmarks.fake_anthropic import STRUCTURED_REVIEW, serve as serve_fake_backend
+
+SCENARIOS = ("review", "upload", "stream", "micro")
+JOB_TITLE = "Senior Backend Engineer"
+JOB_DESCRIPTION = ("We are hiring a Senior Backend Engineer with Python, FastAPI, PostgreSQL, AWS, Docker and "
+                   "Kubernetes experience to build reliable, high-throughput APIs and mentor other engineers.")
+
+
+def resume_text(index: int) -> str:
+    """A synthetic resume; ``index`` makes it unique so no cache can answer it."""
+    return f"""Candidate {index:05d}
+candidate{index}@example.com | +1 555 {index:04d}
+
+Professional Summary
+Backend engineer with {3 + index % 10} years of experience building Python services.
+
+Work Experience
+Senior Software Engineer, Acme Corp (2020 - Present)
+- Built FastAPI services handling 10k requests per second with 99.9% uptime
+- Migrated batch jobs from cron to Kubernetes, cutting infrastructure cost by 30%
+- Responsible for on-call rotation and incident reviews
+Software Engineer, Initech (2017 - 2020)
+- Developed PostgreSQL reporting pipelines used by {index % 50 + 10} internal teams
+- Worked on Docker based CI/CD
+
+Education
+B.Sc. Computer Science, State University (2017)
+
+Skills
+Python, FastAPI, PostgreSQL, Docker, Kubernetes, AWS, Redis, teamwork, communication
+"""
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for_port(port: int, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"Nothing is listening on port {port} after {timeout}s")
+
+
+def _rss_mb() -> Optional[float]:
+    """Current resident set size of this process (which hosts the API server)."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            pages = int(f.read().split()[1])
+        return round(pages * os.sysconf("SC_PAGE_SIZE") / 2 ** 20, 1)
+    except (OSError, ValueError, AttributeError):
+        return _peak_rss_mb()
+
+
+def _peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(peak / (2 ** 20 if sys.platform == "darwin" else 2 ** 10), 1)
+
+
+def _percentile(ordered: List[float], pct: float) -> float:
+    if not ordered:
+        return 0.0
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """p50/p95/p99, mean and max of latency samples (seconds), in milliseconds."""
+    ordered = sorted(samples)
+    summary = {f"p{pct}": _percentile(ordered, pct) for pct in (50, 95, 99)}
+    summary["mean"] = sum(ordered) / len(ordered) if ordered else 0.0
+    summary["max"] = ordered[-1] if ordered else 0.0
+    return {key: round(value * 1000, 3) for key, value in summary.items()}
+
+
+# --- end-to-end scenarios ----------------------------------------------------------
+
+# index -> (HTTP status, seconds to the first streamed event or None)
+Send = Callable[[int], Awaitable[Tuple[int, Optional[float]]]]
+
+
+def _review(client: httpx.AsyncClient) -> Send:
+    async def send(index: int) -> Tuple[int, Optional[float]]:
+        response = await client.post("/api/review", json={"resume_text": resume_text(index), "job_description": JOB_TITLE})
+        return response.status_code, None
+    return send
+
+
+def _upload(client: httpx.AsyncClient) -> Send:
+    from benchmarks.bench_parser import make_pdf
+
+    async def send(index: int) -> Tuple[int, Optional[float]]:
+        # Distinct bytes per request, so the extraction cache doesn't answer it
+        pdf = make_pdf(1, lines_per_page=30, line=f"Candidate {index:05d} - Built Python services on AWS")
+        response = await client.post(
+            "/api/review-upload",
+            files={"resume": (f"resume_{index}.pdf", pdf, "application/pdf")},
+            data={"job_description": JOB_DESCRIPTION},
+        )
+        return response.status_code, None
+    return send
+
+
+def _stream(client: httpx.AsyncClient) -> Send:
+    async def send(index: int) -> Tuple[int, Optional[float]]:
+        started = time.perf_counter()
+        first_event = None
+        status = 0
+        body = {"resume_text": resume_text(index), "job_description": JOB_TITLE}
+        async with client.stream("POST", "/api/review/stream", json=body) as response:
+            status = response.status_code
+            async for line in response.aiter_lines():
+                if first_event is None and line in ("event: report.delta", "event: analysis.delta"):
+                    first_event = time.perf_counter() - started
+                elif line == "event: error":
+                    # The HTTP status is already sent; count a failed stream as a 502
+                    status = 502
+        return status, first_event
+    return send
+
+
+async def run_scenario(send: Send, requests: int, concurrency: int, offset: int, warmup: int = 3) -> Dict[str, Any]:
+    """Fire ``requests`` requests with at most ``concurrency`` in flight and summarize them."""
+    for index in range(warmup):
+        await send(offset - warmup + index)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    first_events: List[float] = []
+    statuses: Dict[str, int] = {}
+
+    async def one(index: int) -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                status, first_event = await send(offset + index)
+            except httpx.HTTPError as e:
+                status, first_event = type(e).__name__, None
+            elapsed = time.perf_counter() - started
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+            if status == 200:
+                latencies.append(elapsed)
+                if first_event is not None:
+                    first_events.append(first_event)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(index) for index in range(requests)))
+    elapsed = time.perf_counter() - started
+    result = {
+        "requests": requests,
+        "concurrency": concurrency,
+        "ok": len(latencies),
+        "statuses": statuses,
+        "elapsed_s": round(elapsed, 3),
+        "req_per_s": round(len(latencies) / elapsed, 2) if elapsed > 0 else 0.0,
+        "latency_ms": summarize(latencies),
+        "rss_mb": _rss_mb(),
+    }
+    if first_events:
+        result["first_event_ms"] = summarize(first_events)
+    return result
+
+
+# --- micro benchmarks --------------------------------------------------------------
+
+def run_micro(repeat: int) -> Dict[str, Any]:
+    """Time the local hot paths in-process."""
+    from utils.parser import extract_resume_text, extract_resume_sections
+    from utils.output import generate_markdown_report
+    from utils.export import export_feedback
+    from benchmarks.bench_parser import make_pdf
+    from benchmarks.bench_sectionizer import academic_cv
+
+    pdf_1p, pdf_10p = make_pdf(1), make_pdf(10)
+    cv = academic_cv(5)
+    analysis = {**STRUCTURED_REVIEW, "review_mode": "structured"}
+    messages = [{"role": "assistant", "content": generate_markdown_report(analysis)}]
+    cases: Dict[str, Callable[[], Any]] = {
+        "parser_pdf_1p": lambda: extract_resume_text(pdf_1p, "resume.pdf"),
+        "parser_pdf_10p": lambda: extract_resume_text(pdf_10p, "resume.pdf"),
+        "sectionizer_cv_5p": lambda: dict(extract_resume_sections(cv)),
+        "renderer_markdown": lambda: generate_markdown_report(analysis),
+        "export_docx": lambda: export_feedback(messages, JOB_TITLE, "docx"),
+    }
+    results = {}
+    for name, fn in cases.items():
+        for _ in range(min(3, repeat)):
+            fn()
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - started)
+        total = sum(samples)
+        results[name] = {
+            "iterations": repeat,
+            "ops_per_s": round(repeat / total, 2) if total > 0 else 0.0,
+            "latency_ms": summarize(samples),
+        }
+    return results
+
+
+# --- harness -----------------------------------------------------------------------
+
+def _configure(base_url: str, workdir: str, with_caches: bool) -> None:
+    """Point the service at the fake backend; must run before the app is imported."""
+    os.environ.update({
+        "ANTHROPIC_BASE_URL": base_url,
+        "ANTHROPIC_API_KEY": "bench-key",
+        "LLM_CACHE_PATH": os.path.join(workdir, "llm_responses.sqlite3"),
+        "NEAR_DUP_PATH": os.path.join(workdir, "near_duplicates.sqlite3"),
+        "LLM_RATE_LIMIT_PATH": os.path.join(workdir, "rate_limits.sqlite3"),
+        "SESSIONS_DB_PATH": os.path.join(workdir, "sessions.sqlite3"),
+        "JOBS_DB_PATH": os.path.join(workdir, "jobs.sqlite3"),
+    })
+    if not with_caches:
+        os.environ.update({"LLM_CACHE_ENABLED": "false", "NEAR_DUP_ENABLED": "false"})
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, timeout=5,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+async def _run_end_to_end(api_url: str, scenarios: List[str], requests: int, concurrency: int) -> Dict[str, Any]:
+    senders = {"review": _review, "upload": _upload, "stream": _stream}
+    limits = httpx.Limits(max_connections=concurrency * 2, max_keepalive_connections=concurrency * 2)
+    results = {}
+    async with httpx.AsyncClient(base_url=api_url, timeout=300.0, limits=limits) as client:
+        for number, name in enumerate(s for s in scenarios if s in senders):
+            # Distinct resume indices per scenario, so one scenario never warms another's caches
+            results[name] = await run_scenario(senders[name](client), requests, concurrency, offset=(number + 1) * 1_000_000)
+            print(f"  {name}: {results[name]['req_per_s']} req/s, p50 {results[name]['latency_ms']['p50']} ms",
+                  file=sys.stderr)
+    return results
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """Percent changes of p50/p95/p99 and throughput against a baseline run."""
+    lines = [f"{'benchmark':<24}{'metric':<12}{'baseline':>12}{'current':>12}{'change':>10}"]
+    for group, rate_key in (("scenarios", "req_per_s"), ("micro", "ops_per_s")):
+        for name, current in results.get(group, {}).items():
+            previous = baseline.get(group, {}).get(name)
+            if not previous:
+                continue
+            pairs = [(f"{p} ms", previous["latency_ms"][p], current["latency_ms"][p]) for p in ("p50", "p95", "p99")]
+            pairs.append((rate_key, previous[rate_key], current[rate_key]))
+            for metric, old, new in pairs:
+                change = f"{(new - old) / old * 100:+.1f}%" if old else "-"
+                lines.append(f"{name:<24}{metric:<12}{old:>12}{new:>12}{change:>10}")
+    return lines
+
+
+def main():
+    argparser = argparse.ArgumentParser(description="Benchmark the review API against a fake Messages API")
+    argparser.add_argument("--requests", type=int, default=100, help="Requests per end-to-end scenario")
+    argparser.add_argument("--concurrency", type=int, default=8)
+    argparser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"Comma-separated subset of {SCENARIOS}")
+    argparser.add_argument("--latency", default="lognormal:0.3,0.3", help="Fake time-to-first-token distribution")
+    argparser.add_argument("--tokens-per-s", type=float, default=200.0, help="Fake output token rate (0 = instant)")
+    argparser.add_argument("--error-rate", type=float, default=0.0, help="Share of fake responses that are errors")
+    argparser.add_argument("--seed", type=int, default=42)
+    argparser.add_argument("--micro-repeat", type=int, default=50)
+    argparser.add_argument("--with-caches", action="store_true", help="Keep the response cache and near-duplicate reuse on")
+    argparser.add_argument("--out", help="Write the JSON results here (default: stdout)")
+    argparser.add_argument("--baseline", help="Earlier JSON results to compare against")
+    args = argparser.parse_args()
+
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        argparser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    workdir = tempfile.mkdtemp(prefix="resume-bench-")
+    fake_port, api_port = _free_port(), _free_port()
+    # The fake backend gets its own process so it doesn't compete with the API for the GIL
+    backend = multiprocessing.get_context("spawn").Process(
+        target=serve_fake_backend, args=(fake_port,),
+        kwargs={"latency": args.latency, "tokens_per_s": args.tokens_per_s, "error_rate": args.error_rate,
+                "seed": args.seed},
+        daemon=True,
+    )
+    backend.start()
+    _configure(f"http://127.0.0.1:{fake_port}", workdir, args.with_caches)
+
+    import uvicorn
+    from api import app
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=api_port, log_level="warning"))
+    server_thread = threading.Thread(target=server.run, daemon=True)
+    results: Dict[str, Any] = {}
+    try:
+        _wait_for_port(fake_port)
+        server_thread.start()
+        _wait_for_port(api_port)
+        print(f"Benchmarking {scenarios} ({args.requests} requests, concurrency {args.concurrency})", file=sys.stderr)
+        results["scenarios"] = asyncio.run(_run_end_to_end(f"http://127.0.0.1:{api_port}", scenarios,
+                                                           args.requests, args.concurrency))
+        results["backend"] = httpx.get(f"http://127.0.0.1:{fake_port}/stats").json()
+        if "micro" in scenarios:
+            results["micro"] = run_micro(args.micro_repeat)
+    finally:
+        server.should_exit = True
+        server_thread.join(timeout=10)
+        backend.terminate()
+        backend.join(timeout=10)
+
+    results["peak_rss_mb"] = _peak_rss_mb()
+    results["meta"] = {
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("out", "baseline")},
+    }
+    output = json.dumps(results, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+        print(f"Results written to {args.out}", file=sys.stderr)
+    else:
+        print(output)
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            print("\n".join(compare(results, json.load(f))), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
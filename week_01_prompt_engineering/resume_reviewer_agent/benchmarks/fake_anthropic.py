@@ -0,0 +1,250 @@
+"""
+Fake Anthropic Messages API
+
+A local stand-in for ``POST /v1/messages`` so the service can be load-tested without
+spending tokens. It replays canned responses (a valid structured review for the
+single-call review prompt, a markdown review for everything else), waits a
+time-to-first-token drawn from a configurable distribution, streams at a fixed
+token rate and injects 429/529/500 errors at a given rate. Randomness is seeded, so
+a run is reproducible. Point the SDK at it with ``ANTHROPIC_BASE_URL``.
+
+Usage:
+    python -m benchmarks.fake_anthropic --port 8900 --latency lognormal:0.8,0.4 --tokens-per-s 80
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8900 ANTHROPIC_API_KEY=fake uvicorn main:app
+"""
+
+import json
+import math
+import random
+import asyncio
+import argparse
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+STRUCTURED_REVIEW = {
+    "overall_score": 72,
+    "structure": {"name": "Structure & Formatting", "assessment": "Adequate",
+                  "issues": ["Dense paragraphs in the experience section", "Inconsistent date formats"],
+                  "suggestions": ["Use 3-5 bullets per role", "Format every date as MMM YYYY"]},
+    "summary": {"name": "Professional Summary", "assessment": "Needs Improvement",
+                "issues": ["Generic wording that could describe any engineer"],
+                "suggestions": ["Lead with years of experience, domain and one quantified result"]},
+    "experience": {"name": "Work Experience", "assessment": "Strong",
+                   "issues": ["Several bullets describe duties rather than outcomes"],
+                   "suggestions": ["Quantify impact (latency, revenue, users) for the top bullets",
+                                   "Start each bullet with an action verb"]},
+    "education": {"name": "Education", "assessment": "Adequate", "issues": [],
+                  "suggestions": ["Move education below experience"]},
+    "skills": {"name": "Skills", "assessment": "Adequate",
+               "issues": ["Soft skills mixed with tools"],
+               "suggestions": ["Group skills by category (languages, frameworks, cloud)"]},
+    "next_steps": ["Rewrite the summary", "Quantify the top five bullets", "Group the skills section"],
+}
+STRUCTURED_JOB_MATCH = {"emphasis_points": ["Production Python services", "Ownership of on-call and reliability"]}
+
+TEXT_REVIEW = """## Overall Assessment
+The resume is well organized and shows solid, relevant experience, but many bullets describe
+responsibilities instead of results.
+
+## Strengths
+- Clear reverse-chronological structure
+- Relevant technical stack for the target role
+
+## Areas for Improvement
+- **Summary**: replace generic wording with years of experience, domain and one quantified result
+- **Experience**: start bullets with action verbs and quantify impact (latency, revenue, users)
+- **Skills**: group by category and drop soft skills that aren't backed by examples
+
+## Suggested Rewrite
+- Before: "Responsible for backend services"
+- After: "Built and ran Python services handling 10k requests/s at 99.9% uptime"
+"""
+
+ERROR_TYPES = {429: "rate_limit_error", 500: "api_error", 529: "overloaded_error"}
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def parse_latency(spec: str) -> Tuple[str, List[float]]:
+    """Parse ``fixed:S``, ``uniform:LO,HI``, ``normal:MEAN,SD`` or ``lognormal:MEDIAN,SIGMA`` (seconds)."""
+    kind, _, params = spec.partition(":")
+    values = [float(v) for v in params.split(",") if v]
+    expected = {"fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2}
+    if kind not in expected or len(values) != expected[kind]:
+        raise ValueError(f"Invalid latency distribution: {spec!r}")
+    return kind, values
+
+
+class FakeBackend:
+    """Canned responses, latency, token-rate streaming and error injection."""
+
+    def __init__(self, latency: str = "fixed:0", tokens_per_s: float = 0.0, error_rate: float = 0.0,
+                 error_statuses: Tuple[int, ...] = (429, 529, 500), retry_after_ms: int = 100,
+                 chunk_tokens: int = 4, seed: int = 0, responses: Optional[List[Dict[str, str]]] = None):
+        """Initialize the backend.
+
+        Args:
+            latency: Time-to-first-token distribution (see ``parse_latency``)
+            tokens_per_s: Output generation rate; 0 generates instantly
+            error_rate: Share of requests answered with an injected error
+            error_statuses: Statuses injected errors are drawn from
+            retry_after_ms: ``retry-after-ms`` header sent with injected 429s
+            chunk_tokens: Tokens per streamed text delta
+            seed: Seed of every random draw
+            responses: Canned ``{"match": substring, "text": response}`` rules tried in order
+                before the defaults; an empty ``match`` matches every request
+        """
+        self.latency = parse_latency(latency)
+        self.tokens_per_s = tokens_per_s
+        self.error_rate = error_rate
+        self.error_statuses = error_statuses
+        self.retry_after_ms = retry_after_ms
+        self.chunk_tokens = max(1, chunk_tokens)
+        self.responses = responses or []
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.streams = 0
+        self.errors = 0
+
+    def draw(self) -> Tuple[float, Optional[int]]:
+        """Time to first token and the injected error status (if any) of one request."""
+        kind, params = self.latency
+        with self._lock:
+            if kind == "fixed":
+                delay = params[0]
+            elif kind == "uniform":
+                delay = self._random.uniform(*params)
+            elif kind == "normal":
+                delay = self._random.gauss(*params)
+            else:
+                delay = params[0] * math.exp(self._random.gauss(0, params[1]))
+            error = self._random.choice(self.error_statuses) if self._random.random() < self.error_rate else None
+        return max(0.0, delay), error
+
+    def respond(self, request: Dict[str, Any]) -> str:
+        """Pick the canned response for a request."""
+        system = request.get("system") or ""
+        if isinstance(system, list):
+            system = "".join(block.get("text", "") for block in system)
+        prompt = system + json.dumps(request.get("messages", []), ensure_ascii=False)
+        for rule in self.responses:
+            if rule.get("match", "") in prompt:
+                return rule["text"]
+        if '\\"overall_score\\"' in prompt or '"overall_score"' in prompt:
+            review = dict(STRUCTURED_REVIEW)
+            if '\\"job_match\\"' in prompt or '"job_match"' in prompt:
+                review["job_match"] = STRUCTURED_JOB_MATCH
+            return json.dumps(review, indent=2)
+        return TEXT_REVIEW
+
+    def error_response(self, status: int) -> JSONResponse:
+        headers = {"retry-after-ms": str(self.retry_after_ms)} if status == 429 else None
+        body = {"type": "error", "error": {"type": ERROR_TYPES.get(status, "api_error"), "message": "Injected error"}}
+        return JSONResponse(body, status_code=status, headers=headers)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"requests": self.requests, "streams": self.streams, "errors": self.errors}
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def create_app(backend: FakeBackend) -> FastAPI:
+    app = FastAPI(title="Fake Anthropic Messages API")
+
+    @app.post("/v1/messages")
+    async def messages(request: Request):
+        payload = await request.json()
+        ttft, error = backend.draw()
+        backend.requests += 1
+        if error is not None:
+            backend.errors += 1
+            await asyncio.sleep(ttft)
+            return backend.error_response(error)
+        model = payload.get("model", "fake-model")
+        text = backend.respond(payload)
+        max_tokens = int(payload.get("max_tokens", 4096))
+        # Responses are cut at max_tokens like the real API
+        if estimate_tokens(text) > max_tokens:
+            text = text[:max_tokens * 4]
+        input_tokens = estimate_tokens(json.dumps([payload.get("system"), payload.get("messages")]))
+        output_tokens = estimate_tokens(text)
+        message_id = f"msg_fake_{backend.requests}"
+
+        if not payload.get("stream"):
+            generation = output_tokens / backend.tokens_per_s if backend.tokens_per_s > 0 else 0.0
+            await asyncio.sleep(ttft + generation)
+            return {
+                "id": message_id, "type": "message", "role": "assistant", "model": model,
+                "content": [{"type": "text", "text": text}],
+                "stop_reason": "end_turn", "stop_sequence": None,
+                "usage": {"input_tokens": input_tokens, "output_tokens": output_tokens},
+            }
+
+        backend.streams += 1
+        chunk_chars = backend.chunk_tokens * 4
+        interval = backend.chunk_tokens / backend.tokens_per_s if backend.tokens_per_s > 0 else 0.0
+
+        async def events():
+            yield _sse("message_start", {"type": "message_start", "message": {
+                "id": message_id, "type": "message", "role": "assistant", "model": model, "content": [],
+                "stop_reason": None, "stop_sequence": None,
+                "usage": {"input_tokens": input_tokens, "output_tokens": 1}}})
+            await asyncio.sleep(ttft)
+            yield _sse("content_block_start", {"type": "content_block_start", "index": 0,
+                                               "content_block": {"type": "text", "text": ""}})
+            for start in range(0, len(text), chunk_chars):
+                if start and interval:
+                    await asyncio.sleep(interval)
+                yield _sse("content_block_delta", {"type": "content_block_delta", "index": 0,
+                                                   "delta": {"type": "text_delta", "text": text[start:start + chunk_chars]}})
+            yield _sse("content_block_stop", {"type": "content_block_stop", "index": 0})
+            yield _sse("message_delta", {"type": "message_delta",
+                                         "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                                         "usage": {"output_tokens": output_tokens}})
+            yield _sse("message_stop", {"type": "message_stop"})
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.get("/stats")
+    async def stats():
+        return backend.stats()
+
+    return app
+
+
+def serve(port: int, host: str = "127.0.0.1", **options: Any) -> None:
+    """Run the fake API until the process is stopped (used as a subprocess target)."""
+    uvicorn.run(create_app(FakeBackend(**options)), host=host, port=port, log_level="warning")
+
+
+def main():
+    argparser = argparse.ArgumentParser(description="Local fake Anthropic Messages API")
+    argparser.add_argument("--host", default="127.0.0.1")
+    argparser.add_argument("--port", type=int, default=8900)
+    argparser.add_argument("--latency", default="lognormal:0.5,0.3", help="Time-to-first-token distribution")
+    argparser.add_argument("--tokens-per-s", type=float, default=80.0, help="Output token rate (0 = instant)")
+    argparser.add_argument("--error-rate", type=float, default=0.0)
+    argparser.add_argument("--error-statuses", default="429,529,500")
+    argparser.add_argument("--seed", type=int, default=0)
+    argparser.add_argument("--responses", help="JSON file with [{\"match\": ..., \"text\": ...}] rules")
+    args = argparser.parse_args()
+
+    responses = None
+    if args.responses:
+        with open(args.responses, "r", encoding="utf-8") as f:
+            responses = json.load(f)
+    serve(args.port, args.host, latency=args.latency, tokens_per_s=args.tokens_per_s, error_rate=args.error_rate,
+          error_statuses=tuple(int(s) for s in args.error_statuses.split(",")), seed=args.seed, responses=responses)
+
+
+if __name__ == "__main__":
+    main()
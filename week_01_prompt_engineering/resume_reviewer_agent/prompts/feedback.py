@@ -91,3 +91,18 @@ IMPROVED:
 WHY IT'S BETTER:
 [Brief explanation of the improvements]
 """
+
+# Rolling summary of older chat turns (see utils/conversation.py)
+CONVERSATION_SUMMARY_PROMPT = """
+You are maintaining a running summary of a resume review conversation between a candidate and a reviewer.
+
+Current summary (may be empty):
+{previous_summary}
+
+New messages to fold in:
+{messages}
+
+Write an updated summary of at most 200 words. Keep the candidate's questions and goals, the
+feedback and rewrite suggestions already given, and any decisions or preferences stated.
+Do not repeat the resume itself. Return only the summary.
+"""
@@ -46,6 +46,28 @@ Analyze how well this resume matches the job description:
 Provide your analysis in a clear, structured format.
 """
 
+# Job match prompt used when the match score and missing skills were computed locally
+JOB_MATCH_FOCUSED_PROMPT = """
+You are a professional resume reviewer specializing in ATS (Applicant Tracking System) optimization.
+
+A keyword analysis has already compared this resume with the job description:
+- Estimated match: {match_percentage}%
+- Skills found in both: {matched_skills}
+- Skills missing from the resume: {missing_skills}
+
+Resume Content (summary, experience and skills):
+{resume_content}
+
+Job Description:
+{job_description}
+
+Do not recalculate the match or repeat the missing skills. Only:
+1. Identify experience or qualifications in the resume that should be emphasized more
+2. Suggest specific modifications to better align the resume with this job description
+
+Keep your answer concise.
+"""
+
 # Feedback generation prompt
 FEEDBACK_PROMPT = """
 You are a professional resume reviewer providing actionable feedback to help job seekers improve their resumes.
@@ -61,3 +83,42 @@ Create a friendly, constructive feedback report that:
 
 Your feedback should be personalized, specific, and actionable.
 """
+
+# Single-call review returning the structured data the markdown report is rendered from
+STRUCTURED_REVIEW_PROMPT = """
+You are a professional resume reviewer with 15+ years of experience in HR and recruitment.
+
+Resume Content:
+{resume_content}
+{job_context}
+Review the resume's structure and formatting, professional summary, work experience,
+education and skills. Rate each as "Strong", "Adequate" or "Needs Improvement", list the
+specific issues, and give actionable suggestions (quantified achievements, action verbs,
+ATS-friendly wording). Then give an overall score from 0 to 100 and 3-5 prioritized next steps.
+
+Respond with a single JSON object and nothing else, in exactly this shape:
+{{
+  "overall_score": 0,
+  "structure": {{"name": "Structure & Formatting", "assessment": "", "issues": [], "suggestions": []}},
+  "summary": {{"name": "Professional Summary", "assessment": "", "issues": [], "suggestions": []}},
+  "experience": {{"name": "Work Experience", "assessment": "", "issues": [], "suggestions": []}},
+  "education": {{"name": "Education", "assessment": "", "issues": [], "suggestions": []}},
+  "skills": {{"name": "Skills", "assessment": "", "issues": [], "suggestions": []}},{job_match_shape}
+  "next_steps": []
+}}
+"""
+
+# Job context of STRUCTURED_REVIEW_PROMPT when the match was scored locally
+STRUCTURED_JOB_CONTEXT = """
+Job Description:
+{job_description}
+
+A keyword analysis has already compared the resume with the job description:
+- Estimated match: {match_percentage}%
+- Skills missing from the resume: {missing_skills}
+Do not recalculate these; in "job_match" only list the experience or qualifications to emphasize more.
+"""
+
+# Inserted into STRUCTURED_REVIEW_PROMPT as a format value, so braces are not doubled
+STRUCTURED_JOB_MATCH_SHAPE = """
+  "job_match": {"emphasis_points": []},"""
@@ -4,9 +4,9 @@ Streamlit UI for Resume Reviewer Agent
 
 import os
 import streamlit as st
-import anthropic
 import requests
-from utils.parser import extract_resume_text, extract_resume_sections, extract_keywords
+from utils.extraction_cache import get_extraction_cache
+from utils.export import EXPORT_FORMATS, export_feedback
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -17,105 +17,9 @@ ANTHROPIC_MODEL = os.getenv("ANTHROPIC_MODEL", "claude-3-5-sonnet-20241022")
 ANTHROPIC_MAX_TOKENS = int(os.getenv("ANTHROPIC_MAX_TOKENS", "4000"))
 
 API_URL = "http://localhost:8000/api/review"
+SESSIONS_URL = "http://localhost:8000/api/sessions"
 
 # --- Helper Functions ---
-def extract_text_from_pdf(file) -> str:
-    import PyPDF2
-    reader = PyPDF2.PdfReader(file)
-    text = ""
-    for page in reader.pages:
-        text += page.extract_text() or ""
-    return text
-
-def extract_text_from_docx(file) -> str:
-    from docx import Document
-    doc = Document(file)
-    text = ""
-    for paragraph in doc.paragraphs:
-        text += paragraph.text + "\n"
-    return text
-
-def create_feedback_docx(messages, job_title="General Review"):
-    """Create a formatted DOCX document with AI feedback only, with improved heading/bullet detection"""
-    from docx import Document
-    from docx.shared import Inches, Pt
-    from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
-    import io
-    from datetime import datetime
-    
-    doc = Document()
-    # Set document margins
-    for section in doc.sections:
-        section.top_margin = Inches(1)
-        section.bottom_margin = Inches(1)
-        section.left_margin = Inches(1)
-        section.right_margin = Inches(1)
-    # Add title
-    title = doc.add_heading('Resume Review Feedback Report', 0)
-    title.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
-    # Add subtitle with job title and date
-    subtitle = doc.add_paragraph()
-    subtitle.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
-    if job_title and job_title.strip():
-        subtitle.add_run(f"Target Position: {job_title}\n").bold = True
-    subtitle.add_run(f"Generated on: {datetime.now().strftime('%B %d, %Y at %I:%M %p')}")
-    # Add separator line
-    doc.add_paragraph("_" * 60).alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
-    doc.add_paragraph()  # Empty line
-    # Filter AI responses only (exclude system messages)
-    ai_responses = [msg for msg in messages if msg["role"] == "assistant"]
-    for i, msg in enumerate(ai_responses, 1):
-        # Add section heading
-        if i == 1:
-            doc.add_heading('📋 Initial Resume Analysis', level=1)
-        else:
-            doc.add_heading(f'💬 Follow-up Response {i-1}', level=1)
-        content = msg["content"].strip()
-        # Split content by double newlines to identify sections
-        sections = [s for s in content.split('\n\n') if s.strip()]
-        for section in sections:
-            lines = [line.strip() for line in section.split('\n') if line.strip()]
-            # If only one line and not a bullet, treat as heading
-            if len(lines) == 1:
-                line = lines[0]
-                if (not line.startswith(('•', '-', '*', '1.', '2.', '3.', '4.', '5.')) 
-                    and not line.endswith(':') 
-                    and not line.isupper()):
-                    doc.add_heading(line, level=2)
-                    continue
-            # If all lines are bullets, treat as bullet list
-            if all(l.startswith(('•', '-', '*', '1.', '2.', '3.', '4.', '5.')) for l in lines):
-                for line in lines:
-                    clean_line = line.lstrip('•-*123456789. ').strip()
-                    if clean_line:
-                        doc.add_paragraph(clean_line, style='List Bullet')
-                continue
-            # If first line is a heading, treat as heading + paragraph
-            if lines and (lines[0].endswith(':') or lines[0].isupper()):
-                doc.add_heading(lines[0].replace(':','').strip(), level=2)
-                if len(lines) > 1:
-                    doc.add_paragraph(' '.join(lines[1:]))
-                continue
-            # Otherwise, treat as paragraph
-            doc.add_paragraph(' '.join(lines))
-        # Add spacing between major sections
-        if i < len(ai_responses):
-            doc.add_paragraph()
-            doc.add_paragraph("─" * 40).alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
-            doc.add_paragraph()
-    # Add footer
-    doc.add_page_break()
-    footer_para = doc.add_paragraph()
-    footer_para.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
-    footer_run = footer_para.add_run("Generated by Resume Reviewer Agent")
-    footer_run.italic = True
-    footer_run.font.size = Pt(10)
-    # Save to bytes buffer
-    buffer = io.BytesIO()
-    doc.save(buffer)
-    buffer.seek(0)
-    return buffer.getvalue()
-
 def get_feedback_via_api(resume_text, job_title=None, messages=None):
     response = requests.post(
         API_URL,
@@ -127,8 +31,51 @@ def get_feedback_via_api(resume_text, job_title=None, messages=None):
     else:
         return f"[API Error: {response.status_code}] {response.text}", []
 
+# Reviewer instructions for chat follow-ups, stored once with the server-side session
+CHAT_INSTRUCTIONS = (
+    "You are a professional resume reviewer and writer. "
+    "For each section or feedback, provide specific, ATS-compliant rewrite suggestions. "
+    "If the user requests, rewrite the section in a way that is concise, impactful, and tailored for applicant tracking systems (ATS). "
+    "Use bullet points, quantify achievements, and use action verbs. "
+    "If the user asks for a rewrite, return only the improved text for direct copy-paste into the CV."
+)
+
+def create_chat_session(resume_text, job_title=None, messages=None):
+    """Store the resume and the chat so far (e.g. the initial review) on the server; returns the session id."""
+    response = requests.post(
+        SESSIONS_URL,
+        json={"resume_text": resume_text, "job_description": job_title or "", "instructions": CHAT_INSTRUCTIONS, "messages": messages or []},
+    )
+    response.raise_for_status()
+    return response.json()["session_id"]
+
+def stream_feedback_via_api(session_id, content, usage=None):
+    """Stream the reply to a new chat turn from the API's SSE endpoint.
+
+    Only the new turn is sent; the resume and the history live in the server-side session.
+    """
+    import json
+    with requests.post(
+        f"{SESSIONS_URL}/{session_id}/messages/stream",
+        json={"content": content},
+        stream=True,
+    ) as response:
+        response.raise_for_status()
+        event = None
+        for line in response.iter_lines(decode_unicode=True):
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+            elif line.startswith("data: "):
+                data = json.loads(line[len("data: "):])
+                if event == "analysis.delta":
+                    yield data["text"]
+                elif event == "usage" and usage is not None:
+                    usage.update(data.get("analysis", {}))
+                elif event == "error":
+                    raise RuntimeError(data.get("detail", "Streaming failed"))
+
 def reset_session():
-    for key in ["resume_text", "job_title", "messages", "initial_feedback"]:
+    for key in ["resume_text", "resume_sections", "resume_keywords", "job_title", "messages", "initial_feedback", "session_id"]:
         if key in st.session_state:
             del st.session_state[key]
 
@@ -139,9 +86,6 @@ st.markdown("""
 Upload your resume, get instant AI-powered feedback, and chat for personalized advice!
 """)
 
-# Initialize Anthropic client
-client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
-
 with st.sidebar:
     st.header("Options")
     if st.button("Start Over", use_container_width=True):
@@ -157,17 +101,22 @@ if resume_file:
     
     try:
         if resume_file.type == "application/pdf" or file_name.endswith('.pdf'):
-            resume_text = extract_text_from_pdf(resume_file)
+            parse_as = "resume.pdf"
         elif (resume_file.type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document" 
               or file_name.endswith('.docx')):
-            resume_text = extract_text_from_docx(resume_file)
-        elif file_name.endswith('.txt'):
-            resume_text = resume_file.read().decode("utf-8")
+            parse_as = "resume.docx"
         else:
-            # Fallback for other text files
-            resume_text = resume_file.read().decode("utf-8")
-        
+            # Plain text (and fallback for other text files)
+            parse_as = "resume.txt"
+
+        # Streamlit reruns the script on every interaction; the extraction cache
+        # (keyed by the file's SHA-256) makes every rerun after the first a lookup
+        extracted = get_extraction_cache().get_or_parse(resume_file.getvalue(), parse_as)
+        resume_text = extracted["text"]
+
         st.session_state["resume_text"] = resume_text
+        st.session_state["resume_sections"] = extracted["sections"]
+        st.session_state["resume_keywords"] = extracted["keywords"]
         st.subheader("📄 Resume Preview")
         st.text_area("Extracted Resume Text", resume_text, height=200)
         
@@ -184,10 +133,9 @@ if resume_file:
         with st.spinner("Analyzing your resume..."):
             feedback, history = get_feedback_via_api(resume_text, job_title)
             st.session_state["initial_feedback"] = feedback
-            st.session_state["messages"] = [
-                {"role": "system", "content": f"Resume: {resume_text}\nJob Title: {job_title}"},
-                {"role": "assistant", "content": feedback}
-            ]
+            # Kept locally for display and export; the server keeps its own copy of the history
+            st.session_state["messages"] = [{"role": "assistant", "content": feedback}]
+            st.session_state["session_id"] = create_chat_session(resume_text, job_title, st.session_state["messages"])
 
 if "initial_feedback" in st.session_state:
     st.subheader("🧠 Initial Review")
@@ -204,54 +152,52 @@ if "initial_feedback" in st.session_state:
     if user_input:
         st.session_state["messages"].append({"role": "user", "content": user_input})
         with st.spinner("Thinking..."):
-            enhanced_messages = st.session_state["messages"][:]
-            enhanced_messages.insert(0, {
-                "role": "system",
-                "content": (
-                    "You are a professional resume reviewer and writer. "
-                    "For each section or feedback, provide specific, ATS-compliant rewrite suggestions. "
-                    "If the user requests, rewrite the section in a way that is concise, impactful, and tailored for applicant tracking systems (ATS). "
-                    "Use bullet points, quantify achievements, and use action verbs. "
-                    "If the user asks for a rewrite, return only the improved text for direct copy-paste into the CV."
-                )
-            })
             # Streaming response
             response_placeholder = st.empty()
             streamed_text = ""
-            from app import get_feedback_via_api_streaming
+            usage = {}
             try:
-                for partial in get_feedback_via_api_streaming(
-                    st.session_state["resume_text"],
-                    st.session_state.get("job_title"),
-                    enhanced_messages
-                ):
+                if "session_id" not in st.session_state:
+                    # Everything before the new turn seeds the server-side history
+                    st.session_state["session_id"] = create_chat_session(
+                        st.session_state["resume_text"], st.session_state.get("job_title"), st.session_state["messages"][:-1]
+                    )
+                for partial in stream_feedback_via_api(st.session_state["session_id"], user_input, usage=usage):
                     streamed_text += partial  
                     response_placeholder.markdown(streamed_text)
                 st.session_state["messages"].append({"role": "assistant", "content": streamed_text})
                 st.chat_message("assistant").write(streamed_text)
+                if usage:
+                    st.caption(
+                        f"Prompt cache: {usage['cache_read_input_tokens']} tokens read, "
+                        f"{usage['cache_creation_input_tokens']} written, {usage['input_tokens']} uncached"
+                    )
             except Exception as e:
-                st.error(f"❌ Streaming failed: {str(e)}. Please check your Anthropic API key and network connection.")
+                st.error(f"❌ Streaming failed: {str(e)}. Please check that the API server is running and your Anthropic API key is set.")
 
     # --- Export Feedback ---
     st.markdown("---")
-    if st.button("📄 Export Feedback as DOCX", use_container_width=True):
+    export_format = st.selectbox("Export format", ["docx", "pdf", "html", "markdown"],
+                                 format_func=lambda f: {"docx": "Word (DOCX)", "pdf": "PDF", "html": "HTML", "markdown": "Markdown"}[f])
+    if st.button("📄 Export Feedback", use_container_width=True):
         try:
-            # Use the sophisticated helper function to create formatted DOCX
-            docx_data = create_feedback_docx(
+            # Messages are parsed once and the DOCX is cloned from a cached base template (utils/export.py)
+            data = export_feedback(
                 st.session_state["messages"], 
-                st.session_state.get("job_title", "General Review")
+                st.session_state.get("job_title", "General Review"),
+                export_format
             )
             
             # Generate filename with timestamp
             from datetime import datetime
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"resume_feedback_{timestamp}.docx"
+            filename = f"resume_feedback_{timestamp}.{EXPORT_FORMATS[export_format][2]}"
             
             st.download_button(
                 label="💾 Download Feedback Report",
-                data=docx_data,
+                data=data,
                 file_name=filename,
-                mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+                mime=EXPORT_FORMATS[export_format][1],
                 use_container_width=True
             )
             
@@ -259,4 +205,4 @@ if "initial_feedback" in st.session_state:
             
         except Exception as e:
             st.error(f"❌ Error creating document: {str(e)}")
-            st.info("💡 Make sure you have python-docx installed: `pip install python-docx`")
+            st.info("💡 Make sure the export libraries are installed: `pip install python-docx reportlab`")
@@ -0,0 +1,19 @@
+import os
+import sys
+import tempfile
+
+# Services read their configuration when first constructed: keep every shared store in a
+# scratch directory and the response cache / near-duplicate reuse out of the way
+_scratch = tempfile.mkdtemp(prefix="resume-reviewer-tests-")
+os.environ.setdefault("ANTHROPIC_API_KEY", "test-key")
+os.environ.update({
+    "LLM_CACHE_ENABLED": "false",
+    "NEAR_DUP_ENABLED": "false",
+    "LLM_CACHE_PATH": os.path.join(_scratch, "llm_responses.sqlite3"),
+    "NEAR_DUP_PATH": os.path.join(_scratch, "near_duplicates.sqlite3"),
+    "LLM_RATE_LIMIT_PATH": os.path.join(_scratch, "rate_limits.sqlite3"),
+    "SESSIONS_DB_PATH": os.path.join(_scratch, "sessions.sqlite3"),
+    "JOBS_DB_PATH": os.path.join(_scratch, "jobs.sqlite3"),
+})
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,92 @@
+import json
+import time
+from types import SimpleNamespace
+
+from api.async_service import AsyncResumeReviewService
+from api.service import ResumeReviewService
+from utils.conversation import ConversationWindow, SUMMARY_HEADER, message_tokens
+
+LONG = "word " * 100
+
+
+def chat(turns, content=LONG):
+    return [{"role": "system", "content": "resume"}] + [
+        {"role": "user" if i % 2 == 0 else "assistant", "content": content} for i in range(turns)
+    ]
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_history_within_budget_is_sent_unchanged():
+    window = ConversationWindow(lambda previous, messages: "summary", max_tokens=10_000, keep_turns=2)
+    messages = chat(6, "short")
+    assert window.prepare(messages) is messages
+
+
+def test_long_chat_is_cut_on_a_turn_boundary_and_summarized():
+    folded = []
+
+    def summarize(previous, messages):
+        folded.append(messages)
+        return "earlier turns"
+
+    window = ConversationWindow(summarize, max_tokens=500, keep_turns=2)
+    messages = chat(10)
+    first = window.prepare(messages)
+    # Until the summary is built, older turns are represented by an extract
+    assert first[1]["content"].startswith(SUMMARY_HEADER)
+    assert first[2]["role"] == "user"
+    wait_for(lambda: window.summaries_built)
+    second = window.prepare(messages)
+    assert second[1]["content"] == f"{SUMMARY_HEADER}\nearlier turns"
+    assert second[2:] == first[2:]
+    assert len(folded) == 1
+
+
+def test_short_chat_over_budget_is_still_cut():
+    window = ConversationWindow(lambda previous, messages: "summary", max_tokens=200, keep_turns=4)
+    prepared = window.prepare(chat(5))
+    recent = [m for m in prepared if m["role"] != "system"]
+    assert recent[0]["role"] == "user"
+    assert sum(message_tokens(m) for m in recent) <= 200
+
+
+class StubGateway:
+    def __init__(self):
+        self.requests = []
+
+    def create(self, request):
+        self.requests.append(request)
+        return SimpleNamespace(content=[SimpleNamespace(text="rolling summary")], usage=None)
+
+
+def test_async_service_builds_summaries_with_the_blocking_path():
+    service = AsyncResumeReviewService(api_key="test-key")
+    service.gateway = StubGateway()
+    summary = service._summarize_conversation(None, [{"role": "user", "content": "How do I quantify impact?"}])
+    assert summary == "rolling summary"
+    assert "How do I quantify impact?" in service.gateway.requests[0]["messages"][0]["content"]
+
+
+def test_cached_prefix_is_unchanged_when_the_summary_changes():
+    summaries = iter(["first summary", "second summary", "third summary"])
+    window = ConversationWindow(lambda previous, messages: next(summaries), max_tokens=500, keep_turns=2)
+    service = ResumeReviewService(api_key="test-key")
+    cached_blocks = []
+    summary_blocks = []
+    for turns in (9, 13, 17):
+        messages = chat(turns)
+        for _ in range(2):
+            # Before and after the background summary for this boundary is ready
+            request = service.build_request("", messages=window.prepare(messages), cache_prefix=True)
+            cached_blocks.append(json.dumps(request["system"][0]))
+            summary_blocks.append(request["system"][1])
+            wait_for(lambda: not window._pending)
+    assert len(set(cached_blocks)) == 1
+    assert "cache_control" in json.loads(cached_blocks[0])
+    assert len({block["text"] for block in summary_blocks}) > 1
+    assert all("cache_control" not in block and block["text"].startswith(SUMMARY_HEADER) for block in summary_blocks)
@@ -0,0 +1,70 @@
+import time
+
+import pytest
+
+from api.jobs import JOB_FAILED, JOB_QUEUED, JOB_RUNNING, JOB_SUCCEEDED, JobStore
+from utils.llm_limits import LLMCircuitOpenError, LLMOverloadedError, LLMRequestError
+from worker import is_retryable
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(path=str(tmp_path / "jobs.sqlite3"), visibility_timeout=60, max_attempts=2)
+
+
+def test_claimed_job_completes(store):
+    job_id = store.enqueue({"resume_text": "..."})
+    job = store.claim("worker-1")
+    assert job["id"] == job_id and job["status"] == JOB_RUNNING and job["attempts"] == 1
+    # Leased jobs are invisible to other workers
+    assert store.claim("worker-2") is None
+    assert store.heartbeat(job_id, "worker-1")
+    assert not store.heartbeat(job_id, "worker-2")
+    store.complete(job_id, "worker-1", {"report": "ok"})
+    job = store.get(job_id)
+    assert job["status"] == JOB_SUCCEEDED and job["result"] == {"report": "ok"}
+
+
+def test_expired_lease_is_claimed_again_until_attempts_run_out(store):
+    store.visibility_timeout = 0.01
+    job_id = store.enqueue({})
+    store.claim("crashed-1")
+    time.sleep(0.02)
+    assert store.claim("worker-2")["attempts"] == 2
+    time.sleep(0.02)
+    assert store.claim("worker-3") is None
+    job = store.get(job_id)
+    assert job["status"] == JOB_FAILED and "lease expired" in job["error"]
+
+
+def test_retryable_failure_is_requeued_with_backoff(store):
+    job_id = store.enqueue({})
+    store.claim("worker-1")
+    store.fail(job_id, "worker-1", "overloaded", retry_delay=60)
+    job = store.get(job_id)
+    assert job["status"] == JOB_QUEUED and job["available_at"] > time.time() + 30
+    assert store.claim("worker-1") is None
+
+
+def test_last_attempt_failure_is_final(store):
+    job_id = store.enqueue({})
+    for _ in range(2):
+        store.claim("worker-1")
+        store.fail(job_id, "worker-1", "overloaded", retry_delay=0)
+    assert store.get(job_id)["status"] == JOB_FAILED
+
+
+def test_non_retryable_failure_is_final_at_once(store):
+    job_id = store.enqueue({})
+    store.claim("worker-1")
+    store.fail(job_id, "worker-1", "bad request", retry_delay=0, retryable=False)
+    job = store.get(job_id)
+    assert job["status"] == JOB_FAILED and job["attempts"] == 1
+
+
+def test_worker_classifies_errors():
+    assert is_retryable(LLMOverloadedError("529"))
+    assert is_retryable(LLMCircuitOpenError("open"))
+    assert not is_retryable(LLMRequestError("400"))
+    assert not is_retryable(ValueError("Unsupported file format"))
+    assert is_retryable(OSError("disk busy"))
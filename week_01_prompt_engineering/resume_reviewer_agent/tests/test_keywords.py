@@ -0,0 +1,26 @@
+import shutil
+
+import pytest
+
+from utils.keywords import VOCABULARY_PATH, StaleIndexError, build_index, load_index
+
+
+def test_built_index_matches_the_in_memory_one(tmp_path):
+    out = tmp_path / "v1"
+    built = build_index(str(out))
+    # Rebuilding swaps the directory in place
+    rebuilt = build_index(str(out))
+    text = "Senior Python developer with Kubernetes, AWS and machine learning experience"
+    assert built.score_batch([text]) == rebuilt.score_batch([text]) == load_index(str(out)).score_batch([text])
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["v1"]
+
+
+def test_stale_index_fails_loudly(tmp_path):
+    source = tmp_path / "vocabulary.tsv"
+    shutil.copy(VOCABULARY_PATH, source)
+    out = str(tmp_path / "v1")
+    build_index(out, str(source))
+    with open(source, "a", encoding="utf-8") as f:
+        f.write("zig\tskill\t10\n")
+    with pytest.raises(StaleIndexError):
+        load_index(out, str(source))
@@ -0,0 +1,74 @@
+import anthropic
+import pytest
+from starlette.testclient import TestClient
+
+from benchmarks.fake_anthropic import FakeBackend, create_app
+from utils.llm_gateway import LLMGateway
+from utils.llm_limits import (CircuitBreaker, LLMCircuitOpenError, LLMOverloadedError, LLMRequestError,
+                              RateLimiter)
+
+REQUEST = {"model": "fake-model", "max_tokens": 100, "system": "You review resumes.",
+           "messages": [{"role": "user", "content": "Review this resume"}]}
+
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    monkeypatch.setenv("LLM_BACKOFF_BASE", "0.001")
+
+
+def fake_gateway(max_retries=2, threshold=5, **backend_options):
+    """A gateway whose SDK client talks to the fake Messages API in-process."""
+    backend = FakeBackend(responses=[{"match": "", "text": "Looks good."}], **backend_options)
+    gateway = LLMGateway(api_key="test-key", max_retries=max_retries)
+    gateway.limiter = RateLimiter(rpm=0, tpm=0, path="")
+    gateway.breaker = CircuitBreaker(threshold=threshold, cooldown=60)
+    http_client = TestClient(create_app(backend), base_url="http://fake-anthropic")
+    gateway._client = anthropic.Anthropic(api_key="test-key", base_url="http://fake-anthropic",
+                                          http_client=http_client, max_retries=0)
+    return gateway, backend
+
+
+def test_create_returns_the_response():
+    gateway, backend = fake_gateway()
+    response = gateway.create(REQUEST)
+    assert response.content[0].text == "Looks good."
+    assert backend.requests == 1
+    assert gateway.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_overloaded_calls_are_retried_until_attempts_run_out():
+    gateway, backend = fake_gateway(max_retries=2, error_rate=1.0, error_statuses=(529,))
+    with pytest.raises(LLMOverloadedError):
+        gateway.create(REQUEST)
+    assert backend.requests == 3
+    assert gateway.breaker.failures == 3
+
+
+def test_rejected_requests_are_not_retried():
+    gateway, backend = fake_gateway(error_rate=1.0, error_statuses=(400,))
+    with pytest.raises(LLMRequestError):
+        gateway.create(REQUEST)
+    assert backend.requests == 1
+    # The provider answered, so it counts as up
+    assert gateway.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_breaker_opens_and_short_circuits_later_calls():
+    gateway, backend = fake_gateway(max_retries=1, threshold=2, error_rate=1.0, error_statuses=(500,))
+    with pytest.raises(LLMOverloadedError):
+        gateway.create(REQUEST)
+    assert gateway.breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(LLMCircuitOpenError):
+        gateway.create(REQUEST)
+    assert backend.requests == 2
+    assert gateway.breaker.rejected == 1
+
+
+def test_stream_yields_deltas_then_the_final_message():
+    gateway, backend = fake_gateway(chunk_tokens=1)
+    events = list(gateway.stream(REQUEST))
+    kinds = [kind for kind, _ in events]
+    assert kinds[-1] == "message" and set(kinds[:-1]) == {"delta"}
+    assert "".join(text for kind, text in events[:-1]) == "Looks good."
+    assert events[-1][1].usage.output_tokens > 0
+    assert backend.streams == 1
@@ -0,0 +1,64 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.near_duplicates import NearDuplicateIndex
+
+RESUME = "Senior Python engineer with ten years of experience building distributed systems and data pipelines"
+
+
+def index(path="", **options):
+    return NearDuplicateIndex(path=path, enabled=True, **options)
+
+
+def test_near_identical_resume_is_found():
+    near = index()
+    entry_id = near.insert(near.signature(RESUME), {"analysis": "review"}, "backend engineer")
+    match = near.query(near.signature(RESUME + "."), "backend engineer")
+    assert match is not None and match[0] == entry_id
+    assert near.payload(entry_id) == {"analysis": "review"}
+    assert near.query(near.signature(RESUME), "data scientist") is None
+
+
+def test_only_the_newest_entries_are_kept(tmp_path):
+    near = index(str(tmp_path / "near.sqlite3"), max_entries=2)
+    signatures = [near.signature(f"{RESUME} variant {i} with extra words {i} {i * 7}") for i in range(3)]
+    for i, signature in enumerate(signatures):
+        near.insert(signature, {"i": i})
+    assert near.query(signatures[0]) is None
+    assert near.query(signatures[2]) is not None
+    assert near.stats()["entries"] == 2
+    # A fresh process only loads what is left in the store
+    assert index(str(tmp_path / "near.sqlite3"), max_entries=2).stats()["entries"] == 2
+
+
+def test_entries_expire(tmp_path):
+    near = index(str(tmp_path / "near.sqlite3"), ttl=0.05)
+    signature = near.signature(RESUME)
+    near.insert(signature, {"analysis": "old"})
+    time.sleep(0.06)
+    assert near.query(signature) is None
+    assert near.stats()["expired"] == 1
+
+
+def test_store_is_cleared_when_the_banding_changes(tmp_path):
+    path = str(tmp_path / "near.sqlite3")
+    near = index(path, threshold=0.9)
+    near.insert(near.signature(RESUME), {})
+    assert index(path, threshold=0.9).stats()["entries"] == 1
+    assert index(path, threshold=0.5).stats()["entries"] == 0
+
+
+def test_concurrent_in_memory_inserts_get_distinct_ids():
+    class SlowIndex(NearDuplicateIndex):
+        def _add(self, *args):
+            # Widen the window between allocating an id and indexing the entry
+            time.sleep(0.001)
+            super()._add(*args)
+
+    near = SlowIndex(path="", enabled=True)
+    signatures = [near.signature(f"{RESUME} candidate {i} {i * 13} {i * 31}") for i in range(200)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        ids = list(pool.map(lambda i: near.insert(signatures[i], {"i": i}), range(200)))
+    assert len(set(ids)) == 200
+    assert near.stats()["entries"] == 200
+    assert all(near.payload(entry_id) == {"i": i} for i, entry_id in enumerate(ids))
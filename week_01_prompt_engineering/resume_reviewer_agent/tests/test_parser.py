@@ -0,0 +1,53 @@
+import time
+
+from utils.parser import SECTION_NAMES, extract_resume_sections, find_section_spans
+
+RESUME = """Jane Doe
+jane@example.com
+
+PROFESSIONAL SUMMARY
+Backend engineer with 8 years of experience.
+
+## Work Experience
+Acme Corp - Senior Engineer
+- Cut p99 latency by 40%
+
+Education:
+BSc Computer Science
+
+Skills: Python, Go, PostgreSQL
+
+Projects
+Open-source resume parser
+"""
+
+
+def test_sections_are_split_on_headers():
+    sections = extract_resume_sections(RESUME)
+    assert sections["contact_info"] == "Jane Doe\njane@example.com"
+    assert sections["summary"] == "Backend engineer with 8 years of experience."
+    assert sections["experience"] == "Acme Corp - Senior Engineer\n- Cut p99 latency by 40%"
+    assert sections["education"] == "BSc Computer Science"
+    # Inline content after "Header:" belongs to that section
+    assert sections["skills"] == "Python, Go, PostgreSQL"
+    # "other" sections keep their header as a label
+    assert sections["other"] == "Projects\nOpen-source resume parser"
+    assert list(sections) == list(SECTION_NAMES)
+
+
+def test_header_words_inside_sentences_do_not_start_sections():
+    text = "Summary\nI led the skills program and my experience spans ten years."
+    assert [span.name for span in find_section_spans(text)] == ["contact_info", "summary"]
+
+
+def test_text_without_headers_is_kept_whole():
+    sections = extract_resume_sections("Just a paragraph about me.")
+    assert sections["other"] == "Just a paragraph about me."
+    assert sections["experience"] == ""
+
+
+def test_pathological_lines_are_rejected_quickly():
+    text = ("#" * 20000 + " skills and") * 5 + "\n"
+    started = time.perf_counter()
+    extract_resume_sections(text)
+    assert time.perf_counter() - started < 1.0
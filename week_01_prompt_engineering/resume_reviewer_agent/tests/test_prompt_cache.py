@@ -0,0 +1,44 @@
+from api.service import ResumeReviewService
+from utils.prompt_cache import CACHE_CONTROL, mark_history_breakpoint, usage_to_dict
+
+CHAT = [
+    {"role": "system", "content": "Reviewer instructions\n\nResume text"},
+    {"role": "user", "content": "How is my summary?"},
+    {"role": "assistant", "content": "It is generic."},
+    {"role": "user", "content": "Rewrite it"},
+]
+
+
+def test_cached_request_marks_the_system_prompt_and_the_history_before_the_new_turn():
+    request = ResumeReviewService(api_key="test-key").build_request("", messages=CHAT, cache_prefix=True)
+    assert request["system"] == [{"type": "text", "text": "Reviewer instructions\n\nResume text",
+                                  "cache_control": CACHE_CONTROL}]
+    assert [m["role"] for m in request["messages"]] == ["user", "assistant", "user"]
+    assert request["messages"][1]["content"] == [{"type": "text", "text": "It is generic.",
+                                                  "cache_control": CACHE_CONTROL}]
+    # The new turn is what changes between calls; it stays outside the cached prefix
+    assert request["messages"][2]["content"] == "Rewrite it"
+
+
+def test_uncached_request_is_left_plain():
+    request = ResumeReviewService(api_key="test-key").build_request("", messages=CHAT)
+    assert request["system"] == "Reviewer instructions\n\nResume text"
+    assert request["messages"] == CHAT[1:]
+
+
+def test_breakpoint_does_not_touch_the_input():
+    messages = [{"role": "user", "content": [{"type": "text", "text": "a"}]}, {"role": "user", "content": "b"}]
+    marked = mark_history_breakpoint(messages)
+    assert marked[0]["content"][0]["cache_control"] == CACHE_CONTROL
+    assert "cache_control" not in messages[0]["content"][0]
+    assert mark_history_breakpoint(messages[:1]) == messages[:1]
+
+
+def test_usage_reports_cache_reads_and_writes():
+    class Usage:
+        input_tokens, output_tokens = 12, 30
+        cache_creation_input_tokens, cache_read_input_tokens = None, 900
+
+    assert usage_to_dict(Usage()) == {"input_tokens": 12, "output_tokens": 30,
+                                      "cache_creation_input_tokens": 0, "cache_read_input_tokens": 900}
+    assert usage_to_dict(None)["input_tokens"] == 0
@@ -0,0 +1,112 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+from api.service import ResumeReviewService
+from utils.llm_cache import bypass_cache
+from utils.single_flight import SingleFlight
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+
+def test_concurrent_calls_share_one_execution():
+    flights = SingleFlight(enabled=True)
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        release.wait(2)
+        return "result"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flights.do("key", slow))) for _ in range(3)]
+    threads[0].start()
+    wait_for(lambda: calls)
+    for thread in threads[1:]:
+        thread.start()
+    wait_for(lambda: flights.coalesced == 2)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False, True, True]
+    assert all(result == "result" for result, _ in results)
+
+
+def test_errors_reach_every_waiter_and_the_key_is_released():
+    flights = SingleFlight(enabled=True)
+
+    async def main():
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        outcomes = await asyncio.gather(flights.ado("key", fail), flights.ado("key", fail), return_exceptions=True)
+        assert all(isinstance(outcome, ValueError) for outcome in outcomes)
+
+        async def succeed():
+            return "ok"
+
+        return await flights.ado("key", succeed)
+
+    assert asyncio.run(main()) == ("ok", False)
+    assert flights.issued == 2 and flights.coalesced == 1
+
+
+def test_late_stream_subscribers_get_the_prefix_replayed():
+    flights = SingleFlight(enabled=True)
+    started = []
+
+    async def upstream():
+        started.append(1)
+        for chunk in ("a", "b", "c"):
+            yield chunk
+            await asyncio.sleep(0.01)
+
+    async def main():
+        first, shared_first = flights.subscribe("key", upstream)
+        seen = [await first.__anext__()]
+        await asyncio.sleep(0.015)
+        second, shared_second = flights.subscribe("key", upstream)
+        seen += [chunk async for chunk in first]
+        return seen, [chunk async for chunk in second], shared_first, shared_second
+
+    first, second, shared_first, shared_second = asyncio.run(main())
+    assert first == second == ["a", "b", "c"]
+    assert (shared_first, shared_second) == (False, True)
+    assert len(started) == 1
+
+
+class BlockingGateway:
+    def __init__(self, callers):
+        self.calls = 0
+        self.arrived = threading.Barrier(callers, timeout=2)
+
+    def create(self, request):
+        self.calls += 1
+        # Only returns once every caller is inside its own upstream call
+        self.arrived.wait()
+        return SimpleNamespace(content=[SimpleNamespace(text="fresh")], usage=None)
+
+
+def test_bypassed_calls_are_never_coalesced():
+    service = ResumeReviewService(api_key="test-key")
+    service.gateway = BlockingGateway(callers=2)
+
+    def call():
+        with bypass_cache():
+            service.call_llm_with_usage("Review this resume")
+
+    threads = [threading.Thread(target=call) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert service.gateway.calls == 2
+    assert not service.gateway.arrived.broken
@@ -0,0 +1,57 @@
+import hashlib
+import io
+
+from fastapi import FastAPI, File, UploadFile
+from starlette.testclient import TestClient
+
+from utils.extraction_cache import source_hash
+from utils.uploads import UploadLimitMiddleware
+
+
+def upload_app(max_bytes):
+    app = FastAPI()
+    app.add_middleware(UploadLimitMiddleware, max_bytes=max_bytes)
+    reached = []
+
+    @app.post("/upload")
+    async def upload(resume: UploadFile = File(...)):
+        reached.append(resume.filename)
+        return {"size": len(resume.file.read())}
+
+    return TestClient(app), reached
+
+
+def test_upload_within_the_limit_reaches_the_route():
+    client, reached = upload_app(max_bytes=1024)
+    response = client.post("/upload", files={"resume": ("cv.txt", b"x" * 1000)})
+    assert response.status_code == 200 and response.json() == {"size": 1000}
+    assert reached == ["cv.txt"]
+
+
+def test_declared_oversize_upload_is_rejected_before_the_route():
+    client, reached = upload_app(max_bytes=1024)
+    response = client.post("/upload", files={"resume": ("cv.txt", b"x" * 200_000)})
+    assert response.status_code == 413
+    assert reached == []
+
+
+def test_chunked_oversize_upload_is_cut_off():
+    client, reached = upload_app(max_bytes=1024)
+    body = b"--b\r\nContent-Disposition: form-data; name=\"resume\"; filename=\"cv.txt\"\r\n\r\n" + b"x" * 200_000 + b"\r\n--b--\r\n"
+
+    def chunks():
+        for start in range(0, len(body), 8192):
+            yield body[start:start + 8192]
+
+    response = client.post("/upload", content=chunks(), headers={"content-type": "multipart/form-data; boundary=b"})
+    assert response.status_code == 413
+    assert reached == []
+
+
+def test_file_sources_are_hashed_in_place():
+    data = b"resume bytes" * 10_000
+    f = io.BytesIO(data)
+    f.seek(100)
+    assert source_hash(f) == hashlib.sha256(data).hexdigest()
+    # Rewound for the parser
+    assert f.tell() == 0
@@ -0,0 +1,206 @@
+"""
+Conversation Window
+
+This module keeps chat requests within a token budget. System messages (which carry
+the resume and the target job title) are always kept, the last K turns are sent
+verbatim, and older turns are replaced by a running summary. If the recent turns alone
+are over the budget (or the chat is too short for a K-turn boundary), the cut moves up
+to the oldest user turn whose suffix still fits. Summaries are produced
+incrementally in a background thread, off the request path; until one is ready the
+older turns are represented by a short extract, so every request stays bounded. The
+summary is flagged ``UNCACHED`` so it is sent after the cached resume prefix and a
+new summary never invalidates that prefix.
+"""
+
+import os
+import re
+import json
+import math
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from utils.llm_cache import MemoryLRUCache
+from utils.prompt_cache import UNCACHED, split_system_messages
+
+logger = logging.getLogger("resume_reviewer")
+
+# (previous summary or None, messages to fold in) -> new summary
+Summarizer = Callable[[Optional[str], List[Dict[str, Any]]], Optional[str]]
+
+SUMMARY_HEADER = "Summary of the earlier conversation:"
+EXTRACT_CHARS = 300
+
+_PIECE_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the token count of a text locally (no API call).
+
+    Words cost about one token per four characters and every punctuation mark counts
+    as one, which tracks Claude's tokenizer closely enough for budgeting.
+    """
+    return sum(math.ceil(len(piece) / 4) for piece in _PIECE_RE.findall(text))
+
+
+def _content_text(content: Any) -> str:
+    if isinstance(content, str):
+        return content
+    return "".join(block.get("text", "") for block in content if isinstance(block, dict))
+
+
+def message_tokens(message: Dict[str, Any]) -> int:
+    # A few tokens of per-message overhead for the role and separators
+    return estimate_tokens(_content_text(message.get("content", ""))) + 4
+
+
+def _digest(messages: List[Dict[str, Any]]) -> str:
+    canonical = json.dumps([(m["role"], _content_text(m["content"])) for m in messages], ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ConversationWindow:
+    """Fits a chat history into a token budget with a rolling summary of older turns."""
+
+    def __init__(
+        self,
+        summarize: Optional[Summarizer] = None,
+        max_tokens: Optional[int] = None,
+        keep_turns: Optional[int] = None,
+        max_summaries: int = 512,
+    ):
+        """Initialize the window.
+
+        Args:
+            summarize: Produces a summary from (previous summary, newer messages); run in the background.
+            max_tokens: Budget for the user/assistant history (``CONVERSATION_MAX_TOKENS``).
+            keep_turns: Recent user/assistant turns always sent verbatim (``CONVERSATION_KEEP_TURNS``).
+            max_summaries: Summaries kept in memory.
+        """
+        self.summarize = summarize
+        self.max_tokens = max_tokens or int(os.getenv("CONVERSATION_MAX_TOKENS", "8000"))
+        self.keep_turns = keep_turns or int(os.getenv("CONVERSATION_KEEP_TURNS", "4"))
+        self.summaries = MemoryLRUCache(max_entries=max_summaries, ttl=float("inf"))
+        self._pending: Set[str] = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="conversation-summary")
+        self.summaries_built = 0
+        self.summary_misses = 0
+
+    def _cut_points(self, chat: List[Dict[str, Any]]) -> List[int]:
+        """Boundaries between summarized and verbatim messages, newest first.
+
+        Cuts fall on multiples of the verbatim window so the summarized prefix (and so
+        the summary and the provider's prompt-cache prefix) only changes every K turns.
+        """
+        step = 2 * self.keep_turns
+        cut = ((len(chat) - step) // step) * step
+        cuts = []
+        while cut > 0:
+            # The verbatim part has to start with a user message
+            adjusted = cut
+            while adjusted > 0 and chat[adjusted]["role"] != "user":
+                adjusted -= 1
+            if adjusted > 0 and (not cuts or adjusted < cuts[-1]):
+                cuts.append(adjusted)
+            cut -= step
+        return cuts
+
+    def _fitting_cut(self, chat: List[Dict[str, Any]]) -> int:
+        """Earliest user message from which the rest of the chat fits the budget (the newest one if none does)."""
+        total = 0
+        cut = 0
+        for index in range(len(chat) - 1, -1, -1):
+            total += message_tokens(chat[index])
+            if total > self.max_tokens and cut:
+                break
+            if chat[index]["role"] == "user":
+                cut = index
+        return cut
+
+    def _schedule(self, chat: List[Dict[str, Any]], cut: int, previous_cut: int) -> None:
+        key = _digest(chat[:cut])
+        with self._lock:
+            if self.summarize is None or key in self._pending:
+                return
+            self._pending.add(key)
+        previous = self.summaries.get(_digest(chat[:previous_cut])) if previous_cut else None
+        # Fold only the new messages into the previous summary; otherwise summarize the whole prefix
+        start = previous_cut if previous is not None else 0
+        messages = [dict(m) for m in chat[start:cut]]
+
+        def run():
+            try:
+                summary = self.summarize(previous, messages)
+                if summary:
+                    self.summaries.set(key, summary)
+                    with self._lock:
+                        self.summaries_built += 1
+            except Exception as e:
+                logger.warning(f"Conversation summary failed: {e}")
+            finally:
+                with self._lock:
+                    self._pending.discard(key)
+
+        self._executor.submit(run)
+
+    @staticmethod
+    def _extract(messages: List[Dict[str, Any]]) -> str:
+        lines = []
+        for m in messages:
+            text = " ".join(_content_text(m["content"]).split())
+            lines.append(f"{m['role']}: {text[:EXTRACT_CHARS]}{'...' if len(text) > EXTRACT_CHARS else ''}")
+        return "\n".join(lines)
+
+    def prepare(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Return the messages to send for this turn.
+
+        Args:
+            messages: Full chat history (system, user and assistant messages)
+
+        Returns:
+            System messages, an optional summary system message (flagged ``UNCACHED``),
+            and the recent turns
+        """
+        system_parts, chat = split_system_messages(messages)
+        if sum(message_tokens(m) for m in chat) <= self.max_tokens:
+            return messages
+        cuts = self._cut_points(chat)
+        fit = self._fitting_cut(chat)
+        if not cuts or cuts[0] < fit:
+            # Budget first: cut later than the K-turn boundary when that's what it takes
+            cuts.insert(0, fit)
+        cut = cuts[0]
+        if cut == 0:
+            # A single user turn over the budget; nothing older to summarize
+            return messages
+
+        summary = self.summaries.get(_digest(chat[:cut]))
+        if summary is None:
+            self.summary_misses += 1
+            # Build this boundary's summary in the background from the newest older one
+            earlier = next((c for c in cuts[1:] if self.summaries.get(_digest(chat[:c])) is not None), 0)
+            self._schedule(chat, cut, earlier)
+            previous = self.summaries.get(_digest(chat[:earlier])) if earlier else None
+            # Meanwhile: the older summary plus a short extract of what it doesn't cover
+            gap = chat[earlier:cut][-2 * self.keep_turns:]
+            summary = "\n".join(part for part in (previous, self._extract(gap)) if part)
+
+        recent = chat[cut:]
+        window = [{"role": "system", "content": part} for part in system_parts]
+        window.append({"role": "system", "content": f"{SUMMARY_HEADER}\n{summary}", UNCACHED: True})
+        return window + recent
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_tokens": self.max_tokens,
+            "keep_turns": self.keep_turns,
+            "summaries": len(self.summaries),
+            "summaries_built": self.summaries_built,
+            "summary_misses": self.summary_misses,
+            "pending": len(self._pending),
+        }
@@ -0,0 +1,386 @@
+"""
+Feedback Export
+
+This module exports review conversations as DOCX, PDF, HTML or Markdown. Each
+message is parsed once into a list of blocks (headings, bullets, paragraphs), which
+every format renders from; DOCX documents are cloned from a pre-built base template
+instead of setting up styles and margins per export. Many reports can be exported
+as one zip archive that is streamed entry by entry.
+"""
+
+import io
+import re
+import html
+import zipfile
+import threading
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from utils.metrics import timed
+
+REPORT_TITLE = "Resume Review Feedback Report"
+FOOTER_TEXT = "Generated by Resume Reviewer Agent"
+
+# Block kinds
+HEADING1 = "heading1"
+HEADING2 = "heading2"
+BULLET = "bullet"
+PARAGRAPH = "paragraph"
+RULE = "rule"
+
+_BULLET_RE = re.compile(r"^(?:[•\-*]|\d+\.)\s*")
+_MD_HEADING_RE = re.compile(r"^#{1,6}\s+")
+_FILENAME_RE = re.compile(r"[^\w\-.]+")
+
+
+class Block(NamedTuple):
+    kind: str
+    text: str = ""
+
+
+@lru_cache(maxsize=1024)
+def parse_blocks(content: str) -> Tuple[Block, ...]:
+    """
+    Parse one message into blocks.
+
+    Paragraphs are separated by blank lines. A lone line that isn't a bullet, doesn't
+    end with a colon and isn't all caps is a heading; a paragraph of bullets is a
+    list; a first line ending with a colon (or in caps) heads the rest. Results are
+    memoized, so a message is parsed once however often it is exported.
+
+    Args:
+        content: Message text (plain text or simple markdown)
+
+    Returns:
+        Tuple of blocks
+    """
+    blocks: List[Block] = []
+    for paragraph in content.strip().split("\n\n"):
+        lines = [line.strip() for line in paragraph.split("\n") if line.strip()]
+        if not lines:
+            continue
+        bullets = [_BULLET_RE.match(line) for line in lines]
+        if len(lines) == 1 and not bullets[0]:
+            line = lines[0]
+            if _MD_HEADING_RE.match(line) or not (line.endswith(":") or line.isupper()):
+                blocks.append(Block(HEADING2, _MD_HEADING_RE.sub("", line)))
+                continue
+        if all(bullets):
+            for line, match in zip(lines, bullets):
+                text = line[match.end():].strip()
+                if text:
+                    blocks.append(Block(BULLET, text))
+            continue
+        if lines[0].endswith(":") or lines[0].isupper():
+            blocks.append(Block(HEADING2, lines[0].replace(":", "").strip()))
+            if len(lines) > 1:
+                blocks.append(Block(PARAGRAPH, " ".join(lines[1:])))
+            continue
+        blocks.append(Block(PARAGRAPH, " ".join(lines)))
+    return tuple(blocks)
+
+
+def conversation_blocks(messages: List[Dict[str, Any]]) -> List[Block]:
+    """
+    Turn a conversation into report blocks: one titled part per assistant message.
+
+    Args:
+        messages: Chat messages; only assistant messages are exported
+
+    Returns:
+        List of blocks
+    """
+    replies = [m["content"] for m in messages if m["role"] == "assistant"]
+    blocks: List[Block] = []
+    for i, content in enumerate(replies, 1):
+        blocks.append(Block(HEADING1, "📋 Initial Resume Analysis" if i == 1 else f"💬 Follow-up Response {i - 1}"))
+        blocks.extend(parse_blocks(content))
+        if i < len(replies):
+            blocks.append(Block(RULE))
+    return blocks
+
+
+def _subtitle(job_title: Optional[str], generated_at: datetime) -> List[str]:
+    lines = []
+    if job_title and job_title.strip():
+        lines.append(f"Target Position: {job_title}")
+    lines.append(f"Generated on: {generated_at.strftime('%B %d, %Y at %I:%M %p')}")
+    return lines
+
+
+# --- DOCX ------------------------------------------------------------------------
+
+_template: Optional[bytes] = None
+_template_lock = threading.Lock()
+
+
+def _docx_template() -> bytes:
+    """Serialized empty document with the report's margins; built once per process."""
+    global _template
+    if _template is None:
+        with _template_lock:
+            if _template is None:
+                from docx import Document
+                from docx.shared import Inches
+
+                doc = Document()
+                for section in doc.sections:
+                    section.top_margin = Inches(1)
+                    section.bottom_margin = Inches(1)
+                    section.left_margin = Inches(1)
+                    section.right_margin = Inches(1)
+                buffer = io.BytesIO()
+                doc.save(buffer)
+                _template = buffer.getvalue()
+    return _template
+
+
+def render_docx(blocks: List[Block], job_title: Optional[str], generated_at: datetime) -> bytes:
+    from docx import Document
+    from docx.shared import Pt
+    from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
+
+    # Loading the template is a zip read; much cheaper than building styles and sections
+    doc = Document(io.BytesIO(_docx_template()))
+    doc.add_heading(REPORT_TITLE, 0).alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
+    subtitle = doc.add_paragraph()
+    subtitle.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
+    lines = _subtitle(job_title, generated_at)
+    for line in lines[:-1]:
+        subtitle.add_run(line + "\n").bold = True
+    subtitle.add_run(lines[-1])
+    doc.add_paragraph("_" * 60).alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
+    doc.add_paragraph()
+    for block in blocks:
+        if block.kind == HEADING1:
+            doc.add_heading(block.text, level=1)
+        elif block.kind == HEADING2:
+            doc.add_heading(block.text, level=2)
+        elif block.kind == BULLET:
+            doc.add_paragraph(block.text, style="List Bullet")
+        elif block.kind == RULE:
+            doc.add_paragraph()
+            doc.add_paragraph("─" * 40).alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
+            doc.add_paragraph()
+        else:
+            doc.add_paragraph(block.text)
+    doc.add_page_break()
+    footer = doc.add_paragraph()
+    footer.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
+    run = footer.add_run(FOOTER_TEXT)
+    run.italic = True
+    run.font.size = Pt(10)
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+# --- HTML / Markdown -------------------------------------------------------------
+
+_HTML_HEAD = (
+    "<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>{title}</title>"
+    "<style>body{{font-family:sans-serif;max-width:48em;margin:2em auto;line-height:1.5}}"
+    ".center{{text-align:center}}.footer{{font-style:italic;font-size:.85em;margin-top:3em}}</style>"
+    "</head><body>\n"
+)
+
+
+def render_html(blocks: List[Block], job_title: Optional[str], generated_at: datetime) -> bytes:
+    parts = [_HTML_HEAD.format(title=html.escape(REPORT_TITLE)), f"<h1 class=\"center\">{html.escape(REPORT_TITLE)}</h1>\n"]
+    parts.append("<p class=\"center\">" + "<br>".join(html.escape(line) for line in _subtitle(job_title, generated_at)) + "</p>\n<hr>\n")
+    in_list = False
+    for block in blocks:
+        if block.kind == BULLET and not in_list:
+            parts.append("<ul>\n")
+            in_list = True
+        elif block.kind != BULLET and in_list:
+            parts.append("</ul>\n")
+            in_list = False
+        text = html.escape(block.text)
+        if block.kind == HEADING1:
+            parts.append(f"<h2>{text}</h2>\n")
+        elif block.kind == HEADING2:
+            parts.append(f"<h3>{text}</h3>\n")
+        elif block.kind == BULLET:
+            parts.append(f"<li>{text}</li>\n")
+        elif block.kind == RULE:
+            parts.append("<hr>\n")
+        else:
+            parts.append(f"<p>{text}</p>\n")
+    if in_list:
+        parts.append("</ul>\n")
+    parts.append(f"<p class=\"center footer\">{html.escape(FOOTER_TEXT)}</p>\n</body></html>\n")
+    return "".join(parts).encode("utf-8")
+
+
+def render_markdown(blocks: List[Block], job_title: Optional[str], generated_at: datetime) -> bytes:
+    parts = [f"# {REPORT_TITLE}\n\n"]
+    parts.extend(f"**{line}**  \n" if line.startswith("Target") else f"{line}\n" for line in _subtitle(job_title, generated_at))
+    parts.append("\n---\n\n")
+    previous = None
+    for block in blocks:
+        if previous == BULLET and block.kind != BULLET:
+            parts.append("\n")
+        if block.kind == HEADING1:
+            parts.append(f"## {block.text}\n\n")
+        elif block.kind == HEADING2:
+            parts.append(f"### {block.text}\n\n")
+        elif block.kind == BULLET:
+            parts.append(f"- {block.text}\n")
+        elif block.kind == RULE:
+            parts.append("---\n\n")
+        else:
+            parts.append(f"{block.text}\n\n")
+        previous = block.kind
+    if previous == BULLET:
+        parts.append("\n")
+    parts.append(f"*{FOOTER_TEXT}*\n")
+    return "".join(parts).encode("utf-8")
+
+
+# --- PDF -------------------------------------------------------------------------
+
+@lru_cache(maxsize=1)
+def _pdf_styles() -> Dict[str, Any]:
+    try:
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.lib.enums import TA_CENTER
+    except ImportError as e:
+        raise RuntimeError("PDF export requires reportlab: pip install reportlab") from e
+    sheet = getSampleStyleSheet()
+    return {
+        "title": ParagraphStyle("ReportTitle", parent=sheet["Title"]),
+        "subtitle": ParagraphStyle("ReportSubtitle", parent=sheet["Normal"], alignment=TA_CENTER),
+        HEADING1: sheet["Heading1"],
+        HEADING2: sheet["Heading2"],
+        PARAGRAPH: sheet["BodyText"],
+        BULLET: ParagraphStyle("ReportBullet", parent=sheet["BodyText"], leftIndent=14, bulletIndent=4),
+        "footer": ParagraphStyle("ReportFooter", parent=sheet["Italic"], alignment=TA_CENTER, fontSize=9),
+    }
+
+
+def render_pdf(blocks: List[Block], job_title: Optional[str], generated_at: datetime) -> bytes:
+    styles = _pdf_styles()
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, HRFlowable
+
+    def paragraph(text: str, style: str, **kwargs) -> Any:
+        # Paragraph text is a mini markup language; escape it
+        return Paragraph(html.escape(text), styles[style], **kwargs)
+
+    story = [paragraph(REPORT_TITLE, "title")]
+    story.extend(paragraph(line, "subtitle") for line in _subtitle(job_title, generated_at))
+    story.append(HRFlowable(width="100%", spaceBefore=8, spaceAfter=12))
+    for block in blocks:
+        if block.kind == RULE:
+            story.append(HRFlowable(width="50%", spaceBefore=12, spaceAfter=12))
+        elif block.kind == BULLET:
+            story.append(paragraph(block.text, BULLET, bulletText="•"))
+        else:
+            story.append(paragraph(block.text, block.kind))
+    story.append(Spacer(1, 24))
+    story.append(paragraph(FOOTER_TEXT, "footer"))
+    buffer = io.BytesIO()
+    SimpleDocTemplate(buffer, pagesize=letter, topMargin=inch, bottomMargin=inch,
+                      leftMargin=inch, rightMargin=inch, title=REPORT_TITLE).build(story)
+    return buffer.getvalue()
+
+
+# --- Public API ------------------------------------------------------------------
+
+Renderer = Callable[[List[Block], Optional[str], datetime], bytes]
+
+# format -> (renderer, media type, file extension)
+EXPORT_FORMATS: Dict[str, Tuple[Renderer, str, str]] = {
+    "docx": (render_docx, "application/vnd.openxmlformats-officedocument.wordprocessingml.document", "docx"),
+    "pdf": (render_pdf, "application/pdf", "pdf"),
+    "html": (render_html, "text/html; charset=utf-8", "html"),
+    "markdown": (render_markdown, "text/markdown; charset=utf-8", "md"),
+}
+
+
+@timed("export")
+def export_feedback(messages: List[Dict[str, Any]], job_title: Optional[str] = None, fmt: str = "docx",
+                    generated_at: Optional[datetime] = None) -> bytes:
+    """
+    Export a review conversation.
+
+    Args:
+        messages: Chat messages; only assistant messages are exported
+        job_title: Target job title shown under the title
+        fmt: One of ``EXPORT_FORMATS`` (docx, pdf, html, markdown)
+        generated_at: Timestamp shown in the document (now by default)
+
+    Returns:
+        The document's bytes
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    renderer = EXPORT_FORMATS[fmt][0]
+    return renderer(conversation_blocks(messages), job_title, generated_at or datetime.now())
+
+
+def export_filename(name: Optional[str], fmt: str, index: int = 0) -> str:
+    """Safe file name for an exported report."""
+    stem = _FILENAME_RE.sub("_", name).strip("._") if name else ""
+    return f"{stem or f'resume_feedback_{index + 1}'}.{EXPORT_FORMATS[fmt][2]}"
+
+
+class _ZipStream:
+    """Write-only file object that hands out what the zip writer produced so far."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_export_zip(reports: Iterable[Dict[str, Any]], fmt: str = "docx") -> Iterator[bytes]:
+    """
+    Export many reports as a zip archive, yielding it piece by piece.
+
+    Each entry is rendered, compressed and yielded before the next one starts, so
+    memory stays flat and the first bytes go out immediately however many reports
+    there are.
+
+    Args:
+        reports: Dicts with ``messages``, and optionally ``job_title`` and ``name``
+        fmt: Export format of every entry
+
+    Yields:
+        Chunks of the zip archive
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    stream = _ZipStream()
+    used = set()
+    # An unseekable stream makes zipfile write data descriptors instead of seeking back
+    with zipfile.ZipFile(stream, mode="w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for index, report in enumerate(reports):
+            filename = export_filename(report.get("name"), fmt, index)
+            if filename in used:
+                filename = export_filename(f"{filename.rsplit('.', 1)[0]}_{index + 1}", fmt, index)
+            used.add(filename)
+            data = export_feedback(report["messages"], report.get("job_title"), fmt)
+            # DOCX and PDF are already compressed
+            compress_type = zipfile.ZIP_STORED if fmt in ("docx", "pdf") else zipfile.ZIP_DEFLATED
+            archive.writestr(filename, data, compress_type=compress_type)
+            yield stream.drain()
+    yield stream.drain()
+
+
+def create_feedback_docx(messages: List[Dict[str, Any]], job_title: str = "General Review") -> bytes:
+    """Create a formatted DOCX document with the assistant's feedback (Streamlit export)."""
+    return export_feedback(messages, job_title, "docx")
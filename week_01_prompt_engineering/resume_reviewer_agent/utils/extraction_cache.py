@@ -0,0 +1,203 @@
+"""
+Extraction Cache
+
+This module caches the parsing work done on an uploaded resume (extracted text,
+sections and keywords), keyed by the SHA-256 of the file bytes. It has a bounded
+in-memory tier and an optional on-disk tier of JSON files, so a given file is parsed
+at most once across Streamlit reruns, re-submitted API uploads and CLI batch runs.
+"""
+
+import os
+import json
+import hashlib
+import logging
+import tempfile
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from utils.llm_cache import MemoryLRUCache
+from utils.parser import (MAX_FILE_BYTES, DocumentTooLargeError, ResumeSource, extract_resume_text,
+                          extract_resume_sections, extract_keywords)
+
+logger = logging.getLogger("resume_reviewer")
+
+
+def content_hash(data: bytes) -> str:
+    """Return the hex SHA-256 of a document's bytes."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def source_hash(source: ResumeSource, chunk_size: int = 64 * 1024) -> str:
+    """
+    Return the hex SHA-256 of a resume source without reading it into memory whole.
+
+    Args:
+        source: Path, bytes or binary file-like object (rewound before and after hashing)
+        chunk_size: Bytes hashed per read
+
+    Raises:
+        DocumentTooLargeError: If the source is larger than MAX_FILE_BYTES
+    """
+    if isinstance(source, bytes):
+        if len(source) > MAX_FILE_BYTES:
+            raise DocumentTooLargeError(f"Document exceeds {MAX_FILE_BYTES} bytes")
+        return content_hash(source)
+    f = open(source, "rb") if isinstance(source, str) else source
+    try:
+        if hasattr(f, "seek"):
+            f.seek(0)
+        digest = hashlib.sha256()
+        size = 0
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            size += len(chunk)
+            if size > MAX_FILE_BYTES:
+                raise DocumentTooLargeError(f"Document exceeds {MAX_FILE_BYTES} bytes")
+            digest.update(chunk)
+        return digest.hexdigest()
+    finally:
+        if f is not source:
+            f.close()
+        elif hasattr(f, "seek"):
+            f.seek(0)
+
+
+def parse_resume_bytes(data: ResumeSource, filename: str) -> Dict[str, Any]:
+    """
+    Run the full parsing pipeline on a document.
+
+    Args:
+        data: Raw document bytes (or a path / file-like object)
+        filename: Original file name (selects the format)
+
+    Returns:
+        Dictionary with ``text``, ``sections`` and ``keywords``
+    """
+    text = extract_resume_text(data, filename)
+    return {
+        "text": text,
+        "sections": dict(extract_resume_sections(text)),
+        "keywords": list(extract_keywords(text)),
+    }
+
+
+class ExtractionCache:
+    """Content-addressed cache of parsed resumes with a memory tier and optional disk tier."""
+
+    def __init__(self, max_entries: Optional[int] = None, directory: Optional[str] = None):
+        """Initialize the cache.
+
+        Args:
+            max_entries: Size of the memory tier (``EXTRACTION_CACHE_MAX_ENTRIES``).
+            directory: Directory for the disk tier; empty disables it (``EXTRACTION_CACHE_DIR``).
+        """
+        max_entries = max_entries or int(os.getenv("EXTRACTION_CACHE_MAX_ENTRIES", "256"))
+        # Parsed content doesn't go stale; entries only leave by LRU eviction
+        self.memory = MemoryLRUCache(max_entries=max_entries, ttl=float("inf"))
+        self.directory = directory if directory is not None else os.getenv("EXTRACTION_CACHE_DIR", "")
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _disk_path(self, digest: str) -> str:
+        return os.path.join(self.directory, digest[:2], f"{digest}.json")
+
+    def get(self, digest: str) -> Optional[Dict[str, Any]]:
+        entry = self.memory.get(digest)
+        if entry is not None:
+            with self._lock:
+                self.memory_hits += 1
+            return entry
+        if self.directory:
+            try:
+                with open(self._disk_path(digest), "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                entry = None
+            if entry is not None:
+                self.memory.set(digest, entry)
+                with self._lock:
+                    self.disk_hits += 1
+                return entry
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, digest: str, entry: Dict[str, Any]) -> None:
+        self.memory.set(digest, entry)
+        if not self.directory:
+            return
+        path = self._disk_path(digest)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write-then-rename so concurrent readers never see a partial file
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Extraction cache write failed: {e}")
+
+    def get_or_parse(self, data: ResumeSource, filename: str,
+                     parse: Callable[[ResumeSource, str], Dict[str, Any]] = parse_resume_bytes) -> Dict[str, Any]:
+        """
+        Return the cached parse of a document, parsing it on a miss.
+
+        Args:
+            data: Raw document bytes, or a path / file-like object (hashed in chunks, and
+                only read whole when it has to be parsed)
+            filename: Original file name (selects the format)
+            parse: Parser to run on a miss
+
+        Returns:
+            Dictionary with ``text``, ``sections``, ``keywords`` and the content ``sha256``
+        """
+        digest = source_hash(data)
+        entry = self.get(digest)
+        if entry is None:
+            entry = {**parse(data, filename), "sha256": digest}
+            self.put(digest, entry)
+        return entry
+
+    def stats(self) -> Dict[str, Any]:
+        hits = self.memory_hits + self.disk_hits
+        return {
+            "hits": hits,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "memory_entries": len(self.memory),
+            "memory_evictions": self.memory.evictions,
+            "disk_dir": self.directory or None,
+        }
+
+
+_cache: Optional[ExtractionCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_extraction_cache() -> ExtractionCache:
+    """Return the process-wide extraction cache, creating it on first use."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ExtractionCache()
+    return _cache
+
+
+def extract_resume_cached(source: ResumeSource, filename: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Parse a resume through the process-wide extraction cache.
+
+    Args:
+        source: Path, bytes or binary file-like object of the resume
+        filename: Original file name when ``source`` isn't a path
+
+    Returns:
+        Dictionary with ``text``, ``sections``, ``keywords`` and ``sha256``
+    """
+    name = filename or (source if isinstance(source, str) else getattr(source, "name", ""))
+    return get_extraction_cache().get_or_parse(source, name)
@@ -0,0 +1,147 @@
+"""
+Job Match Scorer
+
+This module scores resumes against job descriptions locally, without an LLM call.
+Both sides are turned into term vectors over the keyword index vocabulary
+(see utils/keywords.py); the match percentage blends the weighted share of the job's
+terms that the resume covers with the cosine similarity of their BM25 vectors.
+M resumes x N job descriptions are scored in one set of matrix products.
+"""
+
+from collections.abc import Mapping
+from typing import Any, Dict, List, Sequence, Union
+
+import numpy as np
+
+from utils.keywords import CATEGORIES, KeywordIndex, get_keyword_index
+
+# How much a term in each resume section counts towards the resume's term vector
+SECTION_WEIGHTS = {
+    "skills": 1.0,
+    "experience": 1.0,
+    "summary": 0.75,
+    "education": 0.5,
+    "other": 0.5,
+    "contact_info": 0.25,
+}
+# How much a job's term matters when it is missing, by vocabulary category
+CATEGORY_WEIGHTS = {"skill": 1.0, "role": 0.6, "soft": 0.3}
+# Match percentage = COVERAGE_WEIGHT * weighted coverage + (1 - COVERAGE_WEIGHT) * cosine
+COVERAGE_WEIGHT = 0.75
+
+MISSING_SKILLS_LIMIT = 10
+SUGGESTED_KEYWORDS_LIMIT = 7
+
+ResumeInput = Union[str, Mapping]
+
+
+class JobMatchMatrix:
+    """Scores of M resumes against N job descriptions."""
+
+    def __init__(self, index: KeywordIndex, resume_present: np.ndarray, job_counts: np.ndarray,
+                 job_weights: np.ndarray, coverage: np.ndarray, similarity: np.ndarray):
+        self.index = index
+        self.resume_present = resume_present
+        self.job_counts = job_counts
+        self.job_weights = job_weights
+        self.coverage = coverage
+        self.similarity = similarity
+        self.match_percentage = np.rint(
+            100 * np.clip(COVERAGE_WEIGHT * coverage + (1 - COVERAGE_WEIGHT) * similarity, 0, 1)
+        ).astype(np.int32)
+
+    @property
+    def shape(self):
+        return self.match_percentage.shape
+
+    def details(self, resume: int, job: int) -> Dict[str, Any]:
+        """
+        Break down one resume/job pair.
+
+        Args:
+            resume: Row of the resume
+            job: Column of the job description
+
+        Returns:
+            Dictionary with match_percentage, matched_skills, missing_skills and suggested_keywords
+        """
+        required = self.job_counts[job] > 0
+        present = self.resume_present[resume]
+        order = np.argsort(-self.job_weights[job], kind="stable")
+        matched = [t for t in order if required[t] and present[t]]
+        missing = [t for t in order if required[t] and not present[t]]
+        skill = CATEGORIES.index("skill")
+        terms = self.index.terms
+        return {
+            "match_percentage": int(self.match_percentage[resume, job]),
+            "matched_skills": [terms[t] for t in matched],
+            "missing_skills": [terms[t] for t in missing if self.index.category[t] == skill][:MISSING_SKILLS_LIMIT],
+            "suggested_keywords": [terms[t] for t in missing][:SUGGESTED_KEYWORDS_LIMIT],
+        }
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+
+def score_matrix(resumes: Sequence[ResumeInput], job_descriptions: Sequence[str],
+                 index: KeywordIndex = None) -> JobMatchMatrix:
+    """
+    Score every resume against every job description.
+
+    Args:
+        resumes: Resume texts, or section mappings as returned by ``extract_resume_sections``
+        job_descriptions: Job description texts
+        index: Keyword index; the process-wide one by default
+
+    Returns:
+        JobMatchMatrix of shape (len(resumes), len(job_descriptions))
+    """
+    index = index or get_keyword_index()
+
+    # Every resume section becomes one row of the count matrix; a weighted
+    # assignment matrix then folds the sections back into one vector per resume
+    parts: List[str] = []
+    owners: List[int] = []
+    part_weights: List[float] = []
+    for row, resume in enumerate(resumes):
+        items = resume.items() if isinstance(resume, Mapping) else [("experience", resume)]
+        for name, text in items:
+            if text:
+                parts.append(text)
+                owners.append(row)
+                part_weights.append(SECTION_WEIGHTS.get(name, 0.5))
+    part_counts, part_lengths = index.term_counts(parts)
+    assign = np.zeros((len(resumes), len(parts)), dtype=np.float32)
+    assign[owners, np.arange(len(parts))] = part_weights
+    resume_counts = assign @ part_counts
+    resume_lengths = (assign > 0).astype(np.float32) @ part_lengths
+    resume_weights = index.weights(resume_counts, np.maximum(resume_lengths, 1), "bm25")
+
+    job_counts, job_lengths = index.term_counts(job_descriptions)
+    category_weight = np.asarray([CATEGORY_WEIGHTS[c] for c in CATEGORIES], dtype=np.float32)[index.category]
+    job_weights = index.weights(job_counts, np.maximum(job_lengths, 1), "bm25") * category_weight
+
+    resume_present = (resume_counts > 0).astype(np.float32)
+    job_totals = job_weights.sum(axis=1)
+    covered = resume_present @ job_weights.T
+    coverage = np.divide(covered, job_totals, out=np.zeros_like(covered), where=job_totals > 0)
+    similarity = _normalize_rows(resume_weights) @ _normalize_rows(job_weights).T
+    # A job with no vocabulary terms can only be judged by similarity (which is then 0 too)
+    coverage = np.where(job_totals > 0, coverage, similarity)
+    return JobMatchMatrix(index, resume_present, job_counts, job_weights, coverage, similarity)
+
+
+def score_job_match(resume: ResumeInput, job_description: str) -> Dict[str, Any]:
+    """
+    Score one resume against one job description.
+
+    Args:
+        resume: Resume text or section mapping
+        job_description: Job description text
+
+    Returns:
+        Dictionary with match_percentage, matched_skills, missing_skills and suggested_keywords
+    """
+    return score_matrix([resume], [job_description]).details(0, 0)
@@ -0,0 +1,481 @@
+"""
+Keyword Index
+
+This module extracts skill, role and soft-skill keywords from resume and job text
+using a prebuilt, versioned vocabulary. The vocabulary (``data/skills_vocabulary.tsv``)
+is compiled into compact NumPy arrays (document frequencies, categories and UTF-8
+string tables) that are loaded memory-mapped. A batch of documents is matched as one
+token-id array (surface forms are looked up as encoded n-grams with a binary search)
+and scored with BM25 (or TF-IDF) over a documents x terms count matrix.
+
+Build the index after editing the vocabulary; loading an index whose recorded
+vocabulary hash no longer matches the TSV raises StaleIndexError instead of
+rebuilding it inside a running service:
+    python -m utils.keywords build [--corpus DIR]
+"""
+
+import os
+import re
+import json
+import hashlib
+import shutil
+import logging
+import argparse
+import tempfile
+import threading
+from itertools import chain
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger("resume_reviewer")
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+VOCABULARY_PATH = os.path.join(DATA_DIR, "skills_vocabulary.tsv")
+INDEX_VERSION = os.getenv("KEYWORD_INDEX_VERSION", "v1")
+INDEX_DIR = os.getenv("KEYWORD_INDEX_DIR", os.path.join(DATA_DIR, "keyword_index", INDEX_VERSION))
+
+CATEGORIES = ("skill", "soft", "role")
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Words, keeping "c++", "c#", "node.js" and "3.5" whole; "/" and "-" split words
+TOKEN_RE = re.compile(r"[A-Za-z0-9][A-Za-z0-9+#]*(?:\.[A-Za-z0-9]+)*|\.[A-Za-z][A-Za-z0-9]*")
+# Bytes that can occur in a token; every other byte (and any non-ASCII character) separates tokens
+_TOKEN_BYTES = frozenset(b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+#.")
+_SEPARATORS = bytes(byte if byte in _TOKEN_BYTES else ord(" ") for byte in range(256))
+
+_ARRAYS = ("df", "category", "display", "display_offsets", "surface", "surface_offsets", "surface_ids", "surface_exact")
+
+
+class StaleIndexError(RuntimeError):
+    """Raised when the built keyword index doesn't match the vocabulary TSV."""
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into word tokens, keeping the original case."""
+    return TOKEN_RE.findall(text)
+
+
+def tokenize_batch(texts: Sequence[str]) -> Tuple[List[str], np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Tokenize many texts into one array of token indices (the same tokens as ``tokenize``).
+
+    Texts are split into runs of token characters with C-level string operations; only
+    the distinct runs go through the tokenizer regex. Every text is followed by a ""
+    token, so n-grams never span two texts.
+
+    Args:
+        texts: Texts to tokenize
+
+    Returns:
+        Tuple of (distinct tokens, index into them per position, text index per
+        position, number of tokens in each text)
+    """
+    runs = [(text or "").encode("ascii", "replace").translate(_SEPARATORS).split() for text in texts]
+    flat_runs = list(chain.from_iterable(chain(text_runs, (b"",)) for text_runs in runs))
+    distinct_runs = list(dict.fromkeys(flat_runs))
+    run_index = {run: i for i, run in enumerate(distinct_runs)}
+    run_inverse = np.fromiter(map(run_index.__getitem__, flat_runs), dtype=np.int64, count=len(flat_runs))
+    # Most runs are one word; "c++.", "e.g." or "+x" become zero or more tokens
+    pieces = [tokenize(run.decode("ascii")) if run else [""] for run in distinct_runs]
+    tokens = list(dict.fromkeys(chain.from_iterable(pieces)))
+    token_index = {token: i for i, token in enumerate(tokens)}
+    sizes = np.fromiter(map(len, pieces), dtype=np.int64, count=len(pieces))
+    piece_tokens = np.fromiter((token_index[t] for piece in pieces for t in piece), dtype=np.int64, count=int(sizes.sum()))
+    offsets = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+
+    # Expand every run into its tokens
+    run_sizes = sizes[run_inverse]
+    total = int(run_sizes.sum())
+    within = np.arange(total, dtype=np.int64) - np.repeat(np.cumsum(run_sizes) - run_sizes, run_sizes)
+    inverse = piece_tokens[np.repeat(offsets[run_inverse], run_sizes) + within]
+    run_rows = np.repeat(np.arange(len(runs), dtype=np.int64), [len(text_runs) + 1 for text_runs in runs])
+    lengths = np.bincount(run_rows, weights=run_sizes, minlength=len(runs)).astype(np.int64) - 1
+    return tokens, inverse, np.repeat(run_rows, run_sizes), lengths
+
+
+def source_digest(path: str = VOCABULARY_PATH) -> str:
+    """SHA-256 of a vocabulary TSV; recorded in the index to detect a stale build."""
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _pack(strings: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Encode strings as one UTF-8 byte array plus offsets."""
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int32)
+    offsets[1:] = np.cumsum([len(e) for e in encoded])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8).copy(), offsets
+
+
+def _unpack(blob: np.ndarray, offsets: np.ndarray) -> List[str]:
+    raw = blob.tobytes()
+    return [raw[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(len(offsets) - 1)]
+
+
+class KeywordIndex:
+    """Vocabulary arrays plus the lookup tables used to match and score terms."""
+
+    def __init__(self, meta: Dict[str, Any], arrays: Dict[str, np.ndarray]):
+        self.meta = meta
+        self.arrays = arrays
+        self.version = meta["version"]
+        self.documents = float(meta["documents"])
+        self.avg_length = float(meta["avg_length"])
+
+        self.terms = _unpack(arrays["display"], arrays["display_offsets"])
+        self.df = arrays["df"]
+        self.category = arrays["category"]
+        self.idf = np.log1p((self.documents - self.df + 0.5) / (self.df + 0.5)).astype(np.float32)
+
+        # Surface forms become n-grams of token ids (1-based; 0 is any other token), encoded
+        # as base-``_base`` integers and kept sorted per n-gram length for binary search.
+        # Exact forms keep their case and have their own token ids and tables.
+        self._token_ids: Tuple[Dict[str, int], Dict[str, int]] = ({}, {})
+        grams: Tuple[Dict[int, Dict[Tuple[int, ...], int]], ...] = ({}, {})
+        surfaces = _unpack(arrays["surface"], arrays["surface_offsets"])
+        for surface, term_id, exact in zip(surfaces, arrays["surface_ids"].tolist(), arrays["surface_exact"].tolist()):
+            vocab = self._token_ids[exact]
+            ids = tuple(vocab.setdefault(token, len(vocab) + 1) for token in surface.split(" "))
+            grams[exact].setdefault(len(ids), {}).setdefault(ids, term_id)
+        self._base = max(len(vocab) for vocab in self._token_ids) + 1
+        self._max_span = max((n for table in grams for n in table), default=0)
+        if self._base ** self._max_span >= 2 ** 63:
+            raise ValueError(f"Vocabulary surface forms are too long to encode ({self._max_span} tokens)")
+        # (folded, exact) -> n -> (sorted keys, term ids)
+        self._grams: Tuple[Dict[int, Tuple[np.ndarray, np.ndarray]], ...] = ({}, {})
+        for exact, table in enumerate(grams):
+            for n, entries in table.items():
+                keys = np.asarray([self._encode(ids) for ids in entries], dtype=np.int64)
+                order = np.argsort(keys)
+                self._grams[exact][n] = keys[order], np.asarray(list(entries.values()), dtype=np.int64)[order]
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    @classmethod
+    def from_vocabulary(cls, path: str = VOCABULARY_PATH) -> "KeywordIndex":
+        """Compile an index from the TSV vocabulary source."""
+        meta: Dict[str, Any] = {"version": "dev", "documents": 10000, "avg_length": 450}
+        terms, categories, dfs = [], [], []
+        surfaces: Dict[Tuple[str, bool], int] = {}
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.rstrip("\n")
+                if line.startswith("#"):
+                    key, _, value = line[1:].partition("\t")
+                    if key in ("version", "documents", "avg_length") and value:
+                        meta[key] = {"version": str, "documents": int, "avg_length": float}[key](value)
+                    continue
+                if not line.strip():
+                    continue
+                term, category, df, aliases = (line.split("\t") + [""] * 4)[:4]
+                term_id = len(terms)
+                terms.append(term.lstrip("="))
+                categories.append(CATEGORIES.index(category))
+                dfs.append(int(df))
+                for form in [term] + [a for a in aliases.split(",") if a.strip()]:
+                    form = form.strip()
+                    exact = form.startswith("=")
+                    tokens = tokenize(form.lstrip("="))
+                    key = " ".join(tokens if exact else (t.lower() for t in tokens))
+                    if key:
+                        surfaces.setdefault((key, exact), term_id)
+
+        meta["source_sha256"] = source_digest(path)
+        display, display_offsets = _pack(terms)
+        surface, surface_offsets = _pack([key for key, _ in surfaces])
+        arrays = {
+            "df": np.asarray(dfs, dtype=np.int32),
+            "category": np.asarray(categories, dtype=np.uint8),
+            "display": display,
+            "display_offsets": display_offsets,
+            "surface": surface,
+            "surface_offsets": surface_offsets,
+            "surface_ids": np.asarray(list(surfaces.values()), dtype=np.int32),
+            "surface_exact": np.asarray([exact for _, exact in surfaces], dtype=bool),
+        }
+        return cls(meta, arrays)
+
+    @classmethod
+    def load(cls, directory: str = INDEX_DIR) -> "KeywordIndex":
+        """Load a built index, memory-mapping its arrays."""
+        with open(os.path.join(directory, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r") for name in _ARRAYS}
+        return cls(meta, arrays)
+
+    def save(self, directory: str) -> None:
+        os.makedirs(directory, exist_ok=True)
+        for name in _ARRAYS:
+            np.save(os.path.join(directory, f"{name}.npy"), np.ascontiguousarray(self.arrays[name]))
+        meta = {**self.meta, "terms": len(self)}
+        with open(os.path.join(directory, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+
+    def _encode(self, ids: Sequence[int]) -> int:
+        return sum(token_id * self._base ** position for position, token_id in enumerate(ids))
+
+    def _lookup(self, exact: int, n: int, keys: np.ndarray) -> np.ndarray:
+        """Term id of each encoded n-gram, or -1."""
+        table = self._grams[exact].get(n)
+        if table is None:
+            return np.full(len(keys), -1, dtype=np.int64)
+        sorted_keys, term_ids = table
+        slots = np.minimum(np.searchsorted(sorted_keys, keys), len(sorted_keys) - 1)
+        return np.where(sorted_keys[slots] == keys, term_ids[slots], -1)
+
+    def match_batch(self, texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Find vocabulary terms in many texts, preferring the longest match at each position.
+
+        Args:
+            texts: Texts to scan
+
+        Returns:
+            Tuple of (document index and term id of every match, in order of occurrence;
+            number of tokens in each text)
+        """
+        distinct, inverse, rows, lengths = tokenize_batch(texts)
+        folded_ids, exact_ids = self._token_ids
+        # Token ids of the distinct tokens; positions are padded with "" so every n-gram
+        # start has n tokens after it
+        ids = (
+            np.fromiter((folded_ids.get(t.lower(), 0) for t in distinct), dtype=np.int64, count=len(distinct)),
+            np.fromiter((exact_ids.get(t, 0) for t in distinct), dtype=np.int64, count=len(distinct)),
+        )
+        inverse = np.concatenate((inverse, np.full(self._max_span, distinct.index(""), dtype=np.int64)))
+        # Only tokens that occur in some surface form can start a match
+        starts = np.flatnonzero(((ids[0] > 0) | (ids[1] > 0))[inverse])
+        terms = np.full(len(starts), -1, dtype=np.int64)
+        spans = np.zeros(len(starts), dtype=np.int64)
+        keys = [np.zeros(len(starts), dtype=np.int64), np.zeros(len(starts), dtype=np.int64)]
+        for n in range(1, self._max_span + 1):
+            found = np.full(len(starts), -1, dtype=np.int64)
+            # Exact forms are looked up where no case-folded form of the same length matched
+            for exact in (1, 0):
+                keys[exact] += ids[exact][inverse[starts + n - 1]] * self._base ** (n - 1)
+                term = self._lookup(exact, n, keys[exact])
+                found = np.where(term >= 0, term, found)
+            # Longer matches overwrite shorter ones starting at the same token
+            hit = found >= 0
+            terms[hit] = found[hit]
+            spans[hit] = n
+
+        # A multi-token match hides the matches starting inside it. They are rare, so the
+        # left-to-right overlap resolution only walks over them
+        covered = np.zeros(len(inverse), dtype=bool)
+        end = 0
+        for start, span in zip(starts[spans > 1].tolist(), spans[spans > 1].tolist()):
+            if start >= end:
+                end = start + span
+                covered[start + 1:end] = True
+        kept = (terms >= 0) & ~covered[starts]
+        return rows[starts[kept]], terms[kept], lengths
+
+    def match(self, text: str) -> Tuple[List[int], int]:
+        """
+        Find vocabulary terms in a text, preferring the longest match at each position.
+
+        Args:
+            text: Text to scan
+
+        Returns:
+            Tuple of (term ids in order of occurrence, number of tokens in the text)
+        """
+        _, term_ids, lengths = self.match_batch([text])
+        return term_ids.tolist(), int(lengths[0])
+
+    def term_counts(self, texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Build the documents x terms count matrix for a batch of texts.
+
+        Args:
+            texts: Documents to count
+
+        Returns:
+            Tuple of (float32 count matrix of shape (len(texts), len(self)), token lengths)
+        """
+        rows, cols, lengths = self.match_batch(texts)
+        counts = np.bincount(rows * len(self) + cols, minlength=len(texts) * len(self)).astype(np.float32)
+        return counts.reshape(len(texts), len(self)), lengths.astype(np.float32)
+
+    def weights(self, counts: np.ndarray, lengths: np.ndarray, scheme: str = "bm25") -> np.ndarray:
+        """
+        Weight a count matrix by BM25 or (sublinear) TF-IDF.
+
+        Args:
+            counts: Documents x terms count matrix
+            lengths: Token length of each document
+            scheme: ``"bm25"`` or ``"tfidf"``
+
+        Returns:
+            Documents x terms weight matrix (zero where a term is absent)
+        """
+        if scheme == "bm25":
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[:, None] / self.avg_length)
+            return self.idf * counts * (BM25_K1 + 1) / (counts + norm)
+        if scheme == "tfidf":
+            with np.errstate(divide="ignore"):
+                tf = np.where(counts > 0, 1 + np.log(counts), 0)
+            return (tf * self.idf).astype(np.float32)
+        raise ValueError(f"Unknown scoring scheme: {scheme}")
+
+    def score_batch(self, texts: Sequence[str], top_k: int = 15, scheme: str = "bm25",
+                    categories: Optional[Iterable[str]] = None) -> List[List[Tuple[str, float]]]:
+        """
+        Score the vocabulary against many documents in one call.
+
+        Args:
+            texts: Documents to score
+            top_k: Keywords returned per document
+            scheme: ``"bm25"`` or ``"tfidf"``
+            categories: Restrict to these categories (skill, soft, role); all when omitted
+
+        Returns:
+            For each document, its top keywords as (term, score), best first
+        """
+        if not texts:
+            return []
+        counts, lengths = self.term_counts(texts)
+        scores = self.weights(counts, lengths, scheme)
+        if categories is not None:
+            allowed = np.isin(self.category, [CATEGORIES.index(c) for c in categories])
+            scores = np.where(allowed, scores, 0)
+        k = min(top_k, len(self))
+        # Partial sort: top k per row, then order just those k
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind="stable")
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        return [
+            [(self.terms[t], round(float(s), 4)) for t, s in zip(row_terms, row_scores) if s > 0]
+            for row_terms, row_scores in zip(top.tolist(), top_scores.tolist())
+        ]
+
+
+_index: Optional[KeywordIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_keyword_index() -> KeywordIndex:
+    """Return the process-wide keyword index, loading it on first use."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = load_index()
+    return _index
+
+
+def load_index(directory: str = INDEX_DIR, source: str = VOCABULARY_PATH) -> KeywordIndex:
+    """
+    Load the built index, checking that it was compiled from the current vocabulary.
+
+    Raises:
+        StaleIndexError: If the TSV changed since the index was built
+    """
+    if not os.path.isfile(os.path.join(directory, "meta.json")):
+        # No built index (e.g. a fresh checkout with a custom version): compile in memory
+        return KeywordIndex.from_vocabulary(source)
+    index = KeywordIndex.load(directory)
+    if index.meta.get("source_sha256") != source_digest(source):
+        # Rebuilding here would rewrite files other workers have memory-mapped
+        raise StaleIndexError(f"Keyword index {directory} was built from a different vocabulary than {source}; "
+                              "rebuild it with 'python -m utils.keywords build [--corpus DIR]'")
+    return index
+
+
+def extract_keywords_batch(texts: Sequence[str], top_k: int = 15, scheme: str = "bm25") -> List[List[str]]:
+    """
+    Extract the top keywords of many documents in one vectorized call.
+
+    Args:
+        texts: Documents to extract keywords from
+        top_k: Keywords per document
+        scheme: ``"bm25"`` or ``"tfidf"``
+
+    Returns:
+        For each document, its keywords, most relevant first
+    """
+    return [[term for term, _ in row] for row in get_keyword_index().score_batch(texts, top_k, scheme)]
+
+
+def build_index(out_dir: str = INDEX_DIR, source: str = VOCABULARY_PATH, corpus: Optional[str] = None) -> KeywordIndex:
+    """
+    Compile the vocabulary into an index directory.
+
+    Args:
+        out_dir: Directory to write the arrays and meta.json to
+        source: Vocabulary TSV
+        corpus: Optional directory of resumes/job descriptions to recompute document
+            frequencies and average length from (otherwise the TSV priors are used)
+
+    Returns:
+        The built index
+    """
+    index = KeywordIndex.from_vocabulary(source)
+    if corpus:
+        from utils.parser import extract_resume_text
+        documents = []
+        for root, _, files in os.walk(corpus):
+            for name in sorted(files):
+                if name.lower().endswith((".pdf", ".docx", ".doc", ".txt")):
+                    documents.append(extract_resume_text(os.path.join(root, name)))
+        if documents:
+            counts, lengths = index.term_counts(documents)
+            index.arrays["df"] = (counts > 0).sum(axis=0).astype(np.int32)
+            index.meta.update(documents=len(documents), avg_length=float(lengths.mean()) or 1.0)
+    out_dir = os.path.normpath(out_dir)
+    index.meta["version"] = os.path.basename(out_dir)
+    parent = os.path.dirname(os.path.abspath(out_dir))
+    os.makedirs(parent, exist_ok=True)
+    # Write a complete copy next to the target, then swap it in, so a reader never
+    # sees a mix of old and new arrays (already-mapped files stay valid)
+    staging = tempfile.mkdtemp(prefix=".building-", dir=parent)
+    previous = None
+    try:
+        index.save(staging)
+        if os.path.exists(out_dir):
+            previous = tempfile.mkdtemp(prefix=".previous-", dir=parent)
+            os.replace(out_dir, os.path.join(previous, "index"))
+        try:
+            os.replace(staging, out_dir)
+        except OSError:
+            if previous is not None:
+                os.replace(os.path.join(previous, "index"), out_dir)
+            raise
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+        if previous is not None:
+            shutil.rmtree(previous, ignore_errors=True)
+    return KeywordIndex.load(out_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keyword index tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="Compile the vocabulary into a memory-mappable index")
+    build.add_argument("--source", default=VOCABULARY_PATH, help="Vocabulary TSV")
+    build.add_argument("--corpus", help="Directory of documents to compute document frequencies from")
+    build.add_argument("--out", default=INDEX_DIR, help="Output directory (its name is the index version)")
+    extract = commands.add_parser("extract", help="Print the keywords of a document")
+    extract.add_argument("path")
+    extract.add_argument("--top-k", type=int, default=15)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        index = build_index(args.out, args.source, args.corpus)
+        print(f"Built keyword index {index.version}: {len(index)} terms from {int(index.documents)} documents -> {args.out}")
+    else:
+        from utils.parser import extract_resume_text
+        for term, score in get_keyword_index().score_batch([extract_resume_text(args.path)], args.top_k)[0]:
+            print(f"{score:8.3f}  {term}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+"""
+LLM Response Cache
+
+This module provides a content-addressed cache for LLM responses. Requests are keyed
+by a stable hash of (model, system prompt, messages, max_tokens, temperature) and
+stored in a bounded in-memory LRU tier backed by an optional SQLite tier that all
+worker processes on the same machine can share.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+import contextvars
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger("resume_reviewer")
+
+# Per-request bypass flag; contextvars follow asyncio tasks and to_thread calls
+_bypass: contextvars.ContextVar[bool] = contextvars.ContextVar("llm_cache_bypass", default=False)
+
+
+@contextmanager
+def bypass_cache():
+    """Skip cache lookups and writes for every LLM call made inside the block."""
+    token = _bypass.set(True)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+def is_bypassed() -> bool:
+    return _bypass.get()
+
+
+def make_cache_key(request: Dict[str, Any], temperature: Optional[float] = None) -> str:
+    """
+    Build a stable content hash for an LLM request.
+
+    Args:
+        request: Keyword arguments for ``messages.create`` (model, system, messages, max_tokens)
+        temperature: Sampling temperature of the call
+
+    Returns:
+        Hex SHA-256 digest of the canonical request
+    """
+    payload = {
+        "model": request.get("model"),
+        "system": request.get("system"),
+        "messages": request.get("messages"),
+        "max_tokens": request.get("max_tokens"),
+        "temperature": temperature,
+    }
+    canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class MemoryLRUCache:
+    """Thread-safe LRU cache with a per-entry TTL (values may be any object)."""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 86400.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.time():
+                del self._data[key]
+                self.evictions += 1
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.time() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLiteCache:
+    """Persistent cache tier shared by all processes that point at the same file."""
+
+    _PURGE_EVERY = 100
+
+    def __init__(self, path: str, ttl: float = 86400.0):
+        self.path = path
+        self.ttl = ttl
+        self.evictions = 0
+        self._local = threading.local()
+        self._writes = 0
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, expires_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_expires ON llm_cache(expires_at)")
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            # WAL lets readers in other workers proceed while one worker writes
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[str]:
+        row = self._conn().execute(
+            "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at < time.time():
+            return None
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO llm_cache (key, value, created_at, expires_at) VALUES (?, ?, ?, ?)",
+            (key, value, now, now + self.ttl),
+        )
+        conn.commit()
+        self._writes += 1
+        if self._writes % self._PURGE_EVERY == 0:
+            self.purge_expired()
+
+    def purge_expired(self) -> int:
+        conn = self._conn()
+        cursor = conn.execute("DELETE FROM llm_cache WHERE expires_at < ?", (time.time(),))
+        conn.commit()
+        self.evictions += cursor.rowcount
+        return cursor.rowcount
+
+    def clear(self) -> None:
+        conn = self._conn()
+        conn.execute("DELETE FROM llm_cache")
+        conn.commit()
+
+
+class ResponseCache:
+    """Two-tier (memory LRU + SQLite) LLM response cache with hit/miss counters."""
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        ttl: Optional[float] = None,
+        path: Optional[str] = None,
+        enabled: Optional[bool] = None,
+    ):
+        """Initialize the cache.
+
+        Args:
+            max_entries: Size of the memory tier (``LLM_CACHE_MAX_ENTRIES``).
+            ttl: Entry lifetime in seconds (``LLM_CACHE_TTL``).
+            path: SQLite file for the disk tier; empty disables it (``LLM_CACHE_PATH``).
+            enabled: Turn the cache on or off (``LLM_CACHE_ENABLED``).
+        """
+        if enabled is None:
+            enabled = os.getenv("LLM_CACHE_ENABLED", "true").lower() in ("1", "true", "yes", "on")
+        self.enabled = enabled
+        max_entries = max_entries or int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024"))
+        ttl = ttl or float(os.getenv("LLM_CACHE_TTL", "86400"))
+        if path is None:
+            path = os.getenv("LLM_CACHE_PATH", os.path.join(".cache", "llm_responses.sqlite3"))
+
+        self.memory = MemoryLRUCache(max_entries=max_entries, ttl=ttl)
+        self.disk: Optional[SQLiteCache] = None
+        if self.enabled and path:
+            try:
+                self.disk = SQLiteCache(path, ttl=ttl)
+            except sqlite3.Error as e:
+                logger.warning(f"Disk LLM cache unavailable at {path}: {e}")
+
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    def get(self, key: str) -> Optional[str]:
+        if not self.enabled or is_bypassed():
+            return None
+        value = self.memory.get(key)
+        if value is not None:
+            with self._lock:
+                self.memory_hits += 1
+            return value
+        if self.disk is not None:
+            try:
+                value = self.disk.get(key)
+            except sqlite3.Error as e:
+                logger.warning(f"Disk LLM cache read failed: {e}")
+                value = None
+            if value is not None:
+                # Promote to the memory tier for the next lookup
+                self.memory.set(key, value)
+                with self._lock:
+                    self.disk_hits += 1
+                return value
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key: str, value: str) -> None:
+        if not self.enabled or is_bypassed():
+            return
+        self.memory.set(key, value)
+        if self.disk is not None:
+            try:
+                self.disk.set(key, value)
+            except sqlite3.Error as e:
+                logger.warning(f"Disk LLM cache write failed: {e}")
+        with self._lock:
+            self.writes += 1
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": hits,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self.memory),
+            "memory_evictions": self.memory.evictions,
+            "disk_evictions": self.disk.evictions if self.disk is not None else 0,
+            "disk_path": self.disk.path if self.disk is not None else None,
+        }
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """Return the process-wide response cache, creating it on first use."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache()
+    return _cache
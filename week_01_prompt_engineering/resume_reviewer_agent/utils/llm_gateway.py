@@ -0,0 +1,387 @@
+"""
+LLM Gateway
+
+This module owns the process-wide Anthropic clients. Every call site (API service,
+CLI helpers and the Streamlit UI) goes through the gateway so that connections are
+pooled and kept alive instead of paying a fresh TLS handshake on each review.
+Calls made through ``create``/``acreate``/``stream``/``astream`` are also rate limited, retried
+with backoff and guarded by a circuit breaker (see utils/llm_limits.py).
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+import weakref
+import asyncio
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Tuple
+
+import anthropic
+import httpx
+
+from utils.conversation import estimate_tokens
+from utils.llm_limits import (CircuitBreaker, LLMError, LLMRateLimitError, backoff_delay, classify_error,
+                              get_rate_limiter)
+from utils.metrics import observe_llm_call, observe_llm_retry, observe_llm_ttft, observe_llm_wait
+
+logger = logging.getLogger("resume_reviewer")
+
+
+def _http2_available() -> bool:
+    """Return True when the optional ``h2`` package needed for HTTP/2 is installed."""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _env_flag(name: str, default: Optional[bool] = None) -> Optional[bool]:
+    value = os.getenv(name)
+    if value is None or value.strip().lower() in ("", "auto"):
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+class LLMGateway:
+    """Holds long-lived sync and async Anthropic clients backed by pooled HTTP clients."""
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        max_connections: Optional[int] = None,
+        max_keepalive_connections: Optional[int] = None,
+        keepalive_expiry: Optional[float] = None,
+        timeout: Optional[float] = None,
+        connect_timeout: Optional[float] = None,
+        http2: Optional[bool] = None,
+        max_retries: Optional[int] = None,
+    ):
+        """Initialize the gateway.
+
+        Args:
+            api_key: Anthropic API key. Falls back to ``ANTHROPIC_API_KEY``.
+            max_connections: Maximum open connections per client (``LLM_MAX_CONNECTIONS``).
+            max_keepalive_connections: Idle connections kept in the pool (``LLM_MAX_KEEPALIVE``).
+            keepalive_expiry: Seconds an idle connection is kept (``LLM_KEEPALIVE_EXPIRY``).
+            timeout: Overall request timeout in seconds (``LLM_TIMEOUT``).
+            connect_timeout: Connection timeout in seconds (``LLM_CONNECT_TIMEOUT``).
+            http2: Force HTTP/2 on or off. Defaults to on when ``h2`` is installed (``LLM_HTTP2``).
+            max_retries: Retries per call with jittered exponential backoff (``LLM_MAX_RETRIES``).
+        """
+        self.api_key = api_key or os.getenv("ANTHROPIC_API_KEY")
+        self.max_connections = max_connections or int(os.getenv("LLM_MAX_CONNECTIONS", "100"))
+        self.max_keepalive_connections = max_keepalive_connections or int(os.getenv("LLM_MAX_KEEPALIVE", "20"))
+        self.keepalive_expiry = keepalive_expiry or float(os.getenv("LLM_KEEPALIVE_EXPIRY", "30"))
+        self.timeout = timeout or float(os.getenv("LLM_TIMEOUT", "120"))
+        self.connect_timeout = connect_timeout or float(os.getenv("LLM_CONNECT_TIMEOUT", "10"))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv("LLM_MAX_RETRIES", "3"))
+        # Shared across workers; the breaker is per process and per key
+        self.limiter = get_rate_limiter()
+        self.breaker = CircuitBreaker()
+
+        if http2 is None:
+            http2 = _env_flag("LLM_HTTP2", default=_http2_available())
+        if http2 and not _http2_available():
+            logger.warning("HTTP/2 requested but the 'h2' package is not installed; falling back to HTTP/1.1.")
+            http2 = False
+        self.http2 = http2
+
+        self._lock = threading.Lock()
+        self._client: Optional[anthropic.Anthropic] = None
+        # httpx.AsyncClient pools are bound to the event loop that created them,
+        # so keep one async client per running loop.
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, anthropic.AsyncAnthropic]" = weakref.WeakKeyDictionary()
+
+    def _limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+    def _timeout(self) -> anthropic.Timeout:
+        return anthropic.Timeout(self.timeout, connect=self.connect_timeout)
+
+    @property
+    def client(self) -> anthropic.Anthropic:
+        """Shared synchronous client, created on first use."""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    # DefaultHttpxClient keeps the SDK defaults (TCP keep-alive, redirects)
+                    http_client = anthropic.DefaultHttpxClient(limits=self._limits(), timeout=self._timeout(), http2=self.http2)
+                    # Retries happen in the gateway, where they respect the shared limiter
+                    self._client = anthropic.Anthropic(
+                        api_key=self.api_key,
+                        http_client=http_client,
+                        max_retries=0,
+                    )
+                    logger.info(f"Created pooled Anthropic client (http2={self.http2}, max_connections={self.max_connections})")
+        return self._client
+
+    @property
+    def async_client(self) -> anthropic.AsyncAnthropic:
+        """Shared asynchronous client for the currently running event loop."""
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            with self._lock:
+                client = self._async_clients.get(loop)
+                if client is None:
+                    http_client = anthropic.DefaultAsyncHttpxClient(limits=self._limits(), timeout=self._timeout(), http2=self.http2)
+                    client = anthropic.AsyncAnthropic(
+                        api_key=self.api_key,
+                        http_client=http_client,
+                        max_retries=0,
+                    )
+                    self._async_clients[loop] = client
+        return client
+
+    # --- guarded calls ---------------------------------------------------------------
+
+    @staticmethod
+    def _estimate_cost(request: Dict[str, Any]) -> int:
+        """Input tokens (estimated locally) plus the output budget of a request."""
+        prompt = json.dumps([request.get("system", ""), request.get("messages", [])], ensure_ascii=False)
+        return estimate_tokens(prompt) + int(request.get("max_tokens", 0))
+
+    @staticmethod
+    def _actual_cost(usage: Any) -> Optional[int]:
+        if usage is None:
+            return None
+        return sum(getattr(usage, field, 0) or 0 for field in (
+            "input_tokens", "output_tokens", "cache_read_input_tokens", "cache_creation_input_tokens"))
+
+    def _before_attempt(self, request: Dict[str, Any]) -> Tuple[float, int]:
+        """Check the breaker and reserve limiter capacity; returns (seconds to wait, reserved tokens)."""
+        self.breaker.check()
+        cost = self._estimate_cost(request)
+        return self.limiter.reserve(cost), cost
+
+    def _on_success(self, cost: int, usage: Any) -> None:
+        self.breaker.record_success()
+        actual = self._actual_cost(usage)
+        if actual is not None:
+            self.limiter.settle(cost, actual)
+
+    def _on_failure(self, exc: BaseException, attempt: int, cost: int, can_retry: bool = True) -> float:
+        """Record a failed attempt; returns the backoff before the next one or raises the typed error."""
+        error = classify_error(exc)
+        # The provider rejected the call before doing the work; give the tokens back
+        self.limiter.settle(cost, 0)
+        if isinstance(error, LLMRateLimitError):
+            self.breaker.release()
+            # Everyone waits, not just this caller, so the next burst doesn't hit the limit again
+            self.limiter.pause(error.retry_after if error.retry_after is not None else backoff_delay(attempt))
+        elif error.retryable:
+            self.breaker.record_failure()
+        else:
+            # The provider answered (e.g. 400); it is up
+            self.breaker.record_success()
+        if not error.retryable or not can_retry or attempt >= self.max_retries:
+            raise error from exc
+        delay = backoff_delay(attempt, error.retry_after)
+        logger.warning(f"{error} - retrying in {delay:.1f}s (attempt {attempt + 1}/{self.max_retries})")
+        return delay
+
+    def create(self, request: Dict[str, Any]) -> Any:
+        """
+        Call ``messages.create`` with rate limiting, retries and the circuit breaker.
+
+        Args:
+            request: Keyword arguments for ``messages.create``
+
+        Returns:
+            The SDK response
+
+        Raises:
+            LLMError: A typed error once retries are exhausted (or the failure isn't retryable)
+        """
+        model = request.get("model", "")
+        started = time.perf_counter()
+        attempt = 0
+        try:
+            while True:
+                wait, cost = self._before_attempt(request)
+                observe_llm_wait(model, wait)
+                if wait > 0:
+                    time.sleep(wait)
+                try:
+                    response = self.client.messages.create(**request)
+                except Exception as e:
+                    delay = self._on_failure(e, attempt, cost)
+                    observe_llm_retry(model)
+                    time.sleep(delay)
+                    attempt += 1
+                    continue
+                except BaseException:
+                    self.breaker.release()
+                    raise
+                self._on_success(cost, getattr(response, "usage", None))
+                observe_llm_call(model, time.perf_counter() - started, "ok", getattr(response, "usage", None))
+                return response
+        except LLMError as e:
+            observe_llm_call(model, time.perf_counter() - started, type(e).__name__)
+            raise
+
+    async def acreate(self, request: Dict[str, Any]) -> Any:
+        """Async counterpart of ``create``."""
+        model = request.get("model", "")
+        started = time.perf_counter()
+        attempt = 0
+        try:
+            while True:
+                # The shared limiter state lives in SQLite; keep its lock waits off the loop
+                wait, cost = await asyncio.to_thread(self._before_attempt, request)
+                observe_llm_wait(model, wait)
+                try:
+                    if wait > 0:
+                        await asyncio.sleep(wait)
+                    response = await self.async_client.messages.create(**request)
+                except Exception as e:
+                    delay = await asyncio.to_thread(self._on_failure, e, attempt, cost)
+                    observe_llm_retry(model)
+                    await asyncio.sleep(delay)
+                    attempt += 1
+                    continue
+                except BaseException:
+                    self.breaker.release()
+                    raise
+                await asyncio.to_thread(self._on_success, cost, getattr(response, "usage", None))
+                observe_llm_call(model, time.perf_counter() - started, "ok", getattr(response, "usage", None))
+                return response
+        except LLMError as e:
+            observe_llm_call(model, time.perf_counter() - started, type(e).__name__)
+            raise
+
+    def stream(self, request: Dict[str, Any]) -> Iterator[Tuple[str, Any]]:
+        """
+        Stream ``messages.stream`` as ``("delta", text)`` chunks and a final ``("message", message)``.
+
+        Failures before the first chunk are retried like ``create``; once text has
+        been streamed a failure is raised as a typed LLMError.
+        """
+        model = request.get("model", "")
+        started = time.perf_counter()
+        attempt = 0
+        try:
+            while True:
+                wait, cost = self._before_attempt(request)
+                observe_llm_wait(model, wait)
+                streamed = False
+                try:
+                    if wait > 0:
+                        time.sleep(wait)
+                    sent = time.perf_counter()
+                    with self.client.messages.stream(**request) as stream:
+                        for text in stream.text_stream:
+                            if not streamed:
+                                observe_llm_ttft(model, time.perf_counter() - sent)
+                                streamed = True
+                            yield "delta", text
+                        final_message = stream.get_final_message()
+                except Exception as e:
+                    delay = self._on_failure(e, attempt, cost, not streamed)
+                    observe_llm_retry(model)
+                    time.sleep(delay)
+                    attempt += 1
+                    continue
+                except BaseException:
+                    self.breaker.release()
+                    raise
+                self._on_success(cost, getattr(final_message, "usage", None))
+                observe_llm_call(model, time.perf_counter() - started, "ok", getattr(final_message, "usage", None))
+                yield "message", final_message
+                return
+        except LLMError as e:
+            observe_llm_call(model, time.perf_counter() - started, type(e).__name__)
+            raise
+
+    async def astream(self, request: Dict[str, Any]) -> AsyncIterator[Tuple[str, Any]]:
+        """Async counterpart of ``stream``."""
+        model = request.get("model", "")
+        started = time.perf_counter()
+        attempt = 0
+        try:
+            while True:
+                wait, cost = await asyncio.to_thread(self._before_attempt, request)
+                observe_llm_wait(model, wait)
+                streamed = False
+                try:
+                    if wait > 0:
+                        await asyncio.sleep(wait)
+                    sent = time.perf_counter()
+                    async with self.async_client.messages.stream(**request) as stream:
+                        async for text in stream.text_stream:
+                            if not streamed:
+                                observe_llm_ttft(model, time.perf_counter() - sent)
+                                streamed = True
+                            yield "delta", text
+                        final_message = await stream.get_final_message()
+                except Exception as e:
+                    delay = await asyncio.to_thread(self._on_failure, e, attempt, cost, not streamed)
+                    observe_llm_retry(model)
+                    await asyncio.sleep(delay)
+                    attempt += 1
+                    continue
+                except BaseException:
+                    self.breaker.release()
+                    raise
+                await asyncio.to_thread(self._on_success, cost, getattr(final_message, "usage", None))
+                observe_llm_call(model, time.perf_counter() - started, "ok", getattr(final_message, "usage", None))
+                yield "message", final_message
+                return
+        except LLMError as e:
+            observe_llm_call(model, time.perf_counter() - started, type(e).__name__)
+            raise
+
+    def stats(self) -> Dict[str, Any]:
+        return {"max_retries": self.max_retries, "limiter": self.limiter.stats(), "breaker": self.breaker.stats()}
+
+    def close(self) -> None:
+        """Close the synchronous client and release its connections."""
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+    async def aclose(self) -> None:
+        """Close the async client bound to the running event loop."""
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.pop(loop, None)
+        if client is not None:
+            await client.close()
+
+
+_gateways: Dict[Optional[str], LLMGateway] = {}
+_gateways_lock = threading.Lock()
+
+
+def get_gateway(api_key: Optional[str] = None) -> LLMGateway:
+    """
+    Return the process-wide gateway for an API key.
+
+    Args:
+        api_key: Anthropic API key. Falls back to ``ANTHROPIC_API_KEY``.
+
+    Returns:
+        The shared LLMGateway instance for that key
+    """
+    key = api_key or os.getenv("ANTHROPIC_API_KEY")
+    gateway = _gateways.get(key)
+    if gateway is None:
+        with _gateways_lock:
+            gateway = _gateways.get(key)
+            if gateway is None:
+                gateway = LLMGateway(api_key=key)
+                _gateways[key] = gateway
+    return gateway
+
+
+def close_all() -> None:
+    """Close every synchronous client held by the gateways (e.g. on shutdown)."""
+    with _gateways_lock:
+        for gateway in _gateways.values():
+            gateway.close()
@@ -0,0 +1,350 @@
+"""
+LLM Rate Limits and Failures
+
+This module keeps LLM traffic at the provider's limits instead of oscillating around
+them. A token-bucket limiter on requests/min and tokens/min is shared by every thread
+and worker process through a small SQLite file; a 429 pauses all of them for the
+provider's ``retry-after``. The file is only used once a limit is set: with
+``LLM_RATE_RPM`` and ``LLM_RATE_TPM`` both 0 (the default) there is no budget to
+share, and a 429 pauses only the process that received it. Failed calls are retried with jittered exponential
+backoff, a circuit breaker stops calling a provider that keeps failing, and failures
+surface as typed ``LLMError`` exceptions so the pipeline stops early.
+"""
+
+import os
+import time
+import random
+import sqlite3
+import logging
+import threading
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional, Tuple
+
+import anthropic
+
+logger = logging.getLogger("resume_reviewer")
+
+
+# --- Typed errors --------------------------------------------------------------
+
+class LLMError(Exception):
+    """An LLM call failed. ``status_code`` is the HTTP status the API answers with."""
+
+    status_code = 502
+    retryable = False
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LLMRateLimitError(LLMError):
+    """The provider rejected the call with 429 (after retries)."""
+
+    status_code = 429
+    retryable = True
+
+
+class LLMOverloadedError(LLMError):
+    """The provider is overloaded (529) or failing (5xx)."""
+
+    status_code = 503
+    retryable = True
+
+
+class LLMConnectionError(LLMError):
+    """The provider could not be reached or timed out."""
+
+    status_code = 504
+    retryable = True
+
+
+class LLMRequestError(LLMError):
+    """The provider rejected the request itself (400, 401, 403, 404...); retrying won't help."""
+
+    status_code = 502
+
+
+class LLMCircuitOpenError(LLMError):
+    """Calls are short-circuited after repeated provider failures."""
+
+    status_code = 503
+
+
+def _retry_after(response: Any) -> Optional[float]:
+    """Seconds from ``retry-after-ms`` / ``retry-after`` (seconds or an HTTP date), if present."""
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        value = headers.get("retry-after")
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def classify_error(exc: BaseException) -> LLMError:
+    """Map an SDK exception to a typed LLMError."""
+    if isinstance(exc, LLMError):
+        return exc
+    if isinstance(exc, anthropic.APIStatusError):
+        retry_after = _retry_after(exc.response)
+        message = f"LLM call failed with status {exc.status_code}: {exc}"
+        if exc.status_code == 429:
+            return LLMRateLimitError(message, retry_after)
+        if exc.status_code == 529 or exc.status_code >= 500:
+            return LLMOverloadedError(message, retry_after)
+        return LLMRequestError(message)
+    if isinstance(exc, anthropic.APIConnectionError):
+        return LLMConnectionError(f"LLM provider unreachable: {exc}")
+    return LLMRequestError(f"LLM call failed: {exc}")
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None,
+                  base: Optional[float] = None, cap: Optional[float] = None) -> float:
+    """
+    Seconds to wait before retry number ``attempt`` (0-based).
+
+    The provider's ``retry-after`` is honored (plus a little jitter so waiting workers
+    don't return in lockstep); otherwise "full jitter" exponential backoff is used.
+    """
+    base = base or float(os.getenv("LLM_BACKOFF_BASE", "1"))
+    cap = cap or float(os.getenv("LLM_BACKOFF_MAX", "30"))
+    if retry_after is not None:
+        return min(cap, retry_after) + random.uniform(0, base)
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+# --- Token buckets -------------------------------------------------------------
+
+class RateLimiter:
+    """Requests/min and tokens/min token buckets, optionally shared through SQLite.
+
+    State (buckets and 429 pauses) is only shared across workers when at least one
+    limit is set; otherwise it is kept per process.
+
+    Callers reserve capacity before each call and sleep for the returned number of
+    seconds; buckets may go negative, so concurrent callers queue up behind each
+    other instead of polling. Token reservations are estimates and are settled
+    against the real usage afterwards.
+    """
+
+    def __init__(self, rpm: Optional[float] = None, tpm: Optional[float] = None, path: Optional[str] = None):
+        """Initialize the limiter.
+
+        Args:
+            rpm: Requests per minute; 0 disables the request bucket (``LLM_RATE_RPM``).
+            tpm: Input + output tokens per minute; 0 disables the token bucket (``LLM_RATE_TPM``).
+            path: SQLite file shared by all workers; empty keeps state per process (``LLM_RATE_LIMIT_PATH``).
+        """
+        self.rpm = rpm if rpm is not None else float(os.getenv("LLM_RATE_RPM", "0"))
+        self.tpm = tpm if tpm is not None else float(os.getenv("LLM_RATE_TPM", "0"))
+        if path is None:
+            path = os.getenv("LLM_RATE_LIMIT_PATH", os.path.join(".cache", "rate_limits.sqlite3"))
+        self.path = path
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        # key -> (level, updated_at); "pause" stores the pause deadline in updated_at
+        self._state: Dict[str, Tuple[float, float]] = {}
+        self.reservations = 0
+        self.waited_s = 0.0
+        self.pauses = 0
+        if self.path:
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                conn = self._conn()
+                conn.execute("CREATE TABLE IF NOT EXISTS rate_buckets (key TEXT PRIMARY KEY, level REAL NOT NULL, updated_at REAL NOT NULL)")
+            except sqlite3.Error as e:
+                logger.warning(f"Rate limiter store unavailable at {self.path}: {e}; limiting per process")
+                self.path = ""
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _buckets(self) -> Dict[str, float]:
+        # key -> capacity (= rate per minute)
+        buckets = {}
+        if self.rpm > 0:
+            buckets["requests"] = self.rpm
+        if self.tpm > 0:
+            buckets["tokens"] = self.tpm
+        return buckets
+
+    def _update(self, apply) -> Any:
+        """Run ``apply(state, now)`` on the current state atomically and persist the result."""
+        now = time.time()
+        # With no limits configured there is nothing worth a cross-worker write lock;
+        # only 429 pauses are tracked then, per process
+        if not self.path or not self._buckets():
+            with self._lock:
+                return apply(self._state, now)
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            state = {key: (level, updated) for key, level, updated in conn.execute("SELECT key, level, updated_at FROM rate_buckets")}
+            before = dict(state)
+            result = apply(state, now)
+            conn.executemany(
+                "INSERT OR REPLACE INTO rate_buckets (key, level, updated_at) VALUES (?, ?, ?)",
+                [(key, level, updated) for key, (level, updated) in state.items() if before.get(key) != (level, updated)],
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return result
+
+    @staticmethod
+    def _refill(state: Dict[str, Tuple[float, float]], key: str, capacity: float, now: float) -> float:
+        level, updated = state.get(key, (capacity, now))
+        return min(capacity, level + capacity / 60.0 * (now - updated))
+
+    def reserve(self, tokens: int) -> float:
+        """
+        Take one request and ``tokens`` tokens from the buckets.
+
+        Args:
+            tokens: Estimated input + output tokens of the call
+
+        Returns:
+            Seconds to wait before sending the call
+        """
+        buckets = self._buckets()
+
+        def apply(state, now):
+            wait = max(0.0, state.get("pause", (0.0, 0.0))[1] - now)
+            for key, capacity in buckets.items():
+                level = self._refill(state, key, capacity, now) - (1 if key == "requests" else tokens)
+                state[key] = (level, now)
+                if level < 0:
+                    wait = max(wait, -level / (capacity / 60.0))
+            return wait
+
+        wait = self._update(apply)
+        with self._lock:
+            self.reservations += 1
+            self.waited_s += wait
+        return wait
+
+    def settle(self, reserved: int, actual: int) -> None:
+        """Give back (or take) the difference between estimated and actual tokens."""
+        if self.tpm <= 0 or reserved == actual:
+            return
+
+        def apply(state, now):
+            level = self._refill(state, "tokens", self.tpm, now) + (reserved - actual)
+            state["tokens"] = (min(self.tpm, level), now)
+
+        self._update(apply)
+
+    def pause(self, seconds: float) -> None:
+        """Hold every caller (in every worker) for ``seconds``, e.g. after a 429."""
+        def apply(state, now):
+            until = max(state.get("pause", (0.0, 0.0))[1], now + seconds)
+            state["pause"] = (0.0, until)
+
+        self._update(apply)
+        with self._lock:
+            self.pauses += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rpm": self.rpm,
+            "tpm": self.tpm,
+            "reservations": self.reservations,
+            "waited_s": round(self.waited_s, 3),
+            "pauses": self.pauses,
+            "path": self.path or None,
+        }
+
+
+_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Return the process-wide rate limiter, creating it on first use."""
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = RateLimiter()
+    return _limiter
+
+
+# --- Circuit breaker -----------------------------------------------------------
+
+class CircuitBreaker:
+    """Stops calling the provider after ``threshold`` consecutive failures.
+
+    After ``cooldown`` seconds one trial call is let through (half-open); its success
+    closes the circuit, its failure opens it again. Only provider-side failures
+    (overload, 5xx, connection errors) count; 429s are handled by the limiter.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, threshold: Optional[int] = None, cooldown: Optional[float] = None):
+        self.threshold = threshold or int(os.getenv("LLM_BREAKER_THRESHOLD", "5"))
+        self.cooldown = cooldown or float(os.getenv("LLM_BREAKER_COOLDOWN", "30"))
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.rejected = 0
+        self.trips = 0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def check(self) -> None:
+        """Raise LLMCircuitOpenError if calls are currently short-circuited."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            remaining = self.opened_at + self.cooldown - time.monotonic()
+            if self.state == self.OPEN and remaining <= 0:
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return
+            self.rejected += 1
+        raise LLMCircuitOpenError("LLM provider is failing; calls are paused", retry_after=max(remaining, 1.0))
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.threshold:
+                if self.state != self.OPEN:
+                    self.trips += 1
+                    logger.warning(f"LLM circuit opened after {self.failures} failures")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+    def release(self) -> None:
+        """Forget an unfinished trial call (e.g. a cancelled request) without judging the provider."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {"state": self.state, "failures": self.failures, "trips": self.trips, "rejected": self.rejected}
@@ -0,0 +1,318 @@
+"""
+Pipeline Metrics
+
+This module records where a review's time goes: document extraction, sectioning,
+prompt rendering, every LLM call (rate-limit queue wait, time to first token, total
+latency and tokens) and report rendering and export. Metrics are plain in-process
+counters and fixed-bucket histograms (a dict lookup, a bisect and a locked add per
+observation), rendered in the Prometheus text format by the API's ``/metrics``
+endpoint or dumped to a file when a CLI batch run exits.
+"""
+
+import os
+import sys
+import time
+import inspect
+import threading
+import contextvars
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes", "on")
+
+# Seconds; local stages take micro- to milliseconds, LLM calls seconds to minutes
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LLM_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0, 120.0)
+
+# The endpoint a metric is attributed to: a label, or a callable resolved when observed
+# (the API sets one that reads the matched route template)
+_endpoint: contextvars.ContextVar[Union[str, Callable[[], str]]] = contextvars.ContextVar("metrics_endpoint", default="none")
+
+
+def set_endpoint(label: Union[str, Callable[[], str]]) -> contextvars.Token:
+    """Attribute metrics recorded in the current context (and tasks/threads it starts) to ``label``."""
+    return _endpoint.set(label)
+
+
+def reset_endpoint(token: contextvars.Token) -> None:
+    _endpoint.reset(token)
+
+
+def current_endpoint() -> str:
+    label = _endpoint.get()
+    return label() if callable(label) else label
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _new_child(self) -> Any:
+        raise NotImplementedError
+
+    def labels(self, *values: str) -> Any:
+        """Return the series for these label values, creating it on first use."""
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _series(self) -> List[Tuple[Tuple[str, ...], Any]]:
+        with self._lock:
+            return sorted(self._children.items())
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.kind}"
+
+    def clear(self) -> None:
+        with self._lock:
+            self._children.clear()
+
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class Counter(_Metric):
+    """A monotonically increasing count per label set."""
+
+    kind = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def render(self) -> Iterator[str]:
+        yield from super().render()
+        for values, child in self._series():
+            yield f"{self.name}_total{_labels(self.labelnames, values)} {_number(child.value)}"
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "_lock")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        # Per-bucket (not cumulative) counts; the last slot is +Inf
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+
+class Histogram(_Metric):
+    """Observations counted into fixed buckets, plus their sum and count."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = STAGE_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def render(self) -> Iterator[str]:
+        yield from super().render()
+        for values, child in self._series():
+            with child._lock:
+                counts, total = list(child.counts), child.sum
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="' + _number(bound) + '"'
+                yield f"{self.name}_bucket{_labels(self.labelnames, values, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, values)} {_number(total)}"
+            yield f"{self.name}_count{_labels(self.labelnames, values)} {cumulative}"
+
+
+REGISTRY: List[_Metric] = []
+
+STAGE_SECONDS = Histogram(
+    "resume_reviewer_stage_duration_seconds",
+    "Time spent in a local pipeline stage (extraction, sectioning, prompt, request, render, export).",
+    ("stage", "endpoint"),
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "resume_reviewer_http_request_duration_seconds",
+    "HTTP request latency until the response (or its stream) finished.",
+    ("endpoint", "method", "status"),
+    buckets=LLM_BUCKETS,
+)
+LLM_QUEUE_WAIT_SECONDS = Histogram(
+    "resume_reviewer_llm_queue_wait_seconds",
+    "Time an LLM call waited for rate-limit capacity before being sent.",
+    ("endpoint", "model"),
+    buckets=STAGE_BUCKETS + (30.0, 60.0),
+)
+LLM_TTFT_SECONDS = Histogram(
+    "resume_reviewer_llm_time_to_first_token_seconds",
+    "Time from sending a streamed LLM call to its first text chunk.",
+    ("endpoint", "model"),
+    buckets=LLM_BUCKETS,
+)
+LLM_REQUEST_SECONDS = Histogram(
+    "resume_reviewer_llm_request_duration_seconds",
+    "Total LLM call latency, including queue wait and retries.",
+    ("endpoint", "model"),
+    buckets=LLM_BUCKETS,
+)
+LLM_REQUESTS = Counter(
+    "resume_reviewer_llm_requests",
+    "LLM calls by outcome (ok or the typed error).",
+    ("endpoint", "model", "outcome"),
+)
+LLM_RETRIES = Counter(
+    "resume_reviewer_llm_retries",
+    "LLM call attempts that failed and were retried.",
+    ("endpoint", "model"),
+)
+LLM_TOKENS = Counter(
+    "resume_reviewer_llm_tokens",
+    "Tokens reported by the provider, by type (input, output, cache_read, cache_creation).",
+    ("endpoint", "model", "type"),
+)
+
+_TOKEN_FIELDS = (
+    ("input", "input_tokens"),
+    ("output", "output_tokens"),
+    ("cache_read", "cache_read_input_tokens"),
+    ("cache_creation", "cache_creation_input_tokens"),
+)
+
+
+def observe_stage(stage: str, seconds: float) -> None:
+    if ENABLED:
+        STAGE_SECONDS.labels(stage, current_endpoint()).observe(seconds)
+
+
+@contextmanager
+def stage_timer(stage: str) -> Iterator[None]:
+    """Time the block as pipeline stage ``stage``."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - started)
+
+
+def timed(stage: str) -> Callable:
+    """Decorator timing every call of a function (sync or async) as pipeline stage ``stage``."""
+    def decorator(fn: Callable) -> Callable:
+        if inspect.iscoroutinefunction(fn):
+            @wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    observe_stage(stage, time.perf_counter() - started)
+            return async_wrapper
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                observe_stage(stage, time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+def observe_llm_call(model: str, seconds: float, outcome: str = "ok", usage: Any = None) -> None:
+    """Record a finished LLM call: its latency, outcome and token usage."""
+    if not ENABLED:
+        return
+    endpoint = current_endpoint()
+    LLM_REQUEST_SECONDS.labels(endpoint, model).observe(seconds)
+    LLM_REQUESTS.labels(endpoint, model, outcome).inc()
+    if usage is not None:
+        for label, field in _TOKEN_FIELDS:
+            tokens = getattr(usage, field, 0) or 0
+            if tokens:
+                LLM_TOKENS.labels(endpoint, model, label).inc(tokens)
+
+
+def observe_llm_wait(model: str, seconds: float) -> None:
+    if ENABLED:
+        LLM_QUEUE_WAIT_SECONDS.labels(current_endpoint(), model).observe(seconds)
+
+
+def observe_llm_ttft(model: str, seconds: float) -> None:
+    if ENABLED:
+        LLM_TTFT_SECONDS.labels(current_endpoint(), model).observe(seconds)
+
+
+def observe_llm_retry(model: str) -> None:
+    if ENABLED:
+        LLM_RETRIES.labels(current_endpoint(), model).inc()
+
+
+def render_metrics() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def dump_metrics(path: Optional[str] = None) -> None:
+    """Write the metrics to ``path`` ("-" or None for stdout), e.g. when a batch run exits."""
+    text = render_metrics()
+    if not path or path == "-":
+        sys.stdout.write(text)
+        sys.stdout.flush()
+        return
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def reset_metrics() -> None:
+    """Drop every recorded series (benchmarks and tests start from zero)."""
+    for metric in REGISTRY:
+        metric.clear()
@@ -0,0 +1,200 @@
+"""
+Model Router
+
+This module picks the model tier and output budget for each LLM call from the kind
+of request and its estimated input size. Full reviews, job matches and reports keep
+the configured model and token budget; chat follow-ups (rewriting a bullet, a short
+question) go to a faster tier with a budget sized for their answers, so they don't
+pay the latency of a full analysis. Rules are configurable through ``MODEL_ROUTES``
+and every routed call is counted per route and model.
+"""
+
+import os
+import re
+import json
+import logging
+import threading
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from utils.conversation import estimate_tokens, message_tokens
+
+logger = logging.getLogger("resume_reviewer")
+
+# Request classes
+REVIEW = "review"
+JOB_MATCH = "job_match"
+REPORT = "report"
+REWRITE = "rewrite"
+QA = "qa"
+SUMMARY = "summary"
+
+REQUEST_CLASSES = (REVIEW, JOB_MATCH, REPORT, REWRITE, QA, SUMMARY)
+
+# Per-class rules. ``max_tokens: None`` means ANTHROPIC_MAX_TOKENS; requests whose
+# estimated input exceeds ``max_input_tokens`` are escalated to the full tier.
+DEFAULT_ROUTES: Dict[str, Dict[str, Any]] = {
+    REVIEW: {"tier": "full", "max_tokens": None},
+    JOB_MATCH: {"tier": "full", "max_tokens": 2000},
+    REPORT: {"tier": "full", "max_tokens": None},
+    REWRITE: {"tier": "fast", "max_tokens": 1500, "max_input_tokens": 12000},
+    QA: {"tier": "fast", "max_tokens": 1500, "max_input_tokens": 12000},
+    SUMMARY: {"tier": "fast", "max_tokens": 512},
+}
+
+# Follow-ups asking for another complete review keep full-review quality
+_FULL_REVIEW_RE = re.compile(
+    r"\b(?:full|complete|whole|entire|thorough|comprehensive|detailed)\s+"
+    r"(?:re-?review|review|analysis|assessment|rewrite|feedback)\b"
+    r"|\b(?:re-?review|re-?analy[sz]e|rewrite)\s+(?:my|the|this)\s+(?:whole\s+|entire\s+)?(?:resume|cv)\b",
+    re.IGNORECASE,
+)
+# Explicit requests for new wording of a specific piece; "how can I improve my resume?" is a question
+_REWRITE_TARGET = (r"(?:bullets?|bullet\s+points?|points?|summary|headline|objective|sentences?|lines?|sections?|"
+                   r"paragraphs?|cover\s+letter|wording|phrasing|description|statement)")
+_REWRITE_RE = re.compile(
+    r"\b(?:re-?write|re-?phrase|re-?word|paraphrase)\b"
+    r"|\bmake\s+(?:it|this|these|that|them|the|my)\s+(?:\w+\s+){0,2}"
+    r"(?:punchier|shorter|stronger|crisper|more\s+\w+|less\s+\w+)"
+    r"|\b(?:write|draft)\s+(?:me\s+)?(?:a|an|the|my|some)\s+(?:new\s+|better\s+|stronger\s+)?" + _REWRITE_TARGET +
+    r"|\b(?:improve|fix|polish|strengthen|edit|tighten|shorten|condense|quantify)\s+(?:this|these|that|my|the)\s+"
+    r"(?:\w+\s+)?" + _REWRITE_TARGET + r"\b",
+    re.IGNORECASE,
+)
+# Follow-ups longer than this usually paste content to rework
+REWRITE_MIN_TOKENS = 150
+
+
+class Route(NamedTuple):
+    """The route a call took; recorded in its usage and the router stats."""
+
+    request_class: str
+    tier: str
+    model: str
+    max_tokens: int
+    input_tokens: int
+    reason: str
+
+
+def _load_rules(value: str) -> Dict[str, Dict[str, Any]]:
+    """Parse ``MODEL_ROUTES``: inline JSON or the path of a JSON file."""
+    if not value:
+        return {}
+    try:
+        if value.lstrip().startswith("{"):
+            return json.loads(value)
+        with open(value, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring invalid MODEL_ROUTES ({e}); using the default routes")
+        return {}
+
+
+def estimate_input_tokens(system: Any = "", messages: Optional[List[Dict[str, Any]]] = None) -> int:
+    """Estimate the input tokens of a request from its system prompt and messages."""
+    if isinstance(system, list):
+        system = "".join(block.get("text", "") for block in system if isinstance(block, dict))
+    return estimate_tokens(system or "") + sum(message_tokens(m) for m in messages or [])
+
+
+class ModelRouter:
+    """Chooses model tier and ``max_tokens`` per request class."""
+
+    def __init__(self, enabled: Optional[bool] = None, rules: Optional[Dict[str, Dict[str, Any]]] = None,
+                 tiers: Optional[Dict[str, str]] = None, default_max_tokens: Optional[int] = None):
+        """Initialize the router.
+
+        Args:
+            enabled: Route per request class; False sends everything to the full tier (``MODEL_ROUTER_ENABLED``).
+            rules: Per-class overrides of DEFAULT_ROUTES (``MODEL_ROUTES``: JSON or a JSON file path).
+                A rule may set ``tier`` or an explicit ``model``, ``max_tokens`` and ``max_input_tokens``.
+            tiers: Tier name -> model (``ANTHROPIC_MODEL`` for "full", ``ANTHROPIC_FAST_MODEL`` for "fast").
+            default_max_tokens: Output budget of full-size requests (``ANTHROPIC_MAX_TOKENS``).
+        """
+        if enabled is None:
+            enabled = os.getenv("MODEL_ROUTER_ENABLED", "true").lower() not in ("0", "false", "no")
+        self.enabled = enabled
+        full_model = os.getenv("ANTHROPIC_MODEL", "claude-3-5-sonnet-20241022")
+        self.tiers = tiers or {
+            "full": full_model,
+            "fast": os.getenv("ANTHROPIC_FAST_MODEL", "claude-3-5-haiku-20241022"),
+        }
+        self.default_max_tokens = default_max_tokens or int(os.getenv("ANTHROPIC_MAX_TOKENS", "4000"))
+        overrides = rules if rules is not None else _load_rules(os.getenv("MODEL_ROUTES", ""))
+        self.rules = {name: dict(rule) for name, rule in DEFAULT_ROUTES.items()}
+        for name, rule in overrides.items():
+            self.rules.setdefault(name, {"tier": "full", "max_tokens": None}).update(rule)
+        self._lock = threading.Lock()
+        # (request class, model) -> [calls, total seconds]
+        self._counts: Dict[tuple, List[float]] = {}
+        self.escalated = 0
+
+    @staticmethod
+    def classify_followup(messages: List[Dict[str, Any]]) -> str:
+        """Class of a chat follow-up, from its newest user turn."""
+        content = next((m.get("content") for m in reversed(messages) if m.get("role") == "user"), "")
+        if not isinstance(content, str):
+            content = "".join(block.get("text", "") for block in content if isinstance(block, dict))
+        if _FULL_REVIEW_RE.search(content):
+            return REVIEW
+        if _REWRITE_RE.search(content) or estimate_tokens(content) > REWRITE_MIN_TOKENS:
+            return REWRITE
+        return QA
+
+    def route(self, request_class: str, input_tokens: int, model: Optional[str] = None) -> Route:
+        """
+        Pick the model and output budget of a call.
+
+        Args:
+            request_class: One of REQUEST_CLASSES (unknown classes use the full tier)
+            input_tokens: Estimated input tokens of the call
+            model: Explicit model requested by the caller; it always wins
+
+        Returns:
+            The route to take
+        """
+        rule = self.rules.get(request_class) or self.rules[REVIEW]
+        max_tokens = rule.get("max_tokens") or self.default_max_tokens
+        if model is not None:
+            return Route(request_class, "explicit", model, max_tokens, input_tokens, "explicit model")
+        if not self.enabled:
+            return Route(request_class, "full", self.tiers["full"], self.default_max_tokens, input_tokens, "router disabled")
+        tier, reason = rule.get("tier", "full"), "rule"
+        limit = rule.get("max_input_tokens")
+        if tier != "full" and limit and input_tokens > limit:
+            tier, reason = "full", f"input over {limit} tokens"
+            with self._lock:
+                self.escalated += 1
+        chosen = rule.get("model") if reason == "rule" and rule.get("model") else self.tiers.get(tier, self.tiers["full"])
+        return Route(request_class, tier, chosen, max_tokens, input_tokens, reason)
+
+    def record(self, route: Route, seconds: float) -> None:
+        """Count a finished call (and its latency) against its route."""
+        with self._lock:
+            entry = self._counts.setdefault((route.request_class, route.model), [0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+        logger.debug(f"LLM route {route.request_class} -> {route.model} "
+                     f"(max_tokens {route.max_tokens}, ~{route.input_tokens} input tokens): {seconds:.2f}s")
+
+    def stats(self) -> Dict[str, Any]:
+        routes: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            for (request_class, model), (calls, seconds) in sorted(self._counts.items()):
+                routes.setdefault(request_class, {})[model] = {
+                    "calls": int(calls), "mean_latency_s": round(seconds / calls, 3) if calls else 0.0}
+            escalated = self.escalated
+        return {"enabled": self.enabled, "tiers": dict(self.tiers), "routes": routes, "escalated": escalated}
+
+
+_router: Optional[ModelRouter] = None
+_router_lock = threading.Lock()
+
+
+def get_model_router() -> ModelRouter:
+    """Return the process-wide model router, creating it on first use."""
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                _router = ModelRouter()
+    return _router
@@ -0,0 +1,335 @@
+"""
+Near-Duplicate Index
+
+This module detects resumes that are nearly identical to one already reviewed (a
+resubmission with trivial edits, or a templated bootcamp resume) so the earlier
+analysis can be reused. Normalized text is reduced to a MinHash signature over word
+shingles; signatures are bucketed with banded LSH for sub-linear lookup, verified by
+their estimated Jaccard similarity, and persisted to SQLite with incremental inserts.
+Entries expire after a TTL and only the newest ``max_entries`` are kept, so the index
+stays bounded and stops returning reviews made with long-gone prompts.
+"""
+
+import os
+import re
+import json
+import time
+import zlib
+import sqlite3
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+logger = logging.getLogger("resume_reviewer")
+
+SHINGLE_SIZE = 3
+# Universal hashing h(x) = (a * x + b) mod p over 32-bit shingle hashes
+_PRIME = np.uint64(4294967311)
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalize_text(text: str) -> List[str]:
+    """Lowercase, drop punctuation and collapse whitespace; returns the words."""
+    return _WORD_RE.findall(text.lower())
+
+
+# Candidates are verified against the full signature, so a missed duplicate (a paid LLM
+# call) costs far more than a false candidate (one vector comparison)
+FALSE_NEGATIVE_WEIGHT = 0.9
+
+
+def _optimal_bands(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """Pick (bands, rows) with bands * rows <= num_perm minimizing weighted false positives + negatives."""
+    s = np.linspace(0, 1, 201)
+    best, best_error = (1, num_perm), float("inf")
+    for bands in range(1, num_perm + 1):
+        rows = num_perm // bands
+        # Probability two documents with Jaccard s share at least one band
+        probability = 1 - (1 - s ** rows) ** bands
+        # Area of false positives below the threshold plus false negatives above it (uniform grid)
+        error = np.mean(np.where(s < threshold, (1 - FALSE_NEGATIVE_WEIGHT) * probability,
+                                 FALSE_NEGATIVE_WEIGHT * (1 - probability)))
+        if error < best_error:
+            best, best_error = (bands, rows), error
+    return best
+
+
+class NearDuplicateIndex:
+    """MinHash + LSH index of reviewed resumes with an optional SQLite store."""
+
+    def __init__(
+        self,
+        threshold: Optional[float] = None,
+        num_perm: Optional[int] = None,
+        path: Optional[str] = None,
+        enabled: Optional[bool] = None,
+        seed: int = 1,
+        ttl: Optional[float] = None,
+        max_entries: Optional[int] = None,
+    ):
+        """Initialize the index.
+
+        Args:
+            threshold: Minimum estimated Jaccard similarity to reuse a review (``NEAR_DUP_THRESHOLD``).
+            num_perm: MinHash permutations per signature (``NEAR_DUP_NUM_PERM``).
+            path: SQLite file for persistence; empty keeps the index in memory (``NEAR_DUP_PATH``).
+            enabled: Turn lookups and inserts on or off (``NEAR_DUP_ENABLED``).
+            seed: Seed of the hash permutations (must match the stored signatures).
+            ttl: Seconds an entry can be reused for (``NEAR_DUP_TTL``).
+            max_entries: Newest entries kept; older ones are dropped (``NEAR_DUP_MAX_ENTRIES``).
+        """
+        if enabled is None:
+            enabled = os.getenv("NEAR_DUP_ENABLED", "true").lower() in ("1", "true", "yes", "on")
+        self.enabled = enabled
+        self.threshold = threshold or float(os.getenv("NEAR_DUP_THRESHOLD", "0.9"))
+        self.num_perm = num_perm or int(os.getenv("NEAR_DUP_NUM_PERM", "128"))
+        if path is None:
+            path = os.getenv("NEAR_DUP_PATH", os.path.join(".cache", "near_duplicates.sqlite3"))
+        self.path = path
+        self.seed = seed
+        self.ttl = ttl or float(os.getenv("NEAR_DUP_TTL", str(7 * 86400)))
+        self.max_entries = max_entries or int(os.getenv("NEAR_DUP_MAX_ENTRIES", "10000"))
+
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, 2 ** 31 - 1, size=self.num_perm, dtype=np.int64).astype(np.uint64)
+        self._b = rng.randint(0, 2 ** 31 - 1, size=self.num_perm, dtype=np.int64).astype(np.uint64)
+        self.bands, self.rows = _optimal_bands(self.threshold, self.num_perm)
+
+        self._lock = threading.Lock()
+        self._buckets: List[Dict[bytes, Set[int]]] = [{} for _ in range(self.bands)]
+        self._signatures: Dict[int, np.ndarray] = {}
+        self._contexts: Dict[int, str] = {}
+        self._payloads: Dict[int, Dict[str, Any]] = {}
+        # entry id -> creation time, oldest first
+        self._created: Dict[int, float] = {}
+        self._last_id = 0
+        self._local = threading.local()
+
+        self.lookups = 0
+        self.hits = 0
+        self.misses = 0
+        self.inserts = 0
+        self.expired = 0
+        self.candidates_checked = 0
+
+        if self.enabled and self.path:
+            try:
+                self._init_db()
+                self._sync()
+            except sqlite3.Error as e:
+                logger.warning(f"Near-duplicate store unavailable at {self.path}: {e}")
+                self.path = ""
+
+    # --- persistence -------------------------------------------------------------
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = self._conn()
+        conn.execute("CREATE TABLE IF NOT EXISTS near_dup_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS near_dup_entries ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, context TEXT NOT NULL, signature BLOB NOT NULL, "
+            "payload TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_near_dup_created ON near_dup_entries(created_at)")
+        # Signatures from a different hash family or LSH banding can't be compared; start over
+        layout = json.dumps({"num_perm": self.num_perm, "seed": self.seed, "bands": self.bands, "rows": self.rows})
+        row = conn.execute("SELECT value FROM near_dup_meta WHERE key = 'layout'").fetchone()
+        if row is not None and row[0] != layout:
+            logger.warning("Near-duplicate store was built with different MinHash/LSH settings; clearing it")
+            conn.execute("DELETE FROM near_dup_entries")
+        conn.execute("INSERT OR REPLACE INTO near_dup_meta (key, value) VALUES ('layout', ?)", (layout,))
+        conn.commit()
+
+    def _sync(self) -> None:
+        """Load entries inserted since the last sync (including by other processes)."""
+        rows = self._conn().execute(
+            "SELECT id, context, signature, created_at FROM near_dup_entries WHERE id > ? AND created_at >= ? ORDER BY id",
+            (self._last_id, time.time() - self.ttl),
+        ).fetchall()
+        for entry_id, context, blob, created_at in rows:
+            self._add(entry_id, context, np.frombuffer(blob, dtype=np.uint32), created_at)
+
+    def _add(self, entry_id: int, context: str, signature: np.ndarray, created_at: float) -> None:
+        with self._lock:
+            if entry_id in self._signatures:
+                return
+            self._signatures[entry_id] = signature
+            self._contexts[entry_id] = context
+            self._created[entry_id] = created_at
+            for band, key in enumerate(self._band_keys(signature)):
+                self._buckets[band].setdefault(key, set()).add(entry_id)
+            self._last_id = max(self._last_id, entry_id)
+            self._expire()
+
+    def _expire(self) -> None:
+        """Drop entries past the TTL or older than the newest ``max_entries`` (caller holds the lock)."""
+        cutoff = time.time() - self.ttl
+        floor = self._last_id - self.max_entries
+        stale = []
+        # Entries are held oldest first, so the scan stops at the first live one
+        for entry_id, created_at in self._created.items():
+            if entry_id > floor and created_at >= cutoff:
+                break
+            stale.append(entry_id)
+        for entry_id in stale:
+            signature = self._signatures.pop(entry_id)
+            for band, key in enumerate(self._band_keys(signature)):
+                bucket = self._buckets[band].get(key)
+                if bucket is not None:
+                    bucket.discard(entry_id)
+                    if not bucket:
+                        del self._buckets[band][key]
+            del self._contexts[entry_id], self._created[entry_id]
+            self._payloads.pop(entry_id, None)
+        self.expired += len(stale)
+
+    # --- MinHash / LSH -----------------------------------------------------------
+
+    def signature(self, text: str) -> np.ndarray:
+        """
+        Compute the MinHash signature of a text.
+
+        Args:
+            text: Resume text
+
+        Returns:
+            uint32 array of length ``num_perm``
+        """
+        words = normalize_text(text)
+        if len(words) >= SHINGLE_SIZE:
+            shingles = {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+        else:
+            shingles = {" ".join(words)}
+        hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+        permuted = ((self._a[:, None] * hashes[None, :] + self._b[:, None]) % _PRIME) & _MAX_HASH
+        return permuted.min(axis=1).astype(np.uint32)
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+
+    def query(self, signature: np.ndarray, context: str = "") -> Optional[Tuple[int, float]]:
+        """
+        Find the most similar indexed resume above the threshold.
+
+        Args:
+            signature: MinHash signature of the resume
+            context: Lookup scope (e.g. the target job title); only entries with the same context match
+
+        Returns:
+            Tuple of (entry id, estimated Jaccard similarity), or None
+        """
+        if self.path:
+            try:
+                self._sync()
+            except sqlite3.Error as e:
+                logger.warning(f"Near-duplicate store sync failed: {e}")
+        with self._lock:
+            self._expire()
+            candidates: Set[int] = set()
+            for band, key in enumerate(self._band_keys(signature)):
+                candidates |= self._buckets[band].get(key, set())
+            best: Optional[Tuple[int, float]] = None
+            for entry_id in candidates:
+                if self._contexts[entry_id] != context:
+                    continue
+                similarity = float(np.mean(self._signatures[entry_id] == signature))
+                if similarity >= self.threshold and (best is None or similarity > best[1]):
+                    best = (entry_id, similarity)
+            self.candidates_checked += len(candidates)
+            self.lookups += 1
+            if best is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return best
+
+    def payload(self, entry_id: int) -> Optional[Dict[str, Any]]:
+        """Return the stored payload (e.g. the earlier analysis) of an entry."""
+        if entry_id in self._payloads:
+            return self._payloads[entry_id]
+        if not self.path:
+            return None
+        row = self._conn().execute("SELECT payload FROM near_dup_entries WHERE id = ?", (entry_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def insert(self, signature: np.ndarray, payload: Dict[str, Any], context: str = "") -> int:
+        """
+        Add a reviewed resume to the index.
+
+        Args:
+            signature: MinHash signature of the resume
+            payload: JSON-serializable data to return for near-duplicates
+            context: Lookup scope the entry belongs to
+
+        Returns:
+            The new entry id
+        """
+        now = time.time()
+        if self.path:
+            conn = self._conn()
+            cursor = conn.execute(
+                "INSERT INTO near_dup_entries (context, signature, payload, created_at) VALUES (?, ?, ?, ?)",
+                (context, signature.astype(np.uint32).tobytes(), json.dumps(payload), now),
+            )
+            entry_id = cursor.lastrowid
+            # Trim the shared store along with the in-memory index
+            conn.execute("DELETE FROM near_dup_entries WHERE created_at < ? OR id <= ?",
+                         (now - self.ttl, entry_id - self.max_entries))
+            conn.commit()
+        else:
+            with self._lock:
+                # Claim the id in the same critical section, so concurrent inserts never share one
+                entry_id = self._last_id = self._last_id + 1
+                self._payloads[entry_id] = payload
+        self._add(entry_id, context, signature, now)
+        with self._lock:
+            self.inserts += 1
+        return entry_id
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "threshold": self.threshold,
+            "num_perm": self.num_perm,
+            "bands": self.bands,
+            "rows": self.rows,
+            "entries": len(self._signatures),
+            "ttl": self.ttl,
+            "max_entries": self.max_entries,
+            "expired": self.expired,
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "misses": self.misses,
+            "inserts": self.inserts,
+            "hit_rate": round(self.hits / self.lookups, 4) if self.lookups else 0.0,
+            "candidates_checked": self.candidates_checked,
+            "path": self.path or None,
+        }
+
+
+_index: Optional[NearDuplicateIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_near_duplicate_index() -> NearDuplicateIndex:
+    """Return the process-wide near-duplicate index, creating it on first use."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = NearDuplicateIndex()
+    return _index
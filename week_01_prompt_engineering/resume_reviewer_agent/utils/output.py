@@ -2,9 +2,20 @@
 Output Utilities
 
 This module provides utilities for formatting and presenting feedback output.
+Reports are rendered section by section, so a structured review can be shown while
+it is still streaming (see IncrementalReportRenderer) as well as all at once.
 """
 
-from typing import Dict, Any, List, Tuple
+import io
+import json
+from typing import Dict, Any, Iterator, List, Optional
+
+from pydantic import ValidationError
+
+from utils.structured_review import REVIEW_SECTIONS, SectionReview, JobMatchReview
+from utils.metrics import timed
+
+REPORT_TITLE = "# Resume Analysis Report\n\n"
 
 def format_overall_score(score: int) -> str:
     """
@@ -43,22 +54,20 @@ def format_section_feedback(section_name: str, assessment: str, issues: List[str
     # Determine emoji based on assessment
     emoji = "✅" if assessment == "Strong" else "⚠️" if assessment == "Needs Improvement" else "📝"
     
-    # Build the feedback string
-    feedback = f"## {emoji} {section_name}: {assessment}\n\n"
+    # Build the feedback in a list and join once
+    parts = [f"## {emoji} {section_name}: {assessment}\n\n"]
     
     if issues:
-        feedback += "**Issues:**\n"
-        for issue in issues:
-            feedback += f"- {issue}\n"
-        feedback += "\n"
+        parts.append("**Issues:**\n")
+        parts.extend(f"- {issue}\n" for issue in issues)
+        parts.append("\n")
     
     if suggestions:
-        feedback += "**Suggestions:**\n"
-        for suggestion in suggestions:
-            feedback += f"- {suggestion}\n"
-        feedback += "\n"
+        parts.append("**Suggestions:**\n")
+        parts.extend(f"- {suggestion}\n" for suggestion in suggestions)
+        parts.append("\n")
     
-    return feedback
+    return "".join(parts)
 
 def format_job_match_analysis(match_percentage: int, missing_skills: List[str], 
                             emphasis_points: List[str], suggested_keywords: List[str]) -> str:
@@ -82,30 +91,74 @@ def format_job_match_analysis(match_percentage: int, missing_skills: List[str],
     else:
         match_emoji = "⚠️"
     
-    # Build the analysis string
-    analysis = f"# Job Match Analysis\n\n"
-    analysis += f"{match_emoji} **Match Score:** {match_percentage}%\n\n"
+    # Build the analysis in a list and join once
+    parts = ["# Job Match Analysis\n\n", f"{match_emoji} **Match Score:** {match_percentage}%\n\n"]
     
-    if missing_skills:
-        analysis += "## Missing Skills/Requirements\n"
-        for skill in missing_skills:
-            analysis += f"- {skill}\n"
-        analysis += "\n"
+    for heading, items in (("Missing Skills/Requirements", missing_skills),
+                           ("Emphasize These Points", emphasis_points),
+                           ("Suggested Keywords to Include", suggested_keywords)):
+        if items:
+            parts.append(f"## {heading}\n")
+            parts.extend(f"- {item}\n" for item in items)
+            parts.append("\n")
     
-    if emphasis_points:
-        analysis += "## Emphasize These Points\n"
-        for point in emphasis_points:
-            analysis += f"- {point}\n"
-        analysis += "\n"
+    return "".join(parts)
+
+def format_next_steps(next_steps: List[str]) -> str:
+    """Format the numbered next steps."""
+    parts = ["## Next Steps\n\n"]
+    parts.extend(f"{i}. {step}\n" for i, step in enumerate(next_steps, 1))
+    return "".join(parts)
+
+def render_report_part(key: str, value: Any) -> Optional[str]:
+    """
+    Render one top-level field of the analysis results.
     
-    if suggested_keywords:
-        analysis += "## Suggested Keywords to Include\n"
-        for keyword in suggested_keywords:
-            analysis += f"- {keyword}\n"
-        analysis += "\n"
+    Args:
+        key: Field name (``overall_score``, a section key, ``job_match`` or ``next_steps``)
+        value: Field value
+        
+    Returns:
+        Markdown for the field, or None if it is not part of the report
+    """
+    if key == "overall_score":
+        return f"## Overall Assessment\n\n{format_overall_score(value)}\n\n"
+    if key in REVIEW_SECTIONS:
+        return format_section_feedback(
+            value.get("name", key.title()),
+            value.get("assessment", ""),
+            value.get("issues", []),
+            value.get("suggestions", [])
+        )
+    if key == "job_match":
+        return format_job_match_analysis(
+            value.get("match_percentage", 0),
+            value.get("missing_skills", []),
+            value.get("emphasis_points", []),
+            value.get("suggested_keywords", [])
+        )
+    if key == "next_steps":
+        return format_next_steps(value) if value else None
+    return None
+
+def iter_markdown_report(analysis_results: Dict[str, Any]) -> Iterator[str]:
+    """
+    Yield the markdown report one part at a time, in report order.
     
-    return analysis
+    Args:
+        analysis_results: Dictionary containing all analysis results
+        
+    Yields:
+        The title with the overall assessment, then one chunk per section, job match and next steps
+    """
+    yield REPORT_TITLE + render_report_part("overall_score", analysis_results.get("overall_score", 0))
+    for key in (*REVIEW_SECTIONS, "job_match", "next_steps"):
+        if key in analysis_results:
+            part = render_report_part(key, analysis_results[key])
+            if part:
+                yield part
 
+@timed("render")
 def generate_markdown_report(analysis_results: Dict[str, Any]) -> str:
     """
     Generate a complete markdown report from analysis results.
@@ -116,37 +169,135 @@ def generate_markdown_report(analysis_results: Dict[str, Any]) -> str:
     Returns:
         Complete markdown report
     """
-    report = "# Resume Analysis Report\n\n"
-    
-    # Add overall score
-    report += f"## Overall Assessment\n\n"
-    report += format_overall_score(analysis_results.get("overall_score", 0))
-    report += "\n\n"
-    
-    # Add section feedback
-    for section in ["structure", "summary", "experience", "education", "skills"]:
-        if section in analysis_results:
-            data = analysis_results[section]
-            report += format_section_feedback(
-                data.get("name", section.title()),
-                data.get("assessment", ""),
-                data.get("issues", []),
-                data.get("suggestions", [])
-            )
-    
-    # Add job match analysis if available
-    if "job_match" in analysis_results:
-        report += format_job_match_analysis(
-            analysis_results["job_match"].get("match_percentage", 0),
-            analysis_results["job_match"].get("missing_skills", []),
-            analysis_results["job_match"].get("emphasis_points", []),
-            analysis_results["job_match"].get("suggested_keywords", [])
-        )
-    
-    # Add next steps
-    if "next_steps" in analysis_results:
-        report += "## Next Steps\n\n"
-        for i, step in enumerate(analysis_results["next_steps"], 1):
-            report += f"{i}. {step}\n"
-    
-    return report
+    return "".join(iter_markdown_report(analysis_results))
+
+def _validate_part(key: str, value: Any) -> Any:
+    """Validate one streamed field; raises ValueError if it can't be rendered."""
+    if key == "overall_score":
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError("overall_score must be a number")
+        return int(value)
+    if key in REVIEW_SECTIONS:
+        return SectionReview.model_validate(value).model_dump()
+    if key == "job_match":
+        return JobMatchReview.model_validate(value).model_dump()
+    if key == "next_steps":
+        if not isinstance(value, list):
+            raise ValueError("next_steps must be a list")
+        return [str(step) for step in value]
+    return value
+
+class IncrementalReportRenderer:
+    """Renders a structured review while its JSON is still streaming.
+
+    Text chunks are fed in as they arrive; every top-level field of the JSON object
+    is rendered to markdown as soon as its value is complete (a section as soon as
+    its object closes). Anything before the opening brace, such as a code fence, is
+    ignored. Only the current, unfinished field is buffered.
+    """
+
+    def __init__(self, job_match: Optional[Dict[str, Any]] = None, render_job_match: bool = True):
+        """Initialize the renderer.
+        
+        Args:
+            job_match: Locally computed job match fields merged into the model's ``job_match``
+            render_job_match: Whether a ``job_match`` field is part of the report
+        """
+        self.job_match = job_match
+        self.render_job_match = render_job_match
+        self.results: Dict[str, Any] = {}
+        self._member = io.StringIO()
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._started = False
+        self._done = False
+        # The last member already ended at its closing bracket; skip it at the comma
+        self._emitted = False
+        self._title_sent = False
+
+    def _complete(self) -> Optional[str]:
+        text = self._member.getvalue().strip()
+        self._member = io.StringIO()
+        if not text:
+            return None
+        try:
+            (key, value), = json.loads("{" + text + "}").items()
+            value = _validate_part(key, value)
+        except (ValueError, ValidationError):
+            return None
+        if key == "job_match":
+            if not self.render_job_match:
+                return None
+            if self.job_match is not None:
+                value = {**self.job_match, "emphasis_points": value.get("emphasis_points", [])}
+        self.results[key] = value
+        part = render_report_part(key, value)
+        if part and not self._title_sent:
+            self._title_sent = True
+            part = REPORT_TITLE + part
+        return part
+
+    def feed(self, chunk: str) -> List[str]:
+        """
+        Consume the next piece of the response.
+        
+        Args:
+            chunk: Streamed text
+            
+        Returns:
+            Markdown for every field completed by this chunk (possibly empty)
+        """
+        parts = []
+        member = self._member
+        for char in chunk:
+            if self._done:
+                break
+            if not self._started:
+                if char == "{":
+                    self._started = True
+                    self._depth = 1
+                continue
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                member.write(char)
+                continue
+            if char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 1:
+                    # An object/array value just closed: its field is complete
+                    member.write(char)
+                    part = self._complete()
+                    member = self._member
+                    self._emitted = True
+                    if part:
+                        parts.append(part)
+                    continue
+                if self._depth == 0:
+                    if not self._emitted:
+                        part = self._complete()
+                        if part:
+                            parts.append(part)
+                    self._done = True
+                    break
+            elif char == "," and self._depth == 1:
+                if not self._emitted:
+                    part = self._complete()
+                    member = self._member
+                    if part:
+                        parts.append(part)
+                else:
+                    self._member = member = io.StringIO()
+                self._emitted = False
+                continue
+            member.write(char)
+        return parts
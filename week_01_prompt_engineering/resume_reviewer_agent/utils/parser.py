@@ -4,74 +4,286 @@ Resume Parser
 This module provides utilities for parsing and extracting information from resumes.
 """
 
+import io
 import os
 import re
-from typing import Dict, Any, List, Tuple
+import atexit
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from collections.abc import Mapping
+from typing import Dict, List, NamedTuple, Tuple, Iterator, Optional, Union, BinaryIO
 
-# Placeholder for actual implementation requiring libraries
-# from pypdf import PdfReader
-# import docx
-# from pdfminer.high_level import extract_text
+from utils.metrics import timed
 
-def extract_text_from_pdf(file_path: str) -> str:
+logger = logging.getLogger("resume_reviewer")
+
+# A resume source is a path, raw bytes, or a binary file-like object (e.g. an upload)
+ResumeSource = Union[str, bytes, BinaryIO]
+
+# Per-document limits (a CV longer than this is almost certainly not a CV)
+MAX_PAGES = int(os.getenv("PARSER_MAX_PAGES", "200"))
+MAX_FILE_BYTES = int(os.getenv("PARSER_MAX_BYTES", str(10 * 1024 * 1024)))
+# PDFs with at least this many pages are split by page range across a process pool
+PARALLEL_PAGE_THRESHOLD = int(os.getenv("PARSER_PARALLEL_PAGES", "24"))
+PARSER_WORKERS = int(os.getenv("PARSER_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+class DocumentTooLargeError(ValueError):
+    """Raised when a document exceeds the configured page or size limit."""
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(max_workers=PARSER_WORKERS)
+                atexit.register(_pool.shutdown, wait=False, cancel_futures=True)
+    return _pool
+
+def _read_bytes(source: ResumeSource) -> bytes:
+    """Read a source fully, enforcing MAX_FILE_BYTES without reading past it."""
+    if isinstance(source, bytes):
+        data = source
+    elif isinstance(source, str):
+        if os.path.getsize(source) > MAX_FILE_BYTES:
+            raise DocumentTooLargeError(f"Document exceeds {MAX_FILE_BYTES} bytes")
+        with open(source, "rb") as f:
+            data = f.read()
+    else:
+        if hasattr(source, "seek"):
+            source.seek(0)
+        data = source.read(MAX_FILE_BYTES + 1)
+    if len(data) > MAX_FILE_BYTES:
+        raise DocumentTooLargeError(f"Document exceeds {MAX_FILE_BYTES} bytes")
+    return data
+
+def _pdf_reader(data: bytes):
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        from PyPDF2 import PdfReader
+    return PdfReader(io.BytesIO(data))
+
+def iter_pdf_pages(reader, start: int = 0, stop: Optional[int] = None) -> Iterator[str]:
+    """
+    Lazily yield the text of each page of an open PDF reader.
+
+    Args:
+        reader: pypdf/PyPDF2 PdfReader
+        start: First page index
+        stop: Page index to stop before (defaults to the last page)
+
+    Yields:
+        Text of each page in order
+    """
+    stop = len(reader.pages) if stop is None else stop
+    for index in range(start, stop):
+        yield reader.pages[index].extract_text() or ""
+
+def _extract_pdf_range(data: bytes, start: int, stop: int) -> str:
+    """Extract one page range; module-level so it can run in a worker process."""
+    return "\n".join(iter_pdf_pages(_pdf_reader(data), start, stop))
+
+def extract_text_from_pdf(source: ResumeSource) -> str:
     """
     Extract text content from a PDF file.
     
     Args:
-        file_path: Path to the PDF file
+        source: Path, bytes or binary file-like object of the PDF
         
     Returns:
-        Extracted text from the PDF
+        Extracted text from the PDF, pages in order
     """
-    # Placeholder implementation
-    print(f"Extracting text from PDF: {file_path}")
-    
-    # In a real implementation:
-    # return extract_text(file_path)
-    
-    # Mock result
-    return "This is placeholder text from a PDF resume."
+    data = _read_bytes(source)
+    reader = _pdf_reader(data)
+    page_count = len(reader.pages)
+    if page_count > MAX_PAGES:
+        raise DocumentTooLargeError(f"PDF has {page_count} pages; the limit is {MAX_PAGES}")
+
+    if page_count < PARALLEL_PAGE_THRESHOLD or PARSER_WORKERS < 2:
+        # Join once at the end instead of growing a string page by page
+        return "\n".join(iter_pdf_pages(reader))
+
+    # Fan contiguous page ranges out to the pool; map() keeps them in page order
+    chunk = -(-page_count // PARSER_WORKERS)
+    ranges = [(start, min(start + chunk, page_count)) for start in range(0, page_count, chunk)]
+    pool = _get_pool()
+    parts = pool.map(_extract_pdf_range, [data] * len(ranges), *zip(*ranges))
+    return "\n".join(parts)
+
+def iter_docx_paragraphs(document) -> Iterator[str]:
+    """
+    Lazily yield paragraph text from an open python-docx Document, followed by table cells.
+
+    Args:
+        document: python-docx Document
 
-def extract_text_from_docx(file_path: str) -> str:
+    Yields:
+        Text of each paragraph / table cell
+    """
+    for paragraph in document.paragraphs:
+        yield paragraph.text
+    for table in document.tables:
+        for row in table.rows:
+            yield " | ".join(cell.text for cell in row.cells)
+
+def extract_text_from_docx(source: ResumeSource) -> str:
     """
     Extract text content from a DOCX file.
     
     Args:
-        file_path: Path to the DOCX file
+        source: Path, bytes or binary file-like object of the DOCX
         
     Returns:
         Extracted text from the DOCX
     """
-    # Placeholder implementation
-    print(f"Extracting text from DOCX: {file_path}")
-    
-    # In a real implementation:
-    # doc = docx.Document(file_path)
-    # return "\n".join([para.text for para in doc.paragraphs])
-    
-    # Mock result
-    return "This is placeholder text from a DOCX resume."
+    from docx import Document
+    document = Document(io.BytesIO(_read_bytes(source)))
+    return "\n".join(iter_docx_paragraphs(document))
 
-def extract_resume_text(file_path: str) -> str:
+def extract_text_from_txt(source: ResumeSource) -> str:
     """
-    Extract text from a resume file (PDF or DOCX).
+    Read a plain-text resume.
+
+    Args:
+        source: Path, bytes or binary file-like object of the text file
+
+    Returns:
+        Decoded text
+    """
+    return _read_bytes(source).decode("utf-8", errors="replace")
+
+@timed("extraction")
+def extract_resume_text(file_path: ResumeSource, filename: Optional[str] = None) -> str:
+    """
+    Extract text from a resume file (PDF, DOCX or TXT).
     
     Args:
-        file_path: Path to the resume file
+        file_path: Path to the resume file, or its bytes / a file-like object
+        filename: Original file name, used for the format when ``file_path`` isn't a path
         
     Returns:
         Extracted text from the resume
     """
-    _, file_extension = os.path.splitext(file_path)
+    name = filename or (file_path if isinstance(file_path, str) else getattr(file_path, "name", ""))
+    _, file_extension = os.path.splitext(name or "")
     
     if file_extension.lower() == '.pdf':
         return extract_text_from_pdf(file_path)
     elif file_extension.lower() in ['.docx', '.doc']:
         return extract_text_from_docx(file_path)
+    elif file_extension.lower() == '.txt':
+        return extract_text_from_txt(file_path)
     else:
         raise ValueError(f"Unsupported file format: {file_extension}")
 
-def extract_resume_sections(text: str) -> Dict[str, str]:
+# Header phrases per section; matching is case-insensitive, so "SKILLS" and "Skills:" both count
+SECTION_HEADERS: Dict[str, Tuple[str, ...]] = {
+    "summary": ("professional summary", "career summary", "executive summary", "summary", "objective",
+                "career objective", "profile", "professional profile", "about me"),
+    "experience": ("work experience", "professional experience", "experience", "employment history",
+                   "employment", "work history", "career history", "research experience", "teaching experience"),
+    "education": ("education", "education and training", "academic background", "qualifications", "degrees"),
+    "skills": ("technical skills", "skills", "key skills", "core competencies", "competencies", "expertise",
+               "proficiencies"),
+    # Recognised so they end the previous section; kept together (with their headers) under "other"
+    "other": ("projects", "certifications", "certificates", "awards", "honors", "honours", "publications",
+              "languages", "interests", "hobbies", "volunteer experience", "volunteering", "references",
+              "achievements", "presentations", "grants", "activities", "patents", "additional information"),
+}
+SECTION_NAMES = ("contact_info", "summary", "experience", "education", "skills", "other")
+
+def _header_alternation(phrases: Tuple[str, ...]) -> str:
+    words = lambda phrase: r"[ \t]+".join("(?:and|&)" if w == "and" else re.escape(w) for w in phrase.split())
+    # Longest first so "work experience" is tried before "experience"
+    return "|".join(words(p) for p in sorted(phrases, key=len, reverse=True))
+
+# One pattern for every header: a whole line holding only the header (optionally
+# decorated with "#", "*", "-" or "=" and followed by a colon and inline content).
+# Every quantifier is over a single character class and each alternative starts with
+# a literal, so a failed attempt costs time proportional to that line only: no nested
+# repetition, no catastrophic backtracking. The decoration prefix is matched
+# atomically (lookahead + backreference) so it is never re-tried character by character.
+SECTION_HEADER_RE = re.compile(
+    r"^(?=(?P<_decoration>[ \t#*\-=•]*))(?P=_decoration)(?:"
+    + "|".join(f"(?P<{name}>{_header_alternation(phrases)})" for name, phrases in SECTION_HEADERS.items())
+    + r")[ \t\r#*\-=•]*(?::[ \t]*|$)",
+    re.IGNORECASE | re.MULTILINE,
+)
+
+class SectionSpan(NamedTuple):
+    """Offsets of one section in the resume text: its header starts at ``header_start``,
+    its content is ``text[start:end]``."""
+    name: str
+    header_start: int
+    start: int
+    end: int
+
+class ResumeSections(Mapping):
+    """
+    Read-only mapping of section name to section text.
+
+    Holds the original text and the section spans found in it; each section's string
+    is only built (and then memoised) the first time it is looked up.
+    """
+
+    def __init__(self, text: str, spans: List[SectionSpan]):
+        self.text = text
+        self.spans = spans
+        self._materialized: Dict[str, str] = {}
+
+    def spans_for(self, name: str) -> List[SectionSpan]:
+        return [span for span in self.spans if span.name == name]
+
+    def __getitem__(self, name: str) -> str:
+        if name not in SECTION_NAMES:
+            raise KeyError(name)
+        value = self._materialized.get(name)
+        if value is None:
+            # "other" sections keep their header line, since it's the only label they have
+            parts = (self.text[span.header_start if name == "other" else span.start:span.end].strip()
+                     for span in self.spans_for(name))
+            value = self._materialized[name] = "\n\n".join(part for part in parts if part)
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(SECTION_NAMES)
+
+    def __len__(self) -> int:
+        return len(SECTION_NAMES)
+
+    def __repr__(self) -> str:
+        return f"ResumeSections({[(s.name, s.start, s.end) for s in self.spans]})"
+
+def find_section_spans(text: str) -> List[SectionSpan]:
+    """
+    Locate the sections of a resume in a single pass over the text.
+
+    Args:
+        text: Full text of the resume
+
+    Returns:
+        Spans in document order. Text before the first header is ``contact_info``;
+        a resume without any recognised header is returned whole as ``other``.
+    """
+    spans: List[SectionSpan] = []
+    previous: Optional[re.Match] = None
+    for match in SECTION_HEADER_RE.finditer(text):
+        if previous is None:
+            spans.append(SectionSpan("contact_info", 0, 0, match.start()))
+        else:
+            spans.append(SectionSpan(previous.lastgroup, previous.start(), previous.end(), match.start()))
+        previous = match
+    if previous is None:
+        return [SectionSpan("other", 0, 0, len(text))]
+    spans.append(SectionSpan(previous.lastgroup, previous.start(), previous.end(), len(text)))
+    return spans
+
+@timed("sectioning")
+def extract_resume_sections(text: str) -> ResumeSections:
     """
     Extract different sections from resume text.
     
@@ -79,55 +291,22 @@ def extract_resume_sections(text: str) -> Dict[str, str]:
         text: Full text of the resume
         
     Returns:
-        Dictionary with section names as keys and section content as values
-    """
-    # This is a simplified version. In a real implementation, you'd use more
-    # sophisticated NLP to identify sections accurately.
-    sections = {
-        "contact_info": "",
-        "summary": "",
-        "experience": "",
-        "education": "",
-        "skills": "",
-        "other": ""
-    }
-    
-    # Simple regex patterns for section headers (would need to be more robust in reality)
-    patterns = {
-        "summary": r"(?i)(Professional Summary|Summary|Objective|Profile)",
-        "experience": r"(?i)(Experience|Work Experience|Employment|Work History)",
-        "education": r"(?i)(Education|Academic Background|Qualifications|Degrees)",
-        "skills": r"(?i)(Skills|Expertise|Competencies|Proficiencies|Technical Skills)"
-    }
-    
-    # Placeholder for actual section extraction logic
-    print("Extracting sections from resume text")
-    
-    # Mock result
-    sections = {
-        "contact_info": "John Doe\njohndoe@example.com\n123-456-7890",
-        "summary": "Experienced software engineer with 5 years of Python development.",
-        "experience": "Software Engineer, ABC Inc. (2018-Present)\nDeveloped web applications using Python and Flask.",
-        "education": "B.S. Computer Science, XYZ University (2014-2018)",
-        "skills": "Python, JavaScript, SQL, Git, Docker",
-        "other": "Languages: English (Native), Spanish (Intermediate)"
-    }
-    
-    return sections
+        Mapping with section names as keys and section content as values
+        (contact_info, summary, experience, education, skills, other; missing sections are empty)
+    """
+    return ResumeSections(text, find_section_spans(text))
 
-def extract_keywords(text: str) -> List[str]:
+def extract_keywords(text: str, top_k: int = 15) -> List[str]:
     """
     Extract important keywords from text.
     
     Args:
         text: Text to extract keywords from
+        top_k: Maximum number of keywords to return
         
     Returns:
-        List of keywords
+        List of keywords (skills, roles and soft skills), most relevant first
     """
-    # Placeholder for actual keyword extraction logic
-    # In a real implementation, you might use NLP techniques like TF-IDF
-    print("Extracting keywords from text")
-    
-    # Mock result
-    return ["Python", "JavaScript", "software engineer", "web development", "Flask"]
+    # Imported lazily so parser worker processes don't load NumPy unless they need it
+    from utils.keywords import extract_keywords_batch
+    return extract_keywords_batch([text], top_k)[0]
@@ -0,0 +1,102 @@
+"""
+Prompt Prefix Caching
+
+This module provides helpers for building Anthropic requests whose stable prefix
+(reviewer instructions, resume text and job title, plus the chat history that came
+before the current turn) is marked for provider-side prompt caching, so follow-up
+turns only pay full price for the new message.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+CACHE_CONTROL = {"type": "ephemeral"}
+
+# Flag on a "system" message whose content changes between turns (the rolling
+# conversation summary); it is sent after the cached prefix instead of inside it
+UNCACHED = "uncached"
+
+USAGE_FIELDS = (
+    "input_tokens",
+    "output_tokens",
+    "cache_creation_input_tokens",
+    "cache_read_input_tokens",
+)
+
+
+def cached_system(system_prompt: str, uncached: Sequence[str] = ()) -> List[Dict[str, Any]]:
+    """
+    Wrap a system prompt in a single text block marked as a cache breakpoint.
+
+    Args:
+        system_prompt: The stable system prompt (instructions + resume + job title)
+        uncached: Volatile system texts (e.g. the conversation summary), sent as plain
+            blocks after the breakpoint so changing them never rewrites the cached prefix
+
+    Returns:
+        System content blocks for ``messages.create``
+    """
+    blocks = [{"type": "text", "text": system_prompt, "cache_control": CACHE_CONTROL}]
+    return blocks + [{"type": "text", "text": text} for text in uncached]
+
+
+def _as_blocks(content: Any) -> List[Dict[str, Any]]:
+    if isinstance(content, str):
+        return [{"type": "text", "text": content}]
+    return [dict(block) for block in content]
+
+
+def mark_history_breakpoint(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Return a copy of the conversation with a cache breakpoint on the last message
+    before the current turn, so everything up to the new user message is cached.
+
+    Args:
+        messages: User/assistant messages, the last one being the new turn
+
+    Returns:
+        New list of messages; the input is left untouched
+    """
+    marked = [dict(m) for m in messages]
+    if len(marked) < 2:
+        return marked
+    previous = marked[-2]
+    blocks = _as_blocks(previous["content"])
+    if blocks:
+        blocks[-1]["cache_control"] = CACHE_CONTROL
+    previous["content"] = blocks
+    return marked
+
+
+def split_system_messages(messages: List[Dict[str, Any]]) -> Tuple[List[str], List[Dict[str, Any]]]:
+    """
+    Separate "system" entries (which Anthropic does not accept as a message role)
+    from the user/assistant conversation.
+
+    Args:
+        messages: Chat history possibly containing system messages
+
+    Returns:
+        Tuple of (stable system message texts, remaining conversation); system
+        messages flagged ``UNCACHED`` are left out (see ``uncached_system_parts``)
+    """
+    system_parts = [m["content"] for m in messages if m["role"] == "system" and not m.get(UNCACHED)]
+    chat = [m for m in messages if m["role"] != "system"]
+    return system_parts, chat
+
+
+def uncached_system_parts(messages: List[Dict[str, Any]]) -> List[str]:
+    """Texts of the system messages flagged ``UNCACHED``, in order."""
+    return [m["content"] for m in messages if m["role"] == "system" and m.get(UNCACHED)]
+
+
+def usage_to_dict(usage: Optional[Any]) -> Dict[str, int]:
+    """
+    Convert an Anthropic ``usage`` object into plain token counts.
+
+    Args:
+        usage: ``response.usage`` (or None)
+
+    Returns:
+        Dictionary with input/output and cache read/write token counts
+    """
+    return {field: int(getattr(usage, field, 0) or 0) for field in USAGE_FIELDS}
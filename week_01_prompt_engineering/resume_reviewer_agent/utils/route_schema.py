@@ -4,7 +4,9 @@ Routing and schema utilities for Resume Reviewer Agent (FastAPI-ready example)
 
 from typing import Optional
 from pydantic import BaseModel
-from fastapi import APIRouter, UploadFile, File, Form
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+from utils.parser import DocumentTooLargeError
+from utils.uploads import check_upload_size
 
 # Pydantic schema for resume review request
 class ResumeReviewRequest(BaseModel):
@@ -15,7 +17,8 @@ class ResumeReviewResponse(BaseModel):
     analysis_results: dict
     report: str
 
-# FastAPI router for resume review endpoints
+# FastAPI router for resume review endpoints (add utils.uploads.UploadLimitMiddleware
+# to the app so oversized uploads are rejected before they are spooled)
 def get_resume_router(service):
     router = APIRouter()
 
@@ -34,11 +37,14 @@ def get_resume_router(service):
         resume: UploadFile = File(...),
         job_description: Optional[str] = Form(None)
     ):
-        # Save file temporarily, then pass path to service
-        temp_path = f"/tmp/{resume.filename}"
-        with open(temp_path, "wb") as f:
-            f.write(await resume.read())
-        analysis_results = service.review_resume(temp_path, job_description)
+        # Pass Starlette's spooled file to the service as a file-like object
+        try:
+            check_upload_size(resume)
+            analysis_results = service.review_resume(resume.file, job_description, filename=resume.filename)
+        except DocumentTooLargeError as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        finally:
+            await resume.close()
         report = service.generate_report(analysis_results)
         return ResumeReviewResponse(analysis_results=analysis_results, report=report)
 
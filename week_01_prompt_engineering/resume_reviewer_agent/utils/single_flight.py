@@ -0,0 +1,227 @@
+"""
+Single-Flight Request Coalescing
+
+This module makes concurrent identical LLM requests share one upstream call. A
+double-clicked review button, a Streamlit rerun in the middle of a request or
+duplicate resumes in a batch all fire the same request while the first one is still
+running; the response cache can't help until that call finishes. Callers with the
+same request fingerprint wait for the call already in flight instead. Streams fan
+out to every subscriber, and late joiners get the buffered prefix replayed first.
+"""
+
+import os
+import asyncio
+import logging
+import threading
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("resume_reviewer")
+
+
+class _Call:
+    """A blocking call in flight."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class _Broadcast:
+    """A stream in flight: the events so far, fanned out to every subscriber."""
+
+    def __init__(self):
+        self.events: List[Any] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self.task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Event()
+
+    def notify(self) -> None:
+        # Wake the current waiters and give later ones a fresh event
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def pump(self, upstream: AsyncIterator[Any]) -> None:
+        try:
+            async for event in upstream:
+                self.events.append(event)
+                self.notify()
+        except asyncio.CancelledError as e:
+            self.error = e
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
+            self.notify()
+
+    async def replay(self) -> AsyncIterator[Any]:
+        position = 0
+        while True:
+            if position < len(self.events):
+                position += 1
+                yield self.events[position - 1]
+            elif self.done:
+                if self.error is not None:
+                    raise self.error
+                return
+            else:
+                await self._changed.wait()
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key (sync, async and streaming)."""
+
+    def __init__(self, enabled: Optional[bool] = None):
+        """Initialize the coalescer.
+
+        Args:
+            enabled: Turn coalescing on or off (``LLM_COALESCE_ENABLED``).
+        """
+        if enabled is None:
+            enabled = os.getenv("LLM_COALESCE_ENABLED", "true").lower() in ("1", "true", "yes", "on")
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        # Tasks and broadcasts belong to one event loop, so they are keyed by (loop, key)
+        self._tasks: Dict[Tuple[Any, str], asyncio.Task] = {}
+        self._streams: Dict[Tuple[Any, str], _Broadcast] = {}
+        self.issued = 0
+        self.coalesced = 0
+        self.streams_issued = 0
+        self.streams_coalesced = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Run ``fn`` unless an identical call is already in flight, then share its outcome.
+
+        Args:
+            key: Request fingerprint
+            fn: The blocking call
+
+        Returns:
+            Tuple of (result, whether it was shared from another caller's call)
+        """
+        if not self.enabled:
+            return fn(), False
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.issued += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result, False
+
+    def _forget(self, mapping: Dict, key: Tuple[Any, str], entry: Any, task: asyncio.Task) -> None:
+        with self._lock:
+            if mapping.get(key) is entry:
+                del mapping[key]
+        if not task.cancelled():
+            # Mark the error as seen even if every waiter went away
+            task.exception()
+
+    async def ado(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Async counterpart of ``do``.
+
+        The call runs as its own task, so it finishes (and can fill the response
+        cache) even if the caller that started it is cancelled.
+        """
+        if not self.enabled:
+            return await factory(), False
+        loop = asyncio.get_running_loop()
+        flight = (loop, key)
+        with self._lock:
+            task = self._tasks.get(flight)
+            leader = task is None
+            if leader:
+                task = self._tasks[flight] = loop.create_task(factory())
+                task.add_done_callback(lambda t: self._forget(self._tasks, flight, t, t))
+                self.issued += 1
+            else:
+                self.coalesced += 1
+        return await asyncio.shield(task), not leader
+
+    def subscribe(self, key: str, factory: Callable[[], AsyncIterator[Any]]) -> Tuple[AsyncIterator[Any], bool]:
+        """
+        Join the stream in flight for ``key``, or start it.
+
+        Every subscriber receives all events from the start: late joiners get the
+        buffered prefix replayed, then follow live. The upstream stream is cancelled
+        once its last subscriber goes away. Must be called from the event loop.
+
+        Returns:
+            Tuple of (event iterator, whether the stream is shared with an earlier subscriber)
+        """
+        if not self.enabled:
+            return factory(), False
+        loop = asyncio.get_running_loop()
+        flight = (loop, key)
+        with self._lock:
+            broadcast = self._streams.get(flight)
+            leader = broadcast is None
+            if leader:
+                broadcast = self._streams[flight] = _Broadcast()
+                broadcast.task = loop.create_task(broadcast.pump(factory()))
+                broadcast.task.add_done_callback(lambda t: self._forget(self._streams, flight, broadcast, t))
+                self.streams_issued += 1
+            else:
+                self.streams_coalesced += 1
+            broadcast.subscribers += 1
+        return self._follow(flight, broadcast), not leader
+
+    async def _follow(self, flight: Tuple[Any, str], broadcast: _Broadcast) -> AsyncIterator[Any]:
+        try:
+            async for event in broadcast.replay():
+                yield event
+        finally:
+            with self._lock:
+                broadcast.subscribers -= 1
+                abandoned = broadcast.subscribers == 0 and not broadcast.done
+                if abandoned and self._streams.get(flight) is broadcast:
+                    # Nobody is listening any more; later callers start a fresh stream
+                    del self._streams[flight]
+            if abandoned:
+                broadcast.task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "issued": self.issued,
+                "coalesced": self.coalesced,
+                "streams_issued": self.streams_issued,
+                "streams_coalesced": self.streams_coalesced,
+                "in_flight": len(self._calls) + len(self._tasks) + len(self._streams),
+            }
+
+
+_flights: Optional[SingleFlight] = None
+_flights_lock = threading.Lock()
+
+
+def get_single_flight() -> SingleFlight:
+    """Return the process-wide coalescer, creating it on first use."""
+    global _flights
+    if _flights is None:
+        with _flights_lock:
+            if _flights is None:
+                _flights = SingleFlight()
+    return _flights
@@ -0,0 +1,69 @@
+"""
+Structured Review
+
+This module defines the JSON payload of the single-call review mode: an overall score,
+one assessment per resume section, an optional job match and next steps, i.e. exactly
+what utils.output.generate_markdown_report renders. Model output is validated with
+Pydantic; anything that doesn't parse returns None so callers can fall back to the
+two-call (analysis, then report) path.
+"""
+
+import re
+import json
+from typing import List, Optional
+
+from pydantic import BaseModel, Field, ValidationError
+
+# Keys of the per-section assessments, in report order
+REVIEW_SECTIONS = ("structure", "summary", "experience", "education", "skills")
+
+_FENCE_RE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+
+class SectionReview(BaseModel):
+    name: str
+    assessment: str
+    issues: List[str] = Field(default_factory=list)
+    suggestions: List[str] = Field(default_factory=list)
+
+
+class JobMatchReview(BaseModel):
+    match_percentage: int = Field(default=0, ge=0, le=100)
+    missing_skills: List[str] = Field(default_factory=list)
+    emphasis_points: List[str] = Field(default_factory=list)
+    suggested_keywords: List[str] = Field(default_factory=list)
+
+
+class StructuredReview(BaseModel):
+    overall_score: int = Field(ge=0, le=100)
+    structure: Optional[SectionReview] = None
+    summary: Optional[SectionReview] = None
+    experience: Optional[SectionReview] = None
+    education: Optional[SectionReview] = None
+    skills: Optional[SectionReview] = None
+    job_match: Optional[JobMatchReview] = None
+    next_steps: List[str] = Field(default_factory=list)
+
+
+def parse_structured_review(text: str) -> Optional[StructuredReview]:
+    """
+    Parse and validate a model response.
+
+    Args:
+        text: Model output; a JSON object, optionally in a code fence or with surrounding prose
+
+    Returns:
+        The validated review, or None if the output is not a valid review
+    """
+    text = _FENCE_RE.sub("", text.strip())
+    start, end = text.find("{"), text.rfind("}")
+    if start < 0 or end < start:
+        return None
+    try:
+        review = StructuredReview.model_validate(json.loads(text[start:end + 1]))
+    except (ValueError, ValidationError):
+        return None
+    # A review without a single section assessment is not worth rendering
+    if all(getattr(review, section) is None for section in REVIEW_SECTIONS):
+        return None
+    return review
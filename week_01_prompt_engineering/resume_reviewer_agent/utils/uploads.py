@@ -0,0 +1,106 @@
+"""
+Upload Limits
+
+Starlette receives and spools a whole multipart body before a route runs, so an
+upload's size has to be enforced while the body arrives, not in the route. This
+module provides an ASGI middleware that rejects a multipart request whose declared
+Content-Length is over the limit before any of it is read, and stops a chunked body
+as soon as it passes the limit. Routes then hand the spooled ``UploadFile.file``
+straight to the parser.
+"""
+
+import os
+from typing import Any, Callable, Dict, Optional
+
+from utils.parser import MAX_FILE_BYTES, DocumentTooLargeError
+
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(MAX_FILE_BYTES)))
+# Allowance for the multipart framing and form fields sent alongside the file
+UPLOAD_OVERHEAD_BYTES = 64 * 1024
+
+
+class UploadTooLargeError(DocumentTooLargeError):
+    """Raised when an upload exceeds UPLOAD_MAX_BYTES."""
+
+
+def check_upload_size(upload, max_bytes: Optional[int] = None) -> None:
+    """
+    Reject an uploaded file over the size limit.
+
+    The middleware already capped the whole request body; this checks the file part
+    itself, whose size Starlette records while spooling it.
+
+    Args:
+        upload: FastAPI ``UploadFile``
+        max_bytes: Maximum accepted size; defaults to ``UPLOAD_MAX_BYTES``
+
+    Raises:
+        UploadTooLargeError: If the file is larger than ``max_bytes``
+    """
+    max_bytes = max_bytes or UPLOAD_MAX_BYTES
+    size = getattr(upload, "size", None)
+    if size is not None and size > max_bytes:
+        raise UploadTooLargeError(f"Upload exceeds {max_bytes} bytes")
+
+
+class UploadLimitMiddleware:
+    """ASGI middleware capping the body of multipart requests at ``UPLOAD_MAX_BYTES``
+    (plus the multipart overhead) with a 413, before Starlette spools it."""
+
+    def __init__(self, app: Callable, max_bytes: Optional[int] = None):
+        self.app = app
+        self.max_bytes = (max_bytes or UPLOAD_MAX_BYTES) + UPLOAD_OVERHEAD_BYTES
+
+    async def _reject(self, send: Callable) -> None:
+        body = b'{"detail":"Upload exceeds %d bytes"}' % (self.max_bytes - UPLOAD_OVERHEAD_BYTES)
+        await send({"type": "http.response.start", "status": 413,
+                    "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]})
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        if not headers.get(b"content-type", b"").startswith(b"multipart/form-data"):
+            await self.app(scope, receive, send)
+            return
+        try:
+            declared = int(headers.get(b"content-length", b""))
+        except ValueError:
+            declared = None
+        if declared is not None and declared > self.max_bytes:
+            # Nothing has been read yet; the client learns before sending the body
+            await self._reject(send)
+            return
+
+        received = 0
+        state = {"started": False, "rejected": False}
+
+        async def limited_receive() -> Dict[str, Any]:
+            nonlocal received
+            if state["rejected"]:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes and not state["started"]:
+                    # Answer now and tell the app the client went away, so it stops parsing
+                    state["rejected"] = True
+                    await self._reject(send)
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def guarded_send(message: Dict[str, Any]) -> None:
+            if state["rejected"]:
+                # The 413 has been sent; drop whatever the app answers to the disconnect
+                return
+            if message["type"] == "http.response.start":
+                state["started"] = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            if not state["rejected"]:
+                raise
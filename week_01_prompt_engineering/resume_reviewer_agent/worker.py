@@ -0,0 +1,163 @@
+"""
+Review Worker
+
+Drains the durable review job queue (see api/jobs.py). Each worker process claims one
+job at a time, keeps its lease alive while the LLM calls run, and stores the result.
+Workers run independently of the API, on the same host (the queue is a SQLite file).
+
+Usage:
+    python worker.py --processes 4
+"""
+
+import os
+import time
+import signal
+import uuid
+import socket
+import logging
+import argparse
+import threading
+import multiprocessing
+from typing import Any, Dict, Optional
+
+from dotenv import load_dotenv
+
+from api.jobs import JobStore
+from api.service import ResumeReviewService
+from utils.llm_limits import LLMCircuitOpenError, LLMError
+
+logger = logging.getLogger("resume_reviewer")
+
+
+def process_job(service: ResumeReviewService, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run a full review (analysis + report) for one job payload.
+
+    Args:
+        service: Review service to use
+        payload: Job payload with resume_text, job_description and optional messages
+
+    Returns:
+        Job result with analysis_results, report and usage
+    """
+    analysis_results = service.review_resume_text(
+        payload["resume_text"], payload.get("job_description"), payload.get("messages") or []
+    )
+    usage = analysis_results.pop("usage", None)
+    # LLM failures raise LLMError, so the job is retried instead of storing an error as a result
+    report = service.generate_report(analysis_results)
+    return {"analysis_results": analysis_results, "report": report, "usage": usage}
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Whether another attempt at a job could succeed; rejected requests and bad payloads won't."""
+    if isinstance(exc, LLMCircuitOpenError):
+        # The provider is expected back after the breaker's cooldown
+        return True
+    if isinstance(exc, LLMError):
+        return exc.retryable
+    return not isinstance(exc, (ValueError, KeyError, TypeError))
+
+
+class _LeaseKeeper(threading.Thread):
+    """Extends a job's visibility timeout while it is being processed."""
+
+    def __init__(self, store: JobStore, job_id: str, worker_id: str):
+        super().__init__(daemon=True)
+        self.store = store
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.stopped = threading.Event()
+
+    def run(self) -> None:
+        interval = max(1.0, self.store.visibility_timeout / 3)
+        while not self.stopped.wait(interval):
+            if not self.store.heartbeat(self.job_id, self.worker_id):
+                logger.warning(f"Lost lease on job {self.job_id}")
+                return
+
+
+def run_worker(worker_id: Optional[str] = None, poll_interval: float = 1.0, stop_event=None, max_jobs: Optional[int] = None) -> int:
+    """
+    Claim and process jobs until stopped.
+
+    Args:
+        worker_id: Identifier recorded on claimed jobs; generated when omitted
+        poll_interval: Seconds to sleep when the queue is empty
+        stop_event: Event that ends the loop when set
+        max_jobs: Stop after processing this many jobs (None = run forever)
+
+    Returns:
+        Number of jobs processed
+    """
+    load_dotenv()
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+    # Created inside the worker process: SQLite connections must not cross a fork
+    store = JobStore()
+    service = ResumeReviewService()
+    processed = 0
+    logger.info(f"Worker {worker_id} started (queue: {store.path})")
+    while not (stop_event and stop_event.is_set()):
+        if max_jobs is not None and processed >= max_jobs:
+            break
+        job = store.claim(worker_id)
+        if job is None:
+            time.sleep(poll_interval)
+            continue
+        logger.info(f"Worker {worker_id} processing job {job['id']} (attempt {job['attempts']})")
+        keeper = _LeaseKeeper(store, job["id"], worker_id)
+        keeper.start()
+        try:
+            result = process_job(service, job["payload"])
+            store.complete(job["id"], worker_id, result)
+        except Exception as e:
+            retryable = is_retryable(e)
+            logger.error(f"Job {job['id']} failed{'' if retryable else ' permanently'}: {e}")
+            store.fail(job["id"], worker_id, str(e), retryable=retryable)
+        finally:
+            keeper.stopped.set()
+        processed += 1
+    return processed
+
+
+def _worker_process(**kwargs) -> None:
+    # Ctrl+C is handled by the parent, which sets stop_event so the current job can finish
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    run_worker(**kwargs)
+
+
+def main():
+    """Start the configured number of worker processes."""
+    load_dotenv()
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s [%(levelname)s] %(processName)s %(name)s: %(message)s',
+    )
+    parser = argparse.ArgumentParser(description='Resume review job worker')
+    parser.add_argument('--processes', '-p', type=int, default=int(os.getenv("JOBS_WORKER_PROCESSES", "2")),
+                        help='Number of worker processes')
+    parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds between polls of an empty queue')
+    args = parser.parse_args()
+
+    stop_event = multiprocessing.Event()
+    processes = [
+        multiprocessing.Process(target=_worker_process, kwargs={"poll_interval": args.poll_interval, "stop_event": stop_event},
+                                name=f"worker-{i}")
+        for i in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+
+    def request_stop(signum, frame):
+        # Let in-flight jobs finish; anything left behind is re-leased after the visibility timeout
+        logger.info("Stopping workers after their current job...")
+        stop_event.set()
+
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    main()